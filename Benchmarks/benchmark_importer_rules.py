@@ -0,0 +1,179 @@
+# MIT License
+
+# Copyright (c) 2023 Ryan DowlingSoka
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Benchmarks ImporterRulesManager.on_asset_post_import outside of the editor against the unreal stub module.
+
+    python Benchmarks/benchmark_importer_rules.py --assets 100000 --rules 10 100 1000 --reimport-ratio 0.25
+    python Benchmarks/benchmark_importer_rules.py --save-baseline before
+    python Benchmarks/benchmark_importer_rules.py --compare before
+
+Baselines are stored as JSON in Benchmarks/baselines/ together with the git commit they were taken at.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+from time import perf_counter
+from typing import Any, Dict, List
+
+import workloads
+import unreal
+from ImporterRules.Manager import ImporterRulesManager
+from ImporterRules.Profiling import profiler
+
+BASELINES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+
+
+def run_scenario(asset_count: int, rule_count: int, reimport_ratio: float, seed: int) -> Dict[str, Any]:
+    """Import asset_count synthetic assets through a fresh manager with rule_count rules registered."""
+    unreal.reset()
+    manager = ImporterRulesManager()
+    for class_type, rule in workloads.generate_rules(rule_count, seed):
+        manager.register_rule(class_type, rule)
+    events = workloads.generate_events(asset_count, reimport_ratio, seed)
+    post_import = unreal.get_editor_subsystem(unreal.ImportSubsystem).on_asset_post_import
+
+    unreal.engine_calls.clear()
+    latencies: List[float] = []
+    start = perf_counter()
+    for event in events:
+        event_start = perf_counter()
+        post_import.broadcast(event.factory, event.created_object)
+        latencies.append(perf_counter() - event_start)
+    # anything the manager decided to batch is part of the cost too.
+    unreal.tick_until_idle()
+    seconds = perf_counter() - start
+
+    latencies.sort()
+    return {
+        "assets": asset_count,
+        "rules": rule_count,
+        "reimport_ratio": reimport_ratio,
+        "seconds": seconds,
+        "assets_per_second": asset_count / seconds if seconds else 0.0,
+        "mean_us": sum(latencies) * 1e6 / len(latencies) if latencies else 0.0,
+        "p50_us": _percentile(latencies, 0.5) * 1e6,
+        "p90_us": _percentile(latencies, 0.9) * 1e6,
+        "p99_us": _percentile(latencies, 0.99) * 1e6,
+        "max_us": latencies[-1] * 1e6 if latencies else 0.0,
+        "engine_calls_per_asset": sum(unreal.engine_calls.values()) / asset_count if asset_count else 0.0,
+    }
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Any], threshold: float) -> bool:
+    """Print the change against the baseline. Returns False if a scenario got slower by more than threshold."""
+    passed = True
+    print(f"\nCompared with baseline at commit {baseline.get('commit') or 'unknown'}:")
+    for name, result in results.items():
+        previous = baseline["scenarios"].get(name)
+        if previous is None:
+            print(f"  {name:<24} no baseline")
+            continue
+        throughput = result["assets_per_second"] / previous["assets_per_second"] - 1.0
+        mean = result["mean_us"] / previous["mean_us"] - 1.0 if previous["mean_us"] else 0.0
+        regressed = throughput < -threshold
+        passed = passed and not regressed
+        print(
+            f"  {name:<24} throughput {throughput:+7.1%}  mean latency {mean:+7.1%}"
+            + ("  REGRESSION" if regressed else "")
+        )
+    return passed
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)), text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def _baseline_path(name: str) -> str:
+    return os.path.join(BASELINES_DIR, f"{name}.json")
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--assets", type=int, default=10000, help="assets imported per scenario")
+    parser.add_argument("--rules", type=int, nargs="+", default=[10, 100, 1000], help="rule counts to run a scenario for")
+    parser.add_argument("--reimport-ratio", type=float, default=0.25, help="fraction of the assets that are reimports")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save-baseline", metavar="NAME", help="save the results as Benchmarks/baselines/NAME.json")
+    parser.add_argument("--compare", metavar="NAME", help="compare the results with a saved baseline")
+    parser.add_argument("--threshold", type=float, default=0.1, help="throughput drop that counts as a regression")
+    parser.add_argument("--profile", metavar="PATH", help="run with the profiler enabled and write its snapshot to PATH")
+    arguments = parser.parse_args(argv)
+
+    if arguments.profile:
+        profiler.enable()
+
+    results: Dict[str, Dict[str, Any]] = {}
+    print(f"{'scenario':<24} {'assets/s':>10} {'mean us':>9} {'p50 us':>9} {'p90 us':>9} {'p99 us':>9} {'calls/asset':>12}")
+    for rule_count in arguments.rules:
+        name = f"rules={rule_count}"
+        result = results[name] = run_scenario(arguments.assets, rule_count, arguments.reimport_ratio, arguments.seed)
+        print(
+            f"{name:<24} {result['assets_per_second']:>10.0f} {result['mean_us']:>9.1f} {result['p50_us']:>9.1f}"
+            f" {result['p90_us']:>9.1f} {result['p99_us']:>9.1f} {result['engine_calls_per_asset']:>12.1f}"
+        )
+
+    if arguments.profile:
+        profiler.export_json(arguments.profile)
+        print(f"\nSaved profile {arguments.profile}")
+
+    if arguments.save_baseline:
+        os.makedirs(BASELINES_DIR, exist_ok=True)
+        with open(_baseline_path(arguments.save_baseline), "w") as file:
+            json.dump(
+                {
+                    "commit": _git_commit(),
+                    "created": datetime.datetime.now().isoformat(timespec="seconds"),
+                    "python": platform.python_version(),
+                    "scenarios": results,
+                },
+                file,
+                indent=2,
+            )
+        print(f"\nSaved baseline {_baseline_path(arguments.save_baseline)}")
+
+    if arguments.compare:
+        with open(_baseline_path(arguments.compare)) as file:
+            baseline = json.load(file)
+        if not compare(results, baseline, arguments.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,322 @@
+# MIT License
+
+# Copyright (c) 2023 Ryan DowlingSoka
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Replays imports recorded in the editor with importer_rules_manager.start_recording() through a rule set, against
+the unreal stub module, and reports which rules fired, the properties and tags they would write and how long the
+rules took. Saved reports can be diffed, to see what a change to the rules does to a production import stream.
+
+    python Benchmarks/replay_imports.py imports.jsonl --rules-module MyRules --python-path D:/Project/Content/Python --output before.json
+    python Benchmarks/replay_imports.py imports.jsonl --rule-files D:/Project/Content/Python/Rules --diff before.json
+
+Editor properties the stub doesn't know read as None and anything can be written, and source files are only read
+if they exist on this machine, so queries on editor properties or source file headers can behave differently than
+in the editor.
+"""
+
+import argparse
+import importlib
+import json
+import sys
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Tuple
+
+import workloads
+import unreal
+from ImporterRules import importer_rules_manager
+from ImporterRules.Errors import error_collector
+from ImporterRules.Profiling import profiler
+from ImporterRules.Recording import ImportRecord, read_recording
+from ImporterRules.RuleFiles import load_rule_files
+
+from benchmark_importer_rules import _git_commit, _percentile
+
+# tags the manager writes for itself, left out of the results so only what the rules do is compared.
+BOOKKEEPING_TAGS = {"importer_rules_applied", importer_rules_manager.fingerprint_tag}
+
+
+class ReplayObject(unreal.Object):
+    """A recorded asset. Any editor property can be read, as None unless the stub has a default for it, and every
+       property written to it is remembered."""
+
+    def __init__(self, path: str = "", **editor_properties: Any) -> None:
+        super().__init__(path, **editor_properties)
+        self.written_properties: Dict[str, Any] = {}
+
+    def get_editor_property(self, name: str) -> Any:
+        unreal.engine_calls["Object.get_editor_property"] += 1
+        return self._editor_properties.get(name)
+
+    def set_editor_property(self, name: str, value: Any, notify_mode: Any = None) -> None:
+        unreal.engine_calls["Object.set_editor_property"] += 1
+        self._editor_properties[name] = value
+        self.written_properties[name] = value
+
+    def set_editor_properties(self, properties: Dict[str, Any]) -> None:
+        unreal.engine_calls["Object.set_editor_properties"] += 1
+        self._editor_properties.update(properties)
+        self.written_properties.update(properties)
+
+
+_replay_classes: Dict[str, type] = {}
+_factories: Dict[str, unreal.Factory] = {}
+
+
+def _get_unreal_class(name: str, base: type) -> type:
+    """The stub class called name, or an empty subclass of base added to the stub if it doesn't have one."""
+    cls = getattr(unreal, name, None)
+    if not isinstance(cls, type) or not issubclass(cls, base):
+        cls = type(name, (base,), {})
+        setattr(unreal, name, cls)
+    return cls
+
+
+def declare_classes(records: List[ImportRecord]) -> None:
+    """Add the recorded classes the stub is missing, so rule modules that use them can be imported."""
+    for record in records:
+        _get_unreal_class(record.object_class, unreal.Object)
+        if record.factory_class is not None:
+            _get_unreal_class(record.factory_class, unreal.Factory)
+
+
+def create_asset(record: ImportRecord) -> Tuple[Optional[unreal.Factory], unreal.Object]:
+    """The factory and a fresh created object for a recorded import."""
+    replay_class = _replay_classes.get(record.object_class)
+    if replay_class is None:
+        # named like the recorded class, and without a docstring so any editor property is accepted by the schema.
+        replay_class = type(record.object_class, (ReplayObject, _get_unreal_class(record.object_class, unreal.Object)), {})
+        _replay_classes[record.object_class] = replay_class
+
+    factory = None
+    if record.factory_class is not None:
+        factory = _factories.get(record.factory_class)
+        if factory is None:
+            factory = _factories[record.factory_class] = _get_unreal_class(record.factory_class, unreal.Factory)()
+
+    properties = {}
+    if record.source_path is not None:
+        properties["asset_import_data"] = unreal.AssetImportData(record.source_path)
+    created_object = replay_class(record.destination_path or "", **properties)
+    created_object._metadata_tags.update(record.tags)
+    return factory, created_object
+
+
+def load_rules(arguments: argparse.Namespace) -> None:
+    for path in arguments.python_path:
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    for module_name in arguments.rules_module:
+        importlib.import_module(module_name)
+    if arguments.rule_files:
+        load_rule_files(arguments.rule_files)
+    if arguments.synthetic_rules:
+        for class_type, rule in workloads.generate_rules(arguments.synthetic_rules, arguments.seed):
+            importer_rules_manager.register_rule(class_type, rule)
+
+
+def time_replay(records: List[ImportRecord]) -> Dict[str, Any]:
+    """Run the recorded imports through the manager with the profiler off, and time them."""
+    events = [create_asset(record) for record in records]
+    profiler.disable()
+    error_collector.enable_rules()
+    error_collector.clear()
+    unreal.engine_calls.clear()
+
+    latencies: List[float] = []
+    start = perf_counter()
+    for factory, created_object in events:
+        event_start = perf_counter()
+        importer_rules_manager.on_asset_post_import(factory, created_object)
+        latencies.append(perf_counter() - event_start)
+    unreal.tick_until_idle()
+    seconds = perf_counter() - start
+
+    latencies.sort()
+    return {
+        "seconds": seconds,
+        "assets_per_second": len(events) / seconds if seconds else 0.0,
+        "mean_us": sum(latencies) * 1e6 / len(latencies) if latencies else 0.0,
+        "p50_us": _percentile(latencies, 0.5) * 1e6,
+        "p90_us": _percentile(latencies, 0.9) * 1e6,
+        "p99_us": _percentile(latencies, 0.99) * 1e6,
+        "max_us": latencies[-1] * 1e6 if latencies else 0.0,
+        "engine_calls_per_asset": sum(unreal.engine_calls.values()) / len(events) if events else 0.0,
+    }
+
+
+def collect_results(records: List[ImportRecord]) -> List[Dict[str, Any]]:
+    """Run the recorded imports through the manager with the profiler on, and collect what happened to each."""
+    events = [create_asset(record) for record in records]
+    error_collector.enable_rules()
+    error_collector.clear()
+    profiler.reset()
+    # identical rules without a name would share their description, so every rule is recorded under its label.
+    for rule, label in importer_rules_manager.get_rule_labels():
+        profiler.set_name(rule, label)
+    profiler.enable()
+
+    results: List[Dict[str, Any]] = []
+    hits: Dict[str, int] = {}
+    for record, (factory, created_object) in zip(records, events):
+        tags_before = dict(created_object._metadata_tags)
+        importer_rules_manager.on_asset_post_import(factory, created_object)
+        unreal.tick_until_idle()
+
+        # rules whose hit count went up applied their actions to this asset.
+        new_hits = profiler.get_hits("rule")
+        fired = [name for name, count in new_hits.items() if count > hits.get(name, 0)]
+        hits = new_hits
+        results.append({
+            "destination": record.destination_path,
+            "rules": fired,
+            "properties": {name: _to_json(value) for name, value in created_object.written_properties.items()},
+            "tags": {
+                key: value
+                for key, value in created_object._metadata_tags.items()
+                if key not in BOOKKEEPING_TAGS and tags_before.get(key) != value
+            },
+        })
+    profiler.disable()
+    return results
+
+
+def summarize(results: List[Dict[str, Any]]) -> Dict[str, Dict[str, int]]:
+    """How many assets each rule fired for, and each property and tag value was written to."""
+    rules: Dict[str, int] = {}
+    writes: Dict[str, int] = {}
+    for result in results:
+        for name in result["rules"]:
+            rules[name] = rules.get(name, 0) + 1
+        for name, value in [*result["properties"].items(), *result["tags"].items()]:
+            key = f"{name}={value}"
+            writes[key] = writes.get(key, 0) + 1
+    return {"rules": rules, "writes": writes}
+
+
+def diff_reports(current: Dict[str, Any], previous: Dict[str, Any], max_examples: int) -> int:
+    """Print what changed between two reports of the same recording. Returns the number of assets that changed."""
+    timing, previous_timing = current["timing"], previous["timing"]
+    throughput = current_mean = 0.0
+    if previous_timing["assets_per_second"]:
+        throughput = timing["assets_per_second"] / previous_timing["assets_per_second"] - 1.0
+    if previous_timing["mean_us"]:
+        current_mean = timing["mean_us"] / previous_timing["mean_us"] - 1.0
+    print(f"\nCompared with {previous.get('commit') or 'the previous report'}:")
+    print(f"  throughput {throughput:+.1%}  mean latency {current_mean:+.1%}")
+
+    if len(current["results"]) != len(previous["results"]):
+        print(f"  the reports have {len(current['results'])} and {len(previous['results'])} assets, comparing the first ones.")
+
+    for section in ("rules", "writes"):
+        counts, previous_counts = current["summary"][section], previous["summary"][section]
+        changes = [
+            (name, previous_counts.get(name, 0), counts.get(name, 0))
+            for name in {*counts, *previous_counts}
+            if counts.get(name, 0) != previous_counts.get(name, 0)
+        ]
+        changes.sort(key=lambda change: -abs(change[2] - change[1]))
+        for name, before, after in changes[:max_examples]:
+            print(f"  {section[:-1]} {name}: {before} -> {after} assets")
+        if len(changes) > max_examples:
+            print(f"  ... and {len(changes) - max_examples} more {section} changed.")
+
+    changed = 0
+    for result, previous_result in zip(current["results"], previous["results"]):
+        if result == previous_result:
+            continue
+        changed += 1
+        if changed > max_examples:
+            continue
+        print(f"  {result['destination']}:")
+        for name in [name for name in previous_result["rules"] if name not in result["rules"]]:
+            print(f"    - rule {name}")
+        for name in [name for name in result["rules"] if name not in previous_result["rules"]]:
+            print(f"    + rule {name}")
+        for section in ("properties", "tags"):
+            values, previous_values = result[section], previous_result[section]
+            for name in sorted({*values, *previous_values}):
+                if values.get(name) != previous_values.get(name):
+                    print(f"    {name}: {previous_values.get(name)} -> {values.get(name)}")
+    print(f"  {changed} of {min(len(current['results']), len(previous['results']))} assets changed.")
+    return changed
+
+
+def _to_json(value: Any) -> Any:
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("recording", help="recording written by importer_rules_manager.start_recording()")
+    parser.add_argument("--rules-module", nargs="+", default=[], help="modules that register rules when imported")
+    parser.add_argument("--rule-files", nargs="+", default=[], help="directories of rule files to load")
+    parser.add_argument("--python-path", nargs="+", default=[], help="directories to import the rule modules from")
+    parser.add_argument("--synthetic-rules", type=int, default=0, help="also register this many synthetic rules")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=1, help="time the replay this many times and keep the fastest")
+    parser.add_argument("--output", metavar="PATH", help="save the report as JSON")
+    parser.add_argument("--diff", metavar="PATH", help="compare with a report saved with --output")
+    parser.add_argument("--max-examples", type=int, default=20, help="changed assets and counts to print with --diff")
+    arguments = parser.parse_args(argv)
+
+    records = list(read_recording(arguments.recording))
+    declare_classes(records)
+    load_rules(arguments)
+    class_names = {record.object_class for record in records}
+    if not any(importer_rules_manager.get_rules_for_class(getattr(unreal, name)) for name in class_names):
+        parser.error("none of the recorded classes have rules, pass --rules-module, --rule-files or --synthetic-rules")
+
+    timing = min((time_replay(records) for _ in range(max(1, arguments.repeat))), key=lambda result: result["seconds"])
+    results = collect_results(records)
+    report = {
+        "commit": _git_commit(),
+        "recording": arguments.recording,
+        "assets": len(records),
+        "timing": timing,
+        "summary": summarize(results),
+        "results": results,
+    }
+
+    print(
+        f"Replayed {len(records)} imports: {timing['assets_per_second']:.0f} assets/s, mean {timing['mean_us']:.1f} us,"
+        f" p99 {timing['p99_us']:.1f} us, {timing['engine_calls_per_asset']:.1f} engine calls per asset"
+    )
+    rule_counts = sorted(report["summary"]["rules"].items(), key=lambda item: -item[1])
+    print(f"{sum(1 for result in results if result['rules'])} assets had rules fire, {len(rule_counts)} rules fired:")
+    for name, count in rule_counts[:arguments.max_examples]:
+        print(f"  {count:>8}  {name}")
+
+    if arguments.output:
+        with open(arguments.output, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"\nSaved report {arguments.output}")
+
+    if arguments.diff:
+        with open(arguments.diff) as file:
+            diff_reports(report, json.load(file), arguments.max_examples)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
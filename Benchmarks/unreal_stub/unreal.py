@@ -0,0 +1,435 @@
+# MIT License
+
+# Copyright (c) 2023 Ryan DowlingSoka
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Pure python stand-in for the parts of the unreal module used by ImporterRules, so the package can be run and
+benchmarked outside of the editor. Only put this folder on the python path of an external interpreter, never in
+the editor, where it would hide the real unreal module.
+
+Every call that would cross into the engine is counted in engine_calls, so benchmarks can report round trips.
+"""
+
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional
+
+engine_calls: Counter = Counter()
+log_messages: Counter = Counter()
+verbose = False
+
+_objects: Dict[str, "Object"] = {}
+_subsystems: Dict[type, Any] = {}
+_tick_callbacks: Dict[int, Callable[[float], None]] = {}
+_next_tick_handle = 1
+
+
+def reset() -> None:
+    """Forget every object, subsystem, tick callback and counter."""
+    global _next_tick_handle
+    engine_calls.clear()
+    log_messages.clear()
+    _objects.clear()
+    _subsystems.clear()
+    _tick_callbacks.clear()
+    _next_tick_handle = 1
+
+
+# Logging ---------------------------------------------------------------------------------------------------------
+
+def log(message: Any) -> None:
+    log_messages["log"] += 1
+    if verbose:
+        print(f"LogPython: {message}")
+
+
+def log_warning(message: Any) -> None:
+    log_messages["warning"] += 1
+    if verbose:
+        print(f"LogPython: Warning: {message}")
+
+
+def log_error(message: Any) -> None:
+    log_messages["error"] += 1
+    if verbose:
+        print(f"LogPython: Error: {message}")
+
+
+class AppMsgType(object):
+    OK = 0
+    YES_NO = 1
+    OK_CANCEL = 2
+
+
+class AppReturnType(object):
+    NO = 0
+    YES = 1
+    OK = 3
+    CANCEL = 4
+
+
+class EditorDialog(object):
+    messages: List[str] = []
+
+    @staticmethod
+    def show_message(title: str, message: str, message_type: int, default_value: int = AppReturnType.OK, category=None) -> int:
+        engine_calls["EditorDialog.show_message"] += 1
+        EditorDialog.messages.append(f"{title}: {message}")
+        return default_value
+
+
+class ScopedSlowTask(object):
+    def __init__(self, work: float, desc: str = "", enabled: bool = True) -> None:
+        self.work = work
+        self.completed = 0.0
+
+    def __enter__(self) -> "ScopedSlowTask":
+        return self
+
+    def __exit__(self, *args) -> None:
+        pass
+
+    def make_dialog(self, can_cancel: bool = False, allow_in_pie: bool = False) -> None:
+        pass
+
+    def make_dialog_delayed(self, threshold: float, can_cancel: bool = False, allow_in_pie: bool = False) -> None:
+        pass
+
+    def enter_progress_frame(self, work: float = 1.0, desc: str = "") -> None:
+        self.completed += work
+
+    def should_cancel(self) -> bool:
+        return False
+
+
+# Objects ---------------------------------------------------------------------------------------------------------
+
+class Object(object):
+    """UObject stand-in. Editor properties are stored in a dict seeded from the class's _default_properties."""
+
+    _default_properties: Dict[str, Any] = {}
+
+    def __init__(self, path: str = "", **editor_properties: Any) -> None:
+        self._path = path or f"/Engine/Transient.{type(self).__name__}_{id(self)}"
+        self._editor_properties: Dict[str, Any] = {}
+        for cls in reversed(type(self).__mro__):
+            self._editor_properties.update(cls.__dict__.get("_default_properties", {}))
+        self._editor_properties.update(editor_properties)
+        self._metadata_tags: Dict[str, str] = {}
+        _objects[self._path] = self
+
+    def __repr__(self) -> str:
+        return f"<Object '{self._path}' ({type(self).__name__})>"
+
+    def get_path_name(self) -> str:
+        engine_calls["Object.get_path_name"] += 1
+        return self._path
+
+    def get_name(self) -> str:
+        engine_calls["Object.get_name"] += 1
+        return self._path.rsplit(".", 1)[-1]
+
+    def get_full_name(self) -> str:
+        engine_calls["Object.get_full_name"] += 1
+        return f"{type(self).__name__} {self._path}"
+
+    def get_class(self) -> type:
+        engine_calls["Object.get_class"] += 1
+        return type(self)
+
+    def get_editor_property(self, name: str) -> Any:
+        engine_calls["Object.get_editor_property"] += 1
+        if name not in self._editor_properties:
+            raise Exception(f"Failed to find property '{name}' for attribute '{name}' on '{type(self).__name__}'")
+        return self._editor_properties[name]
+
+    def set_editor_property(self, name: str, value: Any, notify_mode: Any = None) -> None:
+        engine_calls["Object.set_editor_property"] += 1
+        if name not in self._editor_properties:
+            raise Exception(f"Failed to find property '{name}' for attribute '{name}' on '{type(self).__name__}'")
+        self._editor_properties[name] = value
+
+    def set_editor_properties(self, properties: Dict[str, Any]) -> None:
+        engine_calls["Object.set_editor_properties"] += 1
+        for name, value in properties.items():
+            if name not in self._editor_properties:
+                raise Exception(f"Failed to find property '{name}' for attribute '{name}' on '{type(self).__name__}'")
+            self._editor_properties[name] = value
+
+
+def find_object(outer: Optional[Object], name: str, type: Optional[type] = None, follow_redirectors: bool = True) -> Optional[Object]:
+    engine_calls["find_object"] += 1
+    return _objects.get(name)
+
+
+class AssetImportData(Object):
+    def __init__(self, source_file: str = "", **editor_properties: Any) -> None:
+        super().__init__(**editor_properties)
+        self._source_file = source_file
+
+    def get_first_filename(self) -> str:
+        engine_calls["AssetImportData.get_first_filename"] += 1
+        return self._source_file
+
+
+class Factory(Object):
+    pass
+
+
+class TextureFactory(Factory):
+    pass
+
+
+class FbxFactory(Factory):
+    pass
+
+
+class SoundFactory(Factory):
+    pass
+
+
+class Texture(Object):
+    _default_properties = {
+        "asset_import_data": None,
+        "srgb": True,
+        "lod_bias": 0,
+        "compression_settings": 0,
+        "lod_group": 0,
+        "never_stream": False,
+    }
+
+
+class Texture2D(Texture):
+    _default_properties = {
+        "flip_green_channel": False,
+        "address_x": 0,
+        "address_y": 0,
+    }
+
+
+class StaticMesh(Object):
+    _default_properties = {
+        "asset_import_data": None,
+        "light_map_resolution": 64,
+        "lod_group": "None",
+    }
+
+
+class SkeletalMesh(Object):
+    _default_properties = {
+        "asset_import_data": None,
+        "enable_per_poly_collision": False,
+    }
+
+
+class SoundWave(Object):
+    _default_properties = {
+        "asset_import_data": None,
+        "looping": False,
+        "volume": 1.0,
+    }
+
+
+class MaterialInstanceConstant(Object):
+    _default_properties = {
+        "parent": None,
+    }
+
+
+def _document_editor_properties() -> None:
+    """Give every class the "Editor Properties" docstring section unreal generates from reflection."""
+    for cls in list(globals().values()):
+        if isinstance(cls, type) and issubclass(cls, Object):
+            properties: Dict[str, Any] = {}
+            for base in reversed(cls.__mro__):
+                properties.update(base.__dict__.get("_default_properties", {}))
+            lines = [f"- ``{name}`` ({type(value).__name__}):  [Read-Write]" for name, value in sorted(properties.items())]
+            cls.__doc__ = (
+                f"{cls.__name__}\n\n**Editor Properties:** (see get_editor_property/set_editor_property)\n\n"
+                + "\n".join(lines)
+            )
+
+
+_document_editor_properties()
+
+_default_objects: Dict[type, Object] = {}
+
+
+def get_default_object(object_class: type) -> Object:
+    engine_calls["get_default_object"] += 1
+    default_object = _default_objects.get(object_class)
+    if default_object is None:
+        default_object = _default_objects[object_class] = object_class(f"/Script/Engine.Default__{object_class.__name__}")
+    return default_object
+
+
+# Asset registry --------------------------------------------------------------------------------------------------
+
+class TopLevelAssetPath(object):
+    def __init__(self, package_name: str, asset_name: str) -> None:
+        self.package_name = package_name
+        self.asset_name = asset_name
+
+
+class AssetData(object):
+    def __init__(self, object: Object) -> None:
+        package_name, asset_name = object._path.rsplit(".", 1)
+        self.package_name = package_name
+        self.asset_name = asset_name
+        self.asset_class_path = TopLevelAssetPath("/Script/Engine", type(object).__name__)
+        self._tags: Dict[str, str] = {}
+        asset_import_data = object._editor_properties.get("asset_import_data")
+        if asset_import_data is not None:
+            source_file = asset_import_data._source_file.replace('"', '\\"')
+            self._tags["AssetImportData"] = f'[{{ "RelativeFilename" : "{source_file}", "Timestamp" : "0", "FileMD5" : "" }}]'
+
+    def get_tag_value(self, tag_name: str) -> Optional[str]:
+        return self._tags.get(tag_name)
+
+
+class AssetRegistry(object):
+    def get_assets_by_path(self, package_path: str, recursive: bool = False, include_only_on_disk_assets: bool = False) -> List[AssetData]:
+        engine_calls["AssetRegistry.get_assets_by_path"] += 1
+        prefix = package_path.rstrip("/") + "/"
+        return [
+            AssetData(object)
+            for path, object in _objects.items()
+            if path.startswith(prefix) and "." in path and (recursive or "/" not in path[len(prefix):].split(".")[0])
+        ]
+
+
+class AssetRegistryHelpers(object):
+    _asset_registry = AssetRegistry()
+
+    @staticmethod
+    def get_asset_registry() -> AssetRegistry:
+        return AssetRegistryHelpers._asset_registry
+
+
+class EditorAssetLibrary(object):
+    saved: List[str] = []
+
+    @staticmethod
+    def load_asset(asset_path: str) -> Optional[Object]:
+        engine_calls["EditorAssetLibrary.load_asset"] += 1
+        return _objects.get(asset_path)
+
+    @staticmethod
+    def save_loaded_asset(asset_to_save: Object, only_if_is_dirty: bool = True) -> bool:
+        engine_calls["EditorAssetLibrary.save_loaded_asset"] += 1
+        EditorAssetLibrary.saved.append(asset_to_save._path)
+        return True
+
+
+class Paths(object):
+    @staticmethod
+    def project_content_dir() -> str:
+        return "../../../Project/Content/"
+
+    @staticmethod
+    def project_saved_dir() -> str:
+        return "../../../Project/Saved/"
+
+    @staticmethod
+    def convert_relative_path_to_full(path: str) -> str:
+        return "D:/Project/" + path.replace("../../../Project/", "")
+
+
+# Subsystems ------------------------------------------------------------------------------------------------------
+
+class _MulticastDelegate(object):
+    def __init__(self) -> None:
+        self._callables: List[Callable] = []
+
+    def add_callable(self, callable: Callable) -> None:
+        self._callables.append(callable)
+
+    def remove_callable(self, callable: Callable) -> None:
+        self._callables.remove(callable)
+
+    def broadcast(self, *args: Any) -> None:
+        for callable in list(self._callables):
+            callable(*args)
+
+
+class ImportSubsystem(object):
+    def __init__(self) -> None:
+        self.on_asset_pre_import = _MulticastDelegate()
+        self.on_asset_post_import = _MulticastDelegate()
+        self.on_asset_reimport = _MulticastDelegate()
+
+
+class EditorAssetSubsystem(object):
+    def get_metadata_tag(self, object: Object, tag: str) -> str:
+        engine_calls["EditorAssetSubsystem.get_metadata_tag"] += 1
+        return object._metadata_tags.get(tag, "")
+
+    def get_metadata_tag_values(self, object: Object) -> Dict[str, str]:
+        engine_calls["EditorAssetSubsystem.get_metadata_tag_values"] += 1
+        return dict(object._metadata_tags)
+
+    def set_metadata_tag(self, object: Object, tag: str, value: str) -> None:
+        engine_calls["EditorAssetSubsystem.set_metadata_tag"] += 1
+        object._metadata_tags[tag] = value
+
+    def remove_metadata_tag(self, object: Object, tag: str) -> None:
+        engine_calls["EditorAssetSubsystem.remove_metadata_tag"] += 1
+        object._metadata_tags.pop(tag, None)
+
+
+def get_editor_subsystem(subsystem_class: type) -> Any:
+    engine_calls["get_editor_subsystem"] += 1
+    subsystem = _subsystems.get(subsystem_class)
+    if subsystem is None:
+        subsystem = _subsystems[subsystem_class] = subsystem_class()
+    return subsystem
+
+
+# Ticking ---------------------------------------------------------------------------------------------------------
+
+def is_editor() -> bool:
+    return True
+
+
+def register_slate_post_tick_callback(callable: Callable[[float], None]) -> int:
+    global _next_tick_handle
+    handle = _next_tick_handle
+    _next_tick_handle += 1
+    _tick_callbacks[handle] = callable
+    return handle
+
+
+def unregister_slate_post_tick_callback(handle: int) -> None:
+    _tick_callbacks.pop(handle, None)
+
+
+def tick(delta_seconds: float = 1.0 / 60.0) -> None:
+    """Run the registered slate post tick callbacks, like a frame of the editor would."""
+    for callable in list(_tick_callbacks.values()):
+        callable(delta_seconds)
+
+
+def tick_until_idle(delta_seconds: float = 1.0 / 60.0, max_ticks: int = 1000000) -> int:
+    """Tick until no callbacks are registered. Returns the number of ticks."""
+    ticks = 0
+    while _tick_callbacks and ticks < max_ticks:
+        tick(delta_seconds)
+        ticks += 1
+    return ticks
@@ -0,0 +1,148 @@
+# MIT License
+
+# Copyright (c) 2023 Ryan DowlingSoka
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Synthetic import workloads for benchmarking ImporterRules outside of the editor, using the unreal stub module.
+Importing this module puts the stub and the plugin's Content/Python folder on the python path.
+"""
+
+import os
+import random
+import sys
+from typing import List, Tuple
+
+_BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+for _path in (
+    os.path.join(_BENCHMARKS_DIR, "unreal_stub"),
+    os.path.join(os.path.dirname(_BENCHMARKS_DIR), "Content", "Python"),
+):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
+
+import unreal
+from ImporterRules import Rule, SourcePath, DestinationPath, SetEditorProperties, SetAssetTags
+from ImporterRules.Queries import CheckAssetTag
+from ImporterRules.Rules import ImportRuleBase
+
+TEXTURE_SUFFIXES = ["_n", "_d", "_r", "_m", "_o", "_h", "_e", "_a", "_mask", "_orm", "_bc", "_emissive"]
+MESH_SUFFIXES = ["_lod0", "_lod1", "_collision", "_proxy", "_hi", "_lo"]
+TEXTURE_EXTENSIONS = [".png", ".tga", ".exr", ".psd", ".dds"]
+MESH_EXTENSIONS = [".fbx", ".obj", ".gltf"]
+FOLDERS = ["Characters", "Environment", "Props", "Weapons", "Vehicles", "UI", "FX", "Foliage", "TestFolder"]
+TEAMS = [f"Team{index:02d}" for index in range(24)]
+
+
+class ImportEvent(object):
+    """A single on_asset_post_import call."""
+
+    __slots__ = ("factory", "created_object", "is_reimport")
+
+    def __init__(self, factory: unreal.Factory, created_object: unreal.Object, is_reimport: bool) -> None:
+        self.factory = factory
+        self.created_object = created_object
+        self.is_reimport = is_reimport
+
+
+def generate_rules(count: int, seed: int = 0) -> List[Tuple[type, ImportRuleBase]]:
+    """(class, rule) pairs shaped like a production naming convention, with team specific tokens so large rule
+       sets don't just repeat the same few queries."""
+    rng = random.Random(seed)
+    rules: List[Tuple[type, ImportRuleBase]] = []
+    for index in range(count):
+        team = rng.choice(TEAMS)
+        kind = rng.random()
+        if kind < 0.35:
+            suffixes = rng.sample(TEXTURE_SUFFIXES, rng.randint(1, 5))
+            rules.append((unreal.Texture2D, Rule(
+                queries=[SourcePath(file_name_ends_with=suffix) for suffix in suffixes],
+                actions=[SetEditorProperties(srgb=False)],
+            )))
+        elif kind < 0.55:
+            rules.append((unreal.Texture2D, Rule(
+                queries=[
+                    SourcePath(file_name_ends_with=rng.choice(TEXTURE_SUFFIXES)),
+                    DestinationPath(path_contains=f"/{team}/{rng.choice(FOLDERS)}/"),
+                ],
+                actions=[SetEditorProperties(lod_bias=rng.randint(0, 3))],
+                requires_all=True,
+            )))
+        elif kind < 0.70:
+            rules.append((unreal.Texture, Rule(
+                queries=[
+                    SourcePath(file_name_starts_with=f"t_{team.lower()}"),
+                    SourcePath(file_name_contains=f"_{rng.choice(FOLDERS).lower()}_"),
+                ],
+                actions=[SetAssetTags({"team": team, "rule": index})],
+            )))
+        elif kind < 0.80:
+            rules.append((unreal.Texture2D, Rule(
+                queries=[SourcePath(extensions=rng.sample(TEXTURE_EXTENSIONS, 2), full_path_contains=f"_{team.lower()}_", requires_all=True)],
+                actions=[SetEditorProperties(never_stream=True)],
+                apply_on_reimport=True,
+            )))
+        elif kind < 0.90:
+            rules.append((unreal.StaticMesh, Rule(
+                queries=[
+                    SourcePath(file_name_ends_with=rng.choice(MESH_SUFFIXES)),
+                    DestinationPath(path_contains=f"/{team}/"),
+                ],
+                actions=[SetEditorProperties(light_map_resolution=rng.choice([32, 64, 128, 256]))],
+                requires_all=True,
+            )))
+        else:
+            rules.append((unreal.Object, Rule(
+                queries=[CheckAssetTag("team", team)],
+                actions=[SetAssetTags({"reviewed": False})],
+                apply_on_reimport=True,
+            )))
+    return rules
+
+
+def generate_events(count: int, reimport_ratio: float = 0.0, seed: int = 0) -> List[ImportEvent]:
+    """Imported assets, mostly textures with some static meshes, spread over team folders. reimport_ratio of them
+       already carry the importer_rules_applied tag like an asset that had the rules run on it before."""
+    rng = random.Random(seed)
+    texture_factory = unreal.TextureFactory()
+    mesh_factory = unreal.FbxFactory()
+    events: List[ImportEvent] = []
+    for index in range(count):
+        team = rng.choice(TEAMS)
+        folder = rng.choice(FOLDERS)
+        if rng.random() < 0.8:
+            asset_class, factory = unreal.Texture2D, texture_factory
+            name = f"T_{team}_{folder}_{index}{rng.choice(TEXTURE_SUFFIXES)}"
+            extension = rng.choice(TEXTURE_EXTENSIONS)
+        else:
+            asset_class, factory = unreal.StaticMesh, mesh_factory
+            name = f"SM_{team}_{folder}_{index}{rng.choice(MESH_SUFFIXES)}"
+            extension = rng.choice(MESH_EXTENSIONS)
+
+        source_file = f"D:/Art/Source/{team}/{folder}/{name}{extension}"
+        created_object = asset_class(
+            f"/Game/{team}/{folder}/{name}.{name}",
+            asset_import_data=unreal.AssetImportData(source_file),
+        )
+        is_reimport = rng.random() < reimport_ratio
+        if is_reimport:
+            created_object._metadata_tags["importer_rules_applied"] = "True"
+        events.append(ImportEvent(factory, created_object, is_reimport))
+    return events
@@ -23,44 +23,86 @@
 from abc import ABC
 import unreal
 from traceback import format_exc
-from typing import Dict, Any
+from typing import Dict, Any, List
+from ImporterRules.ActivityLog import LogLevel, activity_log
+from ImporterRules.Context import get_import_context
+from ImporterRules.Schema import get_class_schema
+from ImporterRules.TagStore import tag_store
 
 
 class ImportActionBase(ABC):
     """Base import action class stub."""
 
+    # Set to True if the action stages its writes on the import context's deferred_writes, or doesn't touch the
+    # asset. Otherwise the values staged by earlier actions are written to the asset before it runs, so they don't
+    # overwrite what it does.
+    staged_writes_aware: bool = False
+
     def apply(self, factory: unreal.Factory, created_object: unreal.Object) -> bool:
         raise NotImplemented
 
+    def validate(self, class_type: type) -> List[str]:
+        """Problems with using this action for class_type, checked once when its rule is registered."""
+        return []
+
 
 class SetEditorProperties(ImportActionBase):
     """Generic import action to set editor properties with the set_editor_properties(dict) function."""
 
+    staged_writes_aware = True
+
     def __init__(self, **kwargs) -> None:
         self.editor_properties = kwargs
+        self._description = ", ".join(f"{name}={value}" for name, value in kwargs.items())
+        self._summary = f"{self._description} applied"
+
+    def validate(self, class_type: type) -> List[str]:
+        schema = get_class_schema(class_type)
+        return [
+            f"{class_type.__name__} has no editor property {name}"
+            for name in self.editor_properties
+            if schema.has_property(name) is False
+        ]
     
     def apply(self, factory: unreal.Factory, created_object: unreal.Object) -> bool:
         if created_object is None:
             return False
-        created_object.set_editor_properties(self.editor_properties)
-        unreal.log( f"Applied the following editor properties to {created_object.get_full_name()}")
-        unreal.log( self.editor_properties )
+        # while the manager is running the rules the write is staged and done once for every rule.
+        context = get_import_context(factory, created_object)
+        if context.deferred_writes is not None:
+            # counted in the summary once the properties were written.
+            context.deferred_writes.set_editor_properties(
+                self.editor_properties, context.current_rule, self._summary, context.object_class.__name__
+            )
+        else:
+            created_object.set_editor_properties(self.editor_properties)
+            activity_log.count(self._summary, context.object_class.__name__)
+        if activity_log.is_enabled(LogLevel.VERBOSE):
+            activity_log.verbose(
+                "SetEditorProperties",
+                f"Applied {self._description} to {context.destination_path}",
+                asset=context.destination_path,
+                properties=self.editor_properties,
+            )
         return True
     
 
 class SetAssetTags(ImportActionBase):
     """Generic import action to set asset tag data on the asset on import."""
 
+    staged_writes_aware = True
+
     def __init__(self, asset_tags:Dict[str,Any]) -> None:
         self.asset_tags = asset_tags
     
     def apply(self, factory: unreal.Factory, created_object: unreal.Object) -> bool:
         if created_object is None:
             return False
-        
-        eas = unreal.get_editor_subsystem(unreal.EditorAssetSubsystem)
-        if eas:
-            for key,value in self.asset_tags.items():
-                eas.set_metadata_tag(created_object, key, str(value))
 
+        deferred_writes = get_import_context(factory, created_object).deferred_writes
+        if deferred_writes is not None:
+            deferred_writes.set_asset_tags(self.asset_tags)
+            return True
+
+        tag_store.set_tags(created_object, self.asset_tags)
         return True
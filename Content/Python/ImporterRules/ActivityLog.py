@@ -0,0 +1,169 @@
+# MIT License
+
+# Copyright (c) 2023 Ryan DowlingSoka
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Buffered log of what the rules do. Per asset messages are kept in a ring buffer instead of being written to the
+output log, and what the actions did is counted and written as one summary per batch of imports, like
+"Importer Rules: srgb=False applied to 4,132 Texture2D".
+
+    from ImporterRules.ActivityLog import activity_log, LogLevel
+    activity_log.level = LogLevel.VERBOSE       # keep a message for every asset, not just the summaries
+    activity_log.echo_level = LogLevel.VERBOSE  # also write every message to the output log
+    activity_log.open_sink("C:/Temp/importer_rules_audit.jsonl")
+"""
+
+import json
+import unreal
+from collections import deque
+from enum import IntEnum
+from time import perf_counter, time
+from typing import Any, Deque, Dict, IO, List, Optional, Tuple
+
+
+class LogLevel(IntEnum):
+    VERBOSE = 10
+    INFO = 20
+    WARNING = 30
+    ERROR = 40
+
+
+class LogRecord(object):
+    """A single message, with the structured data it was logged with."""
+
+    __slots__ = ("time", "level", "category", "message", "data")
+
+    def __init__(self, time: float, level: LogLevel, category: str, message: str, data: Dict[str, Any]) -> None:
+        self.time = time
+        self.level = level
+        self.category = category
+        self.message = message
+        self.data = data
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "time": self.time,
+            "level": self.level.name,
+            "category": self.category,
+            "message": self.message,
+            "data": self.data,
+        }
+
+
+class ActivityLog(object):
+    """Ring buffer of log records, per batch summaries and an optional JSON lines file sink."""
+
+    def __init__(self, capacity: int = 10000) -> None:
+        # records below this level are dropped, and the per asset messages of the built-in actions aren't even
+        # formatted. Set it to VERBOSE to keep them.
+        self.level = LogLevel.INFO
+        # records at or above this level are also written to the output log, at most max_echoes_per_second times.
+        self.echo_level = LogLevel.WARNING
+        self.max_echoes_per_second = 20
+        self.records: Deque[LogRecord] = deque(maxlen=capacity)
+        self._summary: Dict[Tuple[str, str], int] = {}
+        self._sink: Optional[IO[str]] = None
+        self._echo_window_start = 0.0
+        self._echoes_in_window = 0
+        self._suppressed_echoes = 0
+
+    def is_enabled(self, level: LogLevel) -> bool:
+        """Check before building an expensive message."""
+        return level >= self.level
+
+    def log(self, level: LogLevel, category: str, message: str, **data: Any) -> None:
+        if level < self.level:
+            return
+        record = LogRecord(time(), level, category, message, data)
+        self.records.append(record)
+        if self._sink is not None:
+            self._sink.write(json.dumps(record.to_dict(), default=str) + "\n")
+        if level >= self.echo_level:
+            self._echo(level, message)
+
+    def verbose(self, category: str, message: str, **data: Any) -> None:
+        self.log(LogLevel.VERBOSE, category, message, **data)
+
+    def info(self, category: str, message: str, **data: Any) -> None:
+        self.log(LogLevel.INFO, category, message, **data)
+
+    def warning(self, category: str, message: str, **data: Any) -> None:
+        self.log(LogLevel.WARNING, category, message, **data)
+
+    def error(self, category: str, message: str, **data: Any) -> None:
+        self.log(LogLevel.ERROR, category, message, **data)
+
+    def count(self, summary: str, class_name: str, amount: int = 1) -> None:
+        """Count an asset of class_name in the summary line, e.g. count("srgb=False applied", "Texture2D")."""
+        key = (summary, class_name)
+        self._summary[key] = self._summary.get(key, 0) + amount
+
+    def get_summary(self) -> List[str]:
+        """The summary lines of everything counted since the last flush."""
+        return [f"{summary} to {count:,} {class_name}" for (summary, class_name), count in sorted(self._summary.items())]
+
+    def flush(self) -> None:
+        """Write the summary to the output log, and the sink to its file."""
+        for line in self.get_summary():
+            unreal.log(f"Importer Rules: {line}")
+        self._summary = {}
+        if self._suppressed_echoes:
+            unreal.log(
+                f"Importer Rules: {self._suppressed_echoes:,} more messages were not written to the output log, "
+                "see ImporterRules.ActivityLog.activity_log.records"
+            )
+            self._suppressed_echoes = 0
+        if self._sink is not None:
+            self._sink.flush()
+
+    def clear(self) -> None:
+        self.records.clear()
+        self._summary = {}
+        self._suppressed_echoes = 0
+
+    def open_sink(self, file_path: str) -> None:
+        """Append every record from now on to file_path as JSON lines, for auditing."""
+        self.close_sink()
+        self._sink = open(file_path, "a", encoding="utf-8")
+
+    def close_sink(self) -> None:
+        if self._sink is not None:
+            self._sink.close()
+            self._sink = None
+
+    def _echo(self, level: LogLevel, message: str) -> None:
+        now = perf_counter()
+        if now - self._echo_window_start >= 1.0:
+            self._echo_window_start = now
+            self._echoes_in_window = 0
+        if self._echoes_in_window >= self.max_echoes_per_second:
+            self._suppressed_echoes += 1
+            return
+        self._echoes_in_window += 1
+        if level >= LogLevel.ERROR:
+            unreal.log_error(f"Importer Rules: {message}")
+        elif level >= LogLevel.WARNING:
+            unreal.log_warning(f"Importer Rules: {message}")
+        else:
+            unreal.log(f"Importer Rules: {message}")
+
+
+activity_log = ActivityLog()
@@ -0,0 +1,347 @@
+# MIT License
+
+# Copyright (c) 2023 Ryan DowlingSoka
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Applies the registered rules to assets that already exist in the project, not just to newly imported ones.
+
+    from ImporterRules.Bulk import BulkRuleApplication
+    bulk = BulkRuleApplication(["/Game/Characters"], state_file="C:/Temp/bulk_rules.json")
+    report = bulk.dry_run()        # nothing is loaded, see report.rule_matches
+    report.save("C:/Temp/bulk_rules_report.json")
+    bulk.apply_all()               # loads and updates only the matching assets, can be cancelled
+
+    # in a later session, continue where the cancelled run stopped:
+    BulkRuleApplication.resume("C:/Temp/bulk_rules.json").apply_all()
+
+The dry run reads the source path, destination path and class of each asset from the asset registry and tests the
+SourcePath, DestinationPath and DestinationFolder queries of the rules in a process pool. Rules that also have other queries are
+reported as possible matches, and are tested on the loaded asset when the actions are applied.
+"""
+
+import hashlib
+import json
+import multiprocessing
+import os
+import posixpath
+import unreal
+from concurrent.futures import ProcessPoolExecutor
+from traceback import format_exc
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from ImporterRules.ActivityLog import activity_log
+from ImporterRules.Context import ImportContext
+from ImporterRules.Errors import error_collector
+from ImporterRules.Manager import ImporterRulesManager, importer_rules_manager
+from ImporterRules.Matching import DestinationFolderSpec, DestinationPathSpec, RuleSpec, SourcePathSpec, match_rule_specs
+from ImporterRules.Profiling import describe
+from ImporterRules.Queries import DestinationFolder, DestinationPath, SourcePath
+from ImporterRules.TagStore import tag_store
+from ImporterRules.Rules import ImportRuleBase
+
+
+class AssetRecord(object):
+    """What the asset registry knows about an asset, without loading it."""
+
+    __slots__ = ("object_path", "class_name", "source_path", "destination_path")
+
+    def __init__(self, object_path: str, class_name: str, source_path: Optional[str]) -> None:
+        self.object_path = object_path
+        self.class_name = class_name
+        self.source_path = source_path
+        # the destination path the queries test is the path name of the asset.
+        self.destination_path = object_path
+
+
+def gather_asset_records(content_paths: Sequence[str] = ("/Game",), recursive: bool = True) -> List[AssetRecord]:
+    """Read every asset under the content paths from the asset registry."""
+    asset_registry = unreal.AssetRegistryHelpers.get_asset_registry()
+    records: List[AssetRecord] = []
+    for content_path in content_paths:
+        for asset_data in asset_registry.get_assets_by_path(content_path, recursive=recursive):
+            package_name = str(asset_data.package_name)
+            object_path = f"{package_name}.{asset_data.asset_name}"
+            records.append(AssetRecord(object_path, _get_class_name(asset_data), _get_source_path(asset_data, package_name)))
+    return records
+
+
+class DryRunReport(object):
+    """Which assets each rule would change."""
+
+    def __init__(self) -> None:
+        # rule name -> object paths of the assets where all of the rule's queries pass.
+        self.rule_matches: Dict[str, List[str]] = {}
+        # rule name -> object paths of the assets where the rule depends on queries that need the loaded asset.
+        self.rule_possible_matches: Dict[str, List[str]] = {}
+        # object paths of assets whose class couldn't be found without loading them.
+        self.skipped: List[str] = []
+        self.asset_count = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "asset_count": self.asset_count,
+            "rule_matches": self.rule_matches,
+            "rule_possible_matches": self.rule_possible_matches,
+            "skipped": self.skipped,
+        }
+
+    def save(self, file_path: str) -> None:
+        with open(file_path, "w") as file:
+            json.dump(self.to_dict(), file, indent=2)
+
+    def log_summary(self) -> None:
+        unreal.log(f"Importer Rules dry run over {self.asset_count} assets:")
+        for name in sorted(set(self.rule_matches) | set(self.rule_possible_matches)):
+            matches = len(self.rule_matches.get(name, []))
+            possible = len(self.rule_possible_matches.get(name, []))
+            unreal.log(f"    {name}: {matches} assets, {possible} more possible")
+        if self.skipped:
+            unreal.log_warning(f"    {len(self.skipped)} assets were skipped because their class couldn't be found.")
+
+
+class BulkRuleApplication(object):
+    """Finds the existing assets the registered rules apply to, and applies them in resumable chunks."""
+
+    # number of assets loaded and updated per apply_next_chunk call.
+    chunk_size: int = 50
+    # number of assets each worker process tests at a time.
+    match_chunk_size: int = 2000
+    # below this many assets the dry run doesn't bother starting worker processes.
+    parallel_threshold: int = 5000
+
+    def __init__(
+        self,
+        content_paths: Sequence[str] = ("/Game",),
+        manager: Optional[ImporterRulesManager] = None,
+        processes: Optional[int] = None,
+        state_file: Optional[str] = None,
+        save_assets: bool = True,
+    ) -> None:
+        """processes is the size of the process pool, None for one per cpu and 0 to test everything in this process.
+           The progress of apply_all is written to state_file, if given, so it can be resumed."""
+        self.content_paths = list(content_paths)
+        self.manager = manager or importer_rules_manager
+        self.processes = processes
+        self.state_file = state_file
+        self.save_assets = save_assets
+        # (object path, class name, indices of the candidate rules) of every asset that still needs its rules applied.
+        self.pending: List[Tuple[str, str, List[int]]] = []
+        # class name -> signature of the rules the indices in pending refer to.
+        self._rule_signatures: Dict[str, str] = {}
+
+    @classmethod
+    def resume(cls, state_file: str, **kwargs: Any) -> "BulkRuleApplication":
+        """Continue an application that was stopped, from its state_file."""
+        with open(state_file) as file:
+            state = json.load(file)
+        bulk = cls(state["content_paths"], state_file=state_file, **kwargs)
+        bulk.pending = [(path, class_name, indices) for path, class_name, indices in state["pending"]]
+        bulk._rule_signatures = state["rule_signatures"]
+        return bulk
+
+    def dry_run(self, records: Optional[List[AssetRecord]] = None) -> DryRunReport:
+        """Work out which assets each rule applies to, without loading any of them. Fills pending for apply_all."""
+        if records is None:
+            records = gather_asset_records(self.content_paths)
+        report = DryRunReport()
+        report.asset_count = len(records)
+
+        records_by_class: Dict[type, List[AssetRecord]] = {}
+        for record in records:
+            object_class = getattr(unreal, record.class_name, None)
+            if not isinstance(object_class, type):
+                report.skipped.append(record.object_path)
+                continue
+            records_by_class.setdefault(object_class, []).append(record)
+
+        jobs = []
+        for object_class, class_records in records_by_class.items():
+            rules = self.manager.get_rules_for_class(object_class)
+            if not rules:
+                continue
+            self._rule_signatures[object_class.__name__] = _rules_signature(rules)
+            rule_specs = [_rule_spec(rule) for rule in rules]
+            for start in range(0, len(class_records), self.match_chunk_size):
+                chunk = class_records[start : start + self.match_chunk_size]
+                jobs.append((object_class, rules, chunk, rule_specs))
+
+        self.pending = []
+        for (object_class, rules, chunk, _), chunk_verdicts in zip(jobs, self._match(jobs, len(records))):
+            for record, verdicts in zip(chunk, chunk_verdicts):
+                if not verdicts:
+                    continue
+                self.pending.append((record.object_path, object_class.__name__, [index for index, _ in verdicts]))
+                for index, verdict in verdicts:
+                    name = f"{object_class.__name__}[{index}] {describe(rules[index])}"
+                    matches = report.rule_matches if verdict else report.rule_possible_matches
+                    matches.setdefault(name, []).append(record.object_path)
+
+        self._save_state()
+        return report
+
+    def apply_next_chunk(self) -> int:
+        """Load the next chunk_size pending assets and apply their rules. Returns how many assets were handled."""
+        chunk, self.pending = self.pending[: self.chunk_size], self.pending[self.chunk_size :]
+        for object_path, class_name, indices in chunk:
+            try:
+                self._apply(object_path, class_name, indices)
+            except Exception:
+                unreal.log_error(f"Failed to apply the importer rules to {object_path}")
+                unreal.log_error(format_exc())
+        self._save_state()
+        return len(chunk)
+
+    def apply_all(self) -> int:
+        """Apply the rules to every pending asset, with a progress dialog that can be cancelled and resumed later."""
+        applied = 0
+        with unreal.ScopedSlowTask(len(self.pending), "Applying importer rules to existing assets...") as slow_task:
+            slow_task.make_dialog(True)
+            while self.pending and not slow_task.should_cancel():
+                count = self.apply_next_chunk()
+                applied += count
+                slow_task.enter_progress_frame(count)
+        activity_log.flush()
+        error_collector.show_summary()
+        return applied
+
+    def _apply(self, object_path: str, class_name: str, indices: List[int]) -> None:
+        asset = unreal.EditorAssetLibrary.load_asset(object_path)
+        if asset is None:
+            return
+        object_class = type(asset)
+        rules = self.manager.get_rules_for_class(object_class)
+        # the rules changed since the dry run, so the indices can't be trusted and every rule has to be tested.
+        if self._rule_signatures.get(class_name) == _rules_signature(rules):
+            rules = [rules[index] for index in indices]
+
+        compiled = self.manager.get_compiled_rule_set(object_class)
+        context = ImportContext(
+            None,
+            asset,
+            self.manager.get_source_path_matcher(object_class),
+            defer_writes=True,
+            query_slots=compiled.query_slots,
+            destination_folder_matcher=compiled.destination_folder_matcher,
+        )
+        with context.activate(), tag_store.cached(asset):
+            try:
+                for rule in rules:
+                    if not rule.staged_writes_aware:
+                        context.flush_writes()
+                    rule.apply(None, asset)
+            except Exception:
+                # what earlier rules staged is still written, like when they write straight away.
+                context.flush_writes()
+                raise
+            self.manager._set_imported_asset_tag_action.apply(None, asset)
+            context.flush_writes()
+
+        if self.save_assets:
+            unreal.EditorAssetLibrary.save_loaded_asset(asset, True)
+
+    def _match(self, jobs: List[Tuple[Any, ...]], record_count: int) -> List[List[List[Tuple[int, Optional[bool]]]]]:
+        arguments = [
+            (rule_specs, [(record.source_path, record.destination_path) for record in chunk])
+            for _, _, chunk, rule_specs in jobs
+        ]
+        if not arguments:
+            return []
+        if self.processes != 0 and record_count >= self.parallel_threshold:
+            try:
+                with _create_process_pool(self.processes) as pool:
+                    return list(pool.map(match_rule_specs, *zip(*arguments)))
+            except Exception:
+                unreal.log_warning("Importer Rules couldn't start worker processes, matching in the editor instead.")
+                unreal.log_warning(format_exc())
+        return [match_rule_specs(rule_specs, chunk) for rule_specs, chunk in arguments]
+
+    def _save_state(self) -> None:
+        if not self.state_file:
+            return
+        with open(self.state_file, "w") as file:
+            json.dump(
+                {
+                    "content_paths": self.content_paths,
+                    "rule_signatures": self._rule_signatures,
+                    "pending": self.pending,
+                },
+                file,
+            )
+
+
+def _rule_spec(rule: ImportRuleBase) -> RuleSpec:
+    """The string matching parts of a rule. Queries that need the loaded asset become None."""
+    specs: List[Optional[Any]] = []
+    for query in getattr(rule, "queries", None) or []:
+        if SourcePath.is_evaluated_like(query):
+            specs.append(SourcePathSpec(query))
+        elif DestinationPath.is_evaluated_like(query):
+            specs.append(DestinationPathSpec(query))
+        elif DestinationFolder.is_evaluated_like(query):
+            specs.append(DestinationFolderSpec(query))
+        else:
+            specs.append(None)
+    # rules that aren't made of queries can only be tested on the loaded asset.
+    if not hasattr(rule, "queries"):
+        specs.append(None)
+    return bool(getattr(rule, "requires_all", False)), specs
+
+
+def _rules_signature(rules: List[ImportRuleBase]) -> str:
+    return hashlib.sha1("\n".join(describe(rule, max_length=100000) for rule in rules).encode()).hexdigest()
+
+
+def _create_process_pool(processes: Optional[int]) -> ProcessPoolExecutor:
+    # inside the editor sys.executable is the editor itself, so the workers have to be started with its python.
+    context = multiprocessing.get_context("spawn")
+    get_interpreter_executable_path = getattr(unreal, "get_interpreter_executable_path", None)
+    if get_interpreter_executable_path is not None:
+        context.set_executable(get_interpreter_executable_path())
+    return ProcessPoolExecutor(processes, mp_context=context)
+
+
+def _get_class_name(asset_data: unreal.AssetData) -> str:
+    asset_class_path = getattr(asset_data, "asset_class_path", None)
+    if asset_class_path is not None:
+        return str(asset_class_path.asset_name)
+    return str(asset_data.asset_class)
+
+
+def _get_source_path(asset_data: unreal.AssetData, package_name: str) -> Optional[str]:
+    """First source file from the AssetImportData registry tag, the same file get_first_filename() returns."""
+    value = asset_data.get_tag_value("AssetImportData")
+    if not value:
+        return None
+    try:
+        source_files = json.loads(value)
+    except ValueError:
+        return None
+    if not source_files:
+        return None
+    file_name = source_files[0].get("RelativeFilename", "")
+    if not file_name or os.path.isabs(file_name):
+        return file_name or None
+
+    # relative source files are stored relative to the package file.
+    if package_name.startswith("/Game/"):
+        content_dir = unreal.Paths.convert_relative_path_to_full(unreal.Paths.project_content_dir())
+        package_dir = posixpath.dirname(posixpath.join(content_dir, package_name[len("/Game/") :]))
+        return posixpath.normpath(posixpath.join(package_dir, file_name))
+    return file_name
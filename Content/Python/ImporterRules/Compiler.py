@@ -0,0 +1,345 @@
+# MIT License
+
+# Copyright (c) 2023 Ryan DowlingSoka
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Compiles the rules registered for a class into a rule set where structurally identical queries are shared, so each
+one is evaluated at most once per asset, and analyzes the rule set for rules that can never do anything.
+
+    for report in importer_rules_manager.analyze_rules():
+        report.log_summary()
+"""
+
+import unreal
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+from ImporterRules.Actions import SetAssetTags, SetEditorProperties
+from ImporterRules.Fingerprint import stable_hash
+from ImporterRules.Matching import DestinationFolderMatcher, split_folder
+from ImporterRules.Profiling import describe
+from ImporterRules.Queries import DestinationFolder, SourcePath
+from ImporterRules.Rules import ImportRuleBase, Rule
+
+
+class CompiledRuleSet(object):
+    """The rules of one class, with the queries that are used more than once given a shared result slot."""
+
+    def __init__(self, rules: Sequence[ImportRuleBase]) -> None:
+        self.rules = list(rules)
+        # id of every query with a structural twin -> slot of the result they share in the import context.
+        self.query_slots: Dict[int, int] = {}
+        self.query_count = 0
+
+        queries_by_key: Dict[str, List[Any]] = {}
+        for rule in self.rules:
+            for query in getattr(rule, "queries", []):
+                self.query_count += 1
+                # a query that changes something has to run every time it's asked.
+                key = query.cse_key() if query.side_effect_free else None
+                if key is not None:
+                    queries_by_key.setdefault(key, []).append(query)
+
+        shared = [queries for queries in queries_by_key.values() if len(queries) > 1]
+        for slot, queries in enumerate(shared):
+            for query in queries:
+                self.query_slots[id(query)] = slot
+        # queries that are evaluated separately, with every group of identical queries counted once.
+        self.unique_query_count = self.query_count - sum(len(queries) - 1 for queries in shared)
+
+        # rules that can only pass inside the folders of their DestinationFolder queries are indexed by those
+        # queries, so the rules of other folders are skipped without being tested.
+        self.destination_folder_matcher = DestinationFolderMatcher(
+            query for rule in self.rules for query in getattr(rule, "queries", []) if _is_compiled_destination_folder(query)
+        )
+        self._rules_by_folder: Dict[int, List[int]] = {}
+        self._unanchored_rules: List[int] = []
+        for index, rule in enumerate(self.rules):
+            anchors = _get_folder_anchors(rule)
+            if not anchors:
+                self._unanchored_rules.append(index)
+            for query in anchors:
+                self._rules_by_folder.setdefault(id(query), []).append(index)
+        self.folder_anchored_rule_count = len(self.rules) - len(self._unanchored_rules)
+
+    def get_candidate_rules(self, context: Any) -> List[int]:
+        """Indices of the rules that can pass for the import context, in order: every rule that isn't tied to a
+           destination folder, plus the ones tied to the folders the asset is in."""
+        if not self._rules_by_folder:
+            return list(range(len(self.rules)))
+        matched = context.matched_destination_folders
+        if not matched:
+            return self._unanchored_rules
+        candidates = set(self._unanchored_rules)
+        for query in matched:
+            candidates.update(self._rules_by_folder.get(id(query), ()))
+        return sorted(candidates)
+
+
+class RuleSetReport(object):
+    """Static analysis of the rules of one class: rules that can never pass, rules whose writes are always
+       overwritten by later rules, and properties that rules which can apply together set to different values."""
+
+    def __init__(self, class_name: str, rule_count: int, query_count: int, unique_query_count: int) -> None:
+        self.class_name = class_name
+        self.rule_count = rule_count
+        self.query_count = query_count
+        self.unique_query_count = unique_query_count
+        # (rule name, reason)
+        self.dead_rules: List[Tuple[str, str]] = []
+        # (rule name, names of the later rules that always overwrite everything it writes)
+        self.shadowed_rules: List[Tuple[str, List[str]]] = []
+        # (property or tag, [(rule name, value)]) for values that depend on which of the rules pass.
+        self.conflicts: List[Tuple[str, List[Tuple[str, str]]]] = []
+
+    @property
+    def has_problems(self) -> bool:
+        return bool(self.dead_rules or self.shadowed_rules or self.conflicts)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "class": self.class_name,
+            "rule_count": self.rule_count,
+            "query_count": self.query_count,
+            "unique_query_count": self.unique_query_count,
+            "dead_rules": [{"rule": rule, "reason": reason} for rule, reason in self.dead_rules],
+            "shadowed_rules": [{"rule": rule, "shadowed_by": by} for rule, by in self.shadowed_rules],
+            "conflicts": [
+                {"write": write, "values": [{"rule": rule, "value": value} for rule, value in values]}
+                for write, values in self.conflicts
+            ],
+        }
+
+    def log_summary(self) -> None:
+        unreal.log(
+            f"Importer Rules for {self.class_name}: {self.rule_count} rules, "
+            f"{self.query_count} queries of which {self.unique_query_count} are evaluated separately."
+        )
+        for rule, reason in self.dead_rules:
+            unreal.log_warning(f"    {rule} never applies: {reason}")
+        for rule, shadowed_by in self.shadowed_rules:
+            unreal.log_warning(f"    {rule} is always overwritten by {', '.join(shadowed_by)}")
+        for write, values in self.conflicts:
+            choices = ", ".join(f"{value} by {rule}" for rule, value in values)
+            unreal.log_warning(f"    {write} is set to different values depending on which rules pass: {choices}")
+
+
+def analyze_rule_set(class_type: type, rules: Sequence[ImportRuleBase]) -> RuleSetReport:
+    """Find dead, shadowed and conflicting rules among the rules for class_type, in the order they run."""
+    compiled = CompiledRuleSet(rules)
+    report = RuleSetReport(class_type.__name__, len(rules), compiled.query_count, compiled.unique_query_count)
+    names = [f"{class_type.__name__}[{index}] {describe(rule, 120)}" for index, rule in enumerate(rules)]
+    conditions = [_RuleCondition(rule) for rule in rules]
+    writes = [_get_writes(rule) for rule in rules]
+
+    live = []
+    for index, rule in enumerate(rules):
+        reason = _get_dead_reason(class_type, rule)
+        if reason:
+            report.dead_rules.append((names[index], reason))
+        else:
+            live.append(index)
+
+    for position, index in enumerate(live):
+        if not writes[index]:
+            continue
+        # later rules that pass whenever this one does, and so overwrite what it writes.
+        overwritten: Set[str] = set()
+        shadowed_by = []
+        for later in live[position + 1 :]:
+            common = writes[index].keys() & writes[later].keys()
+            if common and conditions[later].passes_whenever(conditions[index]):
+                overwritten |= common
+                shadowed_by.append(names[later])
+        if writes[index].keys() <= overwritten and _only_writes(rules[index]):
+            report.shadowed_rules.append((names[index], shadowed_by))
+
+    # writes whose final value depends on which rules pass. A later rule that always overwrites an earlier one
+    # decides the value on its own, so the earlier one isn't part of the conflict.
+    for write in sorted({write for index in live for write in writes[index]}):
+        writers = [index for index in live if write in writes[index]]
+        deciding = [
+            index
+            for position, index in enumerate(writers)
+            if not any(conditions[later].passes_whenever(conditions[index]) for later in writers[position + 1 :])
+        ]
+        conflicting = set()
+        for position, index in enumerate(deciding):
+            for other in deciding[position + 1 :]:
+                if writes[index][write][0] != writes[other][write][0] and not conditions[index].excludes(conditions[other]):
+                    conflicting.update((index, other))
+        if conflicting:
+            report.conflicts.append(
+                (write, [(names[index], writes[index][write][1]) for index in sorted(conflicting)])
+            )
+    return report
+
+
+class _RuleCondition(object):
+    """The queries of a rule, by their structural hash, for comparing when rules pass."""
+
+    def __init__(self, rule: ImportRuleBase) -> None:
+        queries = getattr(rule, "queries", None)
+        # rules that aren't made of queries might check anything, so nothing is assumed about them.
+        self.opaque = queries is None
+        self.query_list = list(queries or [])
+        self.queries = {_query_key(query) for query in queries or []}
+        # results that actions can't change, so they are the same for every rule that runs after.
+        self.constant_queries = {_query_key(query) for query in queries or [] if query.constant_per_import}
+        requires_all = getattr(rule, "requires_all", False)
+        self.apply_on_reimport = rule.apply_on_reimport
+        self.passes_if_all = requires_all or len(self.queries) == 1
+        self.passes_if_any = not requires_all or len(self.queries) == 1
+
+    def passes_whenever(self, other: "_RuleCondition") -> bool:
+        """True if this rule is certain to pass for every asset the other rule passes for, reimports included."""
+        if self.opaque or other.opaque:
+            return False
+        # a rule that only runs on the first import doesn't overwrite what the other one writes on reimport.
+        if other.apply_on_reimport and not self.apply_on_reimport:
+            return False
+        if not self.queries:
+            return True
+        if not other.queries:
+            return False
+        if other.passes_if_all and self.passes_if_all and self.queries <= other.constant_queries:
+            return True
+        if other.passes_if_all and self.passes_if_any and self.queries & other.constant_queries:
+            return True
+        if other.passes_if_any and self.passes_if_any and other.queries <= self.queries & other.constant_queries:
+            return True
+        return False
+
+    def excludes(self, other: "_RuleCondition") -> bool:
+        """True if the two rules can't both pass for the same asset."""
+        if self.opaque or other.opaque or not (self.passes_if_all and other.passes_if_all):
+            return False
+        return any(_queries_exclude(query, other_query) for query in self.query_list for other_query in other.query_list)
+
+
+def _query_key(query: Any) -> str:
+    """The query's cse_key, or a key of its own if it can't be compared with other queries."""
+    key = query.cse_key()
+    return key if key is not None else f"id:{id(query)}"
+
+
+def _is_compiled_destination_folder(query: Any) -> bool:
+    return DestinationFolder.is_evaluated_like(query)
+
+
+def _get_folder_anchors(rule: ImportRuleBase) -> List[Any]:
+    """DestinationFolder queries of which at least one has to pass for the rule to apply, or [] if there aren't any."""
+    # rules that test their queries in some other way might not need them to pass, and rules with an apply() of
+    # their own might do something before testing them.
+    if (
+        not isinstance(rule, Rule)
+        or type(rule).test_queries is not Rule.test_queries
+        or type(rule).apply is not Rule.apply
+        or not rule.queries
+    ):
+        return []
+    if rule.requires_all:
+        # skipping the rule mustn't skip a query with side effects that would have run before the folder was tested.
+        for query in rule.queries:
+            if _is_compiled_destination_folder(query):
+                return [query]
+            if not query.side_effect_free:
+                return []
+        return []
+    if all(_is_compiled_destination_folder(query) for query in rule.queries):
+        return list(rule.queries)
+    return []
+
+
+def _queries_exclude(query: Any, other: Any) -> bool:
+    """True for SourcePath queries that test different file name endings or extensions, which no file has both of,
+       and DestinationFolder queries for folders that don't contain each other."""
+    if isinstance(query, DestinationFolder) and isinstance(other, DestinationFolder):
+        return _folders_exclude(query, other)
+    if not (isinstance(query, SourcePath) and isinstance(other, SourcePath)) or query.case_sensitive != other.case_sensitive:
+        return False
+    first, second = _get_single_test(query), _get_single_test(other)
+    if first is None or second is None or first[0] != second[0]:
+        return False
+    if first[0] == "extensions":
+        return not set(first[1]) & set(second[1])
+    if first[0] == "file_name_ends_with":
+        return not (first[1].endswith(second[1]) or second[1].endswith(first[1]))
+    return not (first[1].startswith(second[1]) or second[1].startswith(first[1]))
+
+
+def _folders_exclude(query: DestinationFolder, other: DestinationFolder) -> bool:
+    if query.case_sensitive != other.case_sensitive or not query.folder or not other.folder:
+        return False
+    first, second = split_folder(query.folder), split_folder(other.folder)
+    # only folders without wildcards are compared.
+    if any(char in segment for segment in first + second for char in "*?["):
+        return False
+    if first[: len(second)] == second and other.recursive:
+        return False
+    if second[: len(first)] == first and query.recursive:
+        return False
+    return first != second
+
+
+def _get_single_test(query: SourcePath) -> Optional[Tuple[str, Any]]:
+    """(setting, value) of a SourcePath that only tests one of the start, end or extension of the file."""
+    tests = [
+        (setting, getattr(query, setting))
+        for setting in ("file_name_starts_with", "file_name_ends_with", "file_name_contains", "full_path_contains", "extensions")
+        if getattr(query, setting)
+    ]
+    if len(tests) != 1 or tests[0][0] in ("file_name_contains", "full_path_contains"):
+        return None
+    return tests[0]
+
+
+def _get_writes(rule: ImportRuleBase) -> Dict[str, Tuple[str, str]]:
+    """Property and tag -> (hash, description) of the value the rule writes, for the built-in actions."""
+    writes: Dict[str, Tuple[str, str]] = {}
+    for action in getattr(rule, "actions", []):
+        if isinstance(action, SetEditorProperties):
+            for name, value in action.editor_properties.items():
+                writes[name] = (stable_hash(value), repr(value))
+        elif isinstance(action, SetAssetTags):
+            for key, value in action.asset_tags.items():
+                writes[f"tag {key}"] = (stable_hash(str(value)), repr(str(value)))
+    return writes
+
+
+def _only_writes(rule: ImportRuleBase) -> bool:
+    """True if all the rule does is set properties and tags, so it's pointless once they are overwritten."""
+    actions = getattr(rule, "actions", None)
+    return actions is not None and all(isinstance(action, (SetEditorProperties, SetAssetTags)) for action in actions)
+
+
+def _get_dead_reason(class_type: type, rule: ImportRuleBase) -> Optional[str]:
+    actions = getattr(rule, "actions", None)
+    if actions is not None and not actions:
+        return "it has no actions"
+    queries = getattr(rule, "queries", None)
+    if not queries:
+        return None
+    failing = [describe(query, 80) for query in queries if not query.can_pass(class_type)]
+    if getattr(rule, "requires_all", False):
+        if failing:
+            return f"{failing[0]} can never pass"
+    elif len(failing) == len(queries):
+        return "none of its queries can ever pass"
+    return None
@@ -0,0 +1,286 @@
+# MIT License
+
+# Copyright (c) 2023 Ryan DowlingSoka
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import unreal
+from contextlib import contextmanager
+from functools import cached_property
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+from ImporterRules.ActivityLog import activity_log
+from ImporterRules.Errors import error_collector
+from ImporterRules.Matching import DestinationFolderMatcher, SourcePathMatcher, split_destination_folder, split_source_path
+from ImporterRules.Schema import ClassSchema, get_object_schema
+from ImporterRules.SourceHeaders import SourceHeader, read_source_header
+from ImporterRules.TagStore import tag_store
+
+
+class DeferredWrites(object):
+    """Editor properties and asset tags staged by the actions of every rule, written to the asset in one go.
+       Values staged later override earlier ones, so the last rule to set a value wins."""
+
+    def __init__(self) -> None:
+        self.editor_properties: Dict[str, Any] = {}
+        self.asset_tags: Dict[str, str] = {}
+        # rule that staged each editor property, so a failed write is reported against it.
+        self._property_rules: Dict[str, Any] = {}
+        # (summary, class name, property names) counted in the activity log once the properties are written.
+        self._summaries: List[Tuple[str, str, Tuple[str, ...]]] = []
+        # rules whose actions ran since the last flush. They only count as successful once their writes are done.
+        self._rules: List[Any] = []
+
+    def has_pending_writes(self) -> bool:
+        return bool(self.editor_properties or self.asset_tags)
+
+    def set_editor_properties(
+        self, editor_properties: Dict[str, Any], rule: Any = None, summary: str = "", class_name: str = ""
+    ) -> None:
+        self.editor_properties.update(editor_properties)
+        for name in editor_properties:
+            self._property_rules[name] = rule
+        if summary:
+            self._summaries.append((summary, class_name, tuple(editor_properties)))
+
+    def set_asset_tags(self, asset_tags: Dict[str, Any]) -> None:
+        for key, value in asset_tags.items():
+            self.asset_tags[key] = str(value)
+
+    def add_rule(self, rule: Any) -> None:
+        """Record the rule's success once everything staged so far was written."""
+        self._rules.append(rule)
+
+    def flush(self, created_object: unreal.Object, schema: Optional[ClassSchema] = None) -> None:
+        """Write everything staged to the created object with a single set_editor_properties call and one tag pass.
+           schema is the created object's schema, if the caller already looked it up."""
+        if created_object is None:
+            return
+
+        editor_properties = self.editor_properties
+        dropped: Set[str] = set()
+        if editor_properties:
+            schema = schema or get_object_schema(created_object)
+            if not schema.properties.issuperset(editor_properties):
+                dropped = {name for name in editor_properties if not schema.has_property(name, created_object)}
+            if dropped:
+                # the rule was checked against the class it was registered for, but this asset's class, like a
+                # Blueprint class, doesn't have the property.
+                activity_log.warning(
+                    "DeferredWrites",
+                    f"{created_object.get_path_name()} has no editor properties {sorted(dropped)}, they weren't set",
+                )
+                editor_properties = {name: value for name, value in editor_properties.items() if name not in dropped}
+
+        failures: Dict[str, Exception] = {}
+        if editor_properties:
+            try:
+                created_object.set_editor_properties(editor_properties)
+            except Exception:
+                # one bad property shouldn't stop the others from being written, so retry them one by one.
+                for name, value in editor_properties.items():
+                    try:
+                        created_object.set_editor_property(name, value)
+                    except Exception as err:
+                        failures[name] = err
+
+        if self.asset_tags:
+            tag_store.set_tags(created_object, self.asset_tags)
+
+        for summary, class_name, names in self._summaries:
+            if failures.keys().isdisjoint(names) and dropped.isdisjoint(names):
+                activity_log.count(summary, class_name)
+        failed_rules = set()
+        for name, err in failures.items():
+            rule = self._property_rules.get(name)
+            if rule is None:
+                activity_log.error("DeferredWrites", f"Failed to set {name} on {created_object.get_path_name()}: {err}")
+            elif rule not in failed_rules:
+                failed_rules.add(rule)
+                error_collector.record_failure(rule, created_object.get_path_name(), err)
+        for rule in self._rules:
+            if rule not in failed_rules:
+                error_collector.record_success(rule)
+
+        self.editor_properties = {}
+        self.asset_tags = {}
+        self._property_rules = {}
+        self._summaries = []
+        self._rules = []
+
+
+class ImportContext(object):
+    """Per import cache of the data the queries look at, so each value is only fetched from the engine once.
+       Values are computed lazily the first time a query asks for them."""
+
+    _active: Optional["ImportContext"] = None
+
+    def __init__(
+        self,
+        factory: unreal.Factory,
+        created_object: unreal.Object,
+        source_path_matcher: Optional[SourcePathMatcher] = None,
+        defer_writes: bool = False,
+        query_slots: Optional[Dict[int, int]] = None,
+        destination_folder_matcher: Optional[DestinationFolderMatcher] = None,
+    ) -> None:
+        self.factory = factory
+        self.created_object = created_object
+        # the SourcePath queries registered for this object's class, compiled by the manager.
+        self.source_path_matcher = source_path_matcher
+        # the DestinationFolder queries of the rules for this object's class, compiled by the manager.
+        self.destination_folder_matcher = destination_folder_matcher
+        # when set, the built-in actions stage their writes here and the manager flushes them after the last rule.
+        self.deferred_writes = DeferredWrites() if defer_writes else None
+        # the rule whose actions are running, set by Rule.apply.
+        self.current_rule: Optional[Any] = None
+        # id of each query that several rules share -> slot of its result, see Compiler.CompiledRuleSet.
+        self.query_slots = query_slots
+        self._query_results: Dict[int, bool] = {}
+        # slots of results that actions can change, like the result of a CheckAssetTag.
+        self._volatile_slots: List[int] = []
+
+    @cached_property
+    def object_class(self) -> type:
+        return type(self.created_object)
+
+    @cached_property
+    def schema(self) -> Optional[ClassSchema]:
+        """Editor properties of the created object's class."""
+        if self.created_object is None:
+            return None
+        return get_object_schema(self.created_object)
+
+    @cached_property
+    def asset_import_data(self) -> Optional[unreal.AssetImportData]:
+        if self.created_object is None:
+            return None
+        # if the created_object doesn't implement asset_import_data there is no source path.
+        if not self.schema.has_property("asset_import_data", self.created_object):
+            return None
+        return self.created_object.get_editor_property("asset_import_data")
+
+    @cached_property
+    def source_path(self) -> Optional[str]:
+        if self.asset_import_data is None:
+            return None
+        return self.asset_import_data.get_first_filename()
+
+    @cached_property
+    def source_header(self) -> Optional[SourceHeader]:
+        """Dimensions and format of the source file, read from its header."""
+        return read_source_header(self.source_path)
+
+    @cached_property
+    def source_path_lower(self) -> Optional[str]:
+        return None if self.source_path is None else self.source_path.lower()
+
+    @cached_property
+    def source_parts(self) -> Optional[Tuple[str, str, str]]:
+        """(full path, file name without extension, extension) of the source file."""
+        return split_source_path(self.source_path)
+
+    @cached_property
+    def source_parts_lower(self) -> Optional[Tuple[str, str, str]]:
+        """Lowercase version of source_parts."""
+        return split_source_path(self.source_path_lower)
+
+    def get_source_parts(self, case_sensitive: bool) -> Optional[Tuple[str, str, str]]:
+        return self.source_parts if case_sensitive else self.source_parts_lower
+
+    @cached_property
+    def matched_source_paths(self) -> Set[Any]:
+        """Every compiled SourcePath query that passes for this source file, found in a single scan."""
+        if self.source_path_matcher is None:
+            return set()
+        return self.source_path_matcher.match(self.source_parts, self.source_parts_lower)
+
+    @cached_property
+    def destination_path(self) -> Optional[str]:
+        if self.created_object is None:
+            return None
+        return self.created_object.get_path_name()
+
+    @cached_property
+    def destination_path_lower(self) -> Optional[str]:
+        return None if self.destination_path is None else self.destination_path.lower()
+
+    def get_destination_path(self, case_sensitive: bool) -> Optional[str]:
+        return self.destination_path if case_sensitive else self.destination_path_lower
+
+    @cached_property
+    def destination_folder(self) -> Optional[List[str]]:
+        """Segments of the folder the created object is in."""
+        return split_destination_folder(self.destination_path)
+
+    @cached_property
+    def destination_folder_lower(self) -> Optional[List[str]]:
+        return split_destination_folder(self.destination_path_lower)
+
+    def get_destination_folder(self, case_sensitive: bool) -> Optional[List[str]]:
+        return self.destination_folder if case_sensitive else self.destination_folder_lower
+
+    @cached_property
+    def matched_destination_folders(self) -> Set[Any]:
+        """Every compiled DestinationFolder query that passes for this destination, found in a single walk."""
+        if self.destination_folder_matcher is None:
+            return set()
+        return self.destination_folder_matcher.match(self.destination_path, self.destination_path_lower)
+
+    def evaluate_query(self, query: Any) -> bool:
+        """Evaluate the query, or reuse the result of an identical query another rule already evaluated."""
+        if query.tests_itself:
+            return query.test(self.factory, self.created_object)
+        slot = self.query_slots.get(id(query)) if self.query_slots else None
+        if slot is None:
+            return query.evaluate(self)
+        result = self._query_results.get(slot)
+        if result is None:
+            result = self._query_results[slot] = bool(query.evaluate(self))
+            if not query.constant_per_import:
+                self._volatile_slots.append(slot)
+        return result
+
+    def invalidate_query_results(self) -> None:
+        """Forget the shared results that depend on the asset, after a rule's actions ran."""
+        if self._volatile_slots:
+            for slot in self._volatile_slots:
+                del self._query_results[slot]
+            self._volatile_slots = []
+
+    def flush_writes(self) -> None:
+        if self.deferred_writes is not None:
+            self.deferred_writes.flush(self.created_object, self.schema)
+
+    @contextmanager
+    def activate(self) -> Iterator["ImportContext"]:
+        """Make this the context returned by get_import_context while rules run on the created object."""
+        previous = ImportContext._active
+        ImportContext._active = self
+        try:
+            yield self
+        finally:
+            ImportContext._active = previous
+
+
+def get_import_context(factory: unreal.Factory, created_object: unreal.Object) -> ImportContext:
+    """Get the active context for the created object, or a new one if it is being tested outside of the manager."""
+    context = ImportContext._active
+    if context is not None and context.created_object == created_object:
+        return context
+    return ImportContext(factory, created_object)
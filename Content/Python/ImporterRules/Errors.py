@@ -0,0 +1,164 @@
+# MIT License
+
+# Copyright (c) 2023 Ryan DowlingSoka
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Collects the exceptions raised by rule actions instead of showing a dialog for every asset. Identical failures of a
+rule are collapsed and counted, and a single summary is shown once the import or batch of imports is done.
+A rule that keeps failing is disabled for the rest of the session by a circuit breaker.
+
+    from ImporterRules.Errors import error_collector
+    error_collector.max_consecutive_failures = 10
+    error_collector.enable_rules()  # turn the disabled rules back on after fixing them
+"""
+
+import unreal
+from traceback import extract_tb, format_exception
+from typing import Any, Dict, List, Set, Tuple
+from ImporterRules.ActivityLog import activity_log
+from ImporterRules.Profiling import describe
+
+
+class ErrorRecord(object):
+    """Every failure of a rule with the same exception type, raised from the same line."""
+
+    __slots__ = ("rule_name", "exception_type", "location", "message", "traceback", "count", "assets")
+
+    def __init__(self, rule_name: str, exception_type: str, location: str, message: str, traceback: str) -> None:
+        self.rule_name = rule_name
+        self.exception_type = exception_type
+        self.location = location
+        # message and traceback of the first failure.
+        self.message = message
+        self.traceback = traceback
+        self.count = 0
+        # the first few assets it failed on.
+        self.assets: List[str] = []
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "rule": self.rule_name,
+            "exception_type": self.exception_type,
+            "location": self.location,
+            "message": self.message,
+            "count": self.count,
+            "assets": self.assets,
+        }
+
+
+class ErrorCollector(object):
+    """Failures of rule actions, keyed by rule and exception signature, and the circuit breaker of each rule."""
+
+    def __init__(self) -> None:
+        # a rule is disabled after failing this many times in a row, 0 never disables rules.
+        self.max_consecutive_failures = 5
+        self.max_assets_per_error = 10
+        # show the summary in a dialog as well as the output log.
+        self.show_dialog = True
+        # keyed by the rule object, since different rules can share a description.
+        self._errors: Dict[Tuple[Any, str, str], ErrorRecord] = {}
+        self._consecutive_failures: Dict[Any, int] = {}
+        self._disabled_rules: Set[Any] = set()
+        self._newly_disabled: List[str] = []
+
+    def is_disabled(self, rule: Any) -> bool:
+        return rule in self._disabled_rules
+
+    def record_success(self, rule: Any) -> None:
+        if self._consecutive_failures:
+            self._consecutive_failures.pop(rule, None)
+
+    def record_failure(self, rule: Any, asset_path: str, error: BaseException) -> ErrorRecord:
+        """Count a failure of rule on the asset, and disable the rule if it failed too often in a row."""
+        rule_name = describe(rule)
+        frames = extract_tb(error.__traceback__)
+        location = f"{frames[-1].filename}:{frames[-1].lineno}" if frames else ""
+        key = (rule, type(error).__name__, location)
+        record = self._errors.get(key)
+        if record is None:
+            traceback = "".join(format_exception(type(error), error, error.__traceback__))
+            record = self._errors[key] = ErrorRecord(rule_name, type(error).__name__, location, str(error), traceback)
+            # only the first failure of each kind is logged straight away, the rest are in the summary.
+            activity_log.error(
+                "Errors",
+                f"{rule_name} failed on {asset_path}: {record.exception_type}: {record.message}",
+                rule=rule_name,
+                asset=asset_path,
+                traceback=record.traceback,
+            )
+        record.count += 1
+        if len(record.assets) < self.max_assets_per_error:
+            record.assets.append(asset_path)
+
+        failures = self._consecutive_failures.get(rule, 0) + 1
+        self._consecutive_failures[rule] = failures
+        if 0 < self.max_consecutive_failures <= failures and rule not in self._disabled_rules:
+            self._disabled_rules.add(rule)
+            self._newly_disabled.append(rule_name)
+            activity_log.error("Errors", f"Disabled {rule_name} after {failures} failures in a row", rule=rule_name)
+        return record
+
+    def enable_rules(self) -> None:
+        """Turn every rule disabled by the circuit breaker back on."""
+        self._disabled_rules.clear()
+        self._consecutive_failures.clear()
+
+    @property
+    def errors(self) -> List[ErrorRecord]:
+        return list(self._errors.values())
+
+    def get_summary(self) -> List[str]:
+        """A line for each kind of failure, and each rule that was disabled, since the last summary."""
+        lines = []
+        for record in sorted(self._errors.values(), key=lambda record: -record.count):
+            lines.append(
+                f"{record.rule_name} failed on {record.count:,} assets with {record.exception_type}: {record.message}"
+                f" ({record.location}), e.g. {', '.join(record.assets[:3])}"
+            )
+        for rule_name in self._newly_disabled:
+            lines.append(f"{rule_name} was disabled after {self.max_consecutive_failures} failures in a row.")
+        return lines
+
+    def show_summary(self) -> None:
+        """Log the summary, show it in a single dialog and start collecting the next one."""
+        lines = self.get_summary()
+        if not lines:
+            return
+        for record in self._errors.values():
+            unreal.log_error(record.traceback)
+        for line in lines:
+            unreal.log_error(f"Importer Rules: {line}")
+        if self.show_dialog:
+            unreal.EditorDialog.show_message(
+                title="Import Action Error",
+                message="\n\n".join(lines),
+                message_type=unreal.AppMsgType.OK,
+                default_value=unreal.AppReturnType.OK,
+            )
+        self.clear()
+
+    def clear(self) -> None:
+        """Forget the collected failures. Disabled rules stay disabled, see enable_rules."""
+        self._errors = {}
+        self._newly_disabled = []
+
+
+error_collector = ErrorCollector()
@@ -0,0 +1,148 @@
+# MIT License
+
+# Copyright (c) 2023 Ryan DowlingSoka
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Fingerprints stored on imported assets, so a reimport can tell whether the source file or the rules changed since the
+rules were last applied. Rule set hashes are built from the rules' settings, so they stay the same across editor
+sessions.
+"""
+
+import hashlib
+import os
+from typing import Any, Optional, Sequence, Tuple
+
+FINGERPRINT_VERSION = "2"
+
+
+def stable_hash(value: Any) -> str:
+    """Short hash of a rule, query, action or plain value that only depends on its settings."""
+    return hashlib.sha1(_canonical(value).encode("utf-8")).hexdigest()[:12]
+
+
+def ruleset_hash(rule_hashes: Sequence[str]) -> str:
+    """Short hash of the rule hashes in order, since later rules win over earlier ones."""
+    return hashlib.sha1(",".join(rule_hashes).encode("utf-8")).hexdigest()[:12]
+
+
+def hash_file(file_path: str, chunk_size: int = 1 << 20) -> str:
+    """md5 of the file's contents, read in chunks."""
+    md5 = hashlib.md5()
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            md5.update(chunk)
+    return md5.hexdigest()
+
+
+def read_source_stats(file_path: Optional[str]) -> Optional[Tuple[int, int]]:
+    """(size, mtime in nanoseconds) of the source file, or None if there is no such file."""
+    if not file_path:
+        return None
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+class ImportFingerprint(object):
+    """The source file and rule set an asset had its rules applied with."""
+
+    def __init__(self, source_size: int, source_mtime: int, source_hash: str, ruleset_hash: str) -> None:
+        self.source_size = source_size
+        self.source_mtime = source_mtime
+        self.source_hash = source_hash
+        self.ruleset_hash = ruleset_hash
+        # set when the fingerprint was updated after it was read, and needs to be stored again.
+        self.modified = False
+
+    @classmethod
+    def create(cls, source_path: Optional[str], ruleset_hash: str) -> "ImportFingerprint":
+        stats = read_source_stats(source_path)
+        if stats is None:
+            return cls(-1, -1, "", ruleset_hash)
+        try:
+            source_hash = hash_file(source_path)
+        except OSError:
+            source_hash = ""
+        return cls(stats[0], stats[1], source_hash, ruleset_hash)
+
+    def source_matches(self, source_path: Optional[str]) -> bool:
+        """True if the source file is the same as when the fingerprint was made. The file is only hashed if its size
+           matches but it has been touched since."""
+        stats = read_source_stats(source_path)
+        if stats is None:
+            return self.source_size == -1
+        size, mtime = stats
+        if size != self.source_size:
+            return False
+        if mtime == self.source_mtime:
+            return True
+        if not self.source_hash:
+            return False
+        try:
+            if hash_file(source_path) != self.source_hash:
+                return False
+        except OSError:
+            return False
+        # the file was only touched, remember the new time so it doesn't need hashing again.
+        self.source_mtime = mtime
+        self.modified = True
+        return True
+
+    def to_tag(self) -> str:
+        return ";".join(
+            (FINGERPRINT_VERSION, str(self.source_size), str(self.source_mtime), self.source_hash, self.ruleset_hash)
+        )
+
+    @classmethod
+    def from_tag(cls, value: str) -> Optional["ImportFingerprint"]:
+        """Parse a fingerprint tag, None if it's empty or from a different version."""
+        parts = value.split(";") if value else []
+        if len(parts) != 5 or parts[0] != FINGERPRINT_VERSION:
+            return None
+        try:
+            return cls(int(parts[1]), int(parts[2]), parts[3], parts[4])
+        except ValueError:
+            return None
+
+
+def _canonical(value: Any) -> str:
+    if value is None or isinstance(value, (bool, int, float, str, bytes)):
+        return repr(value)
+    if isinstance(value, (list, tuple)):
+        return "[" + ",".join(_canonical(item) for item in value) + "]"
+    if isinstance(value, (set, frozenset)):
+        return "{" + ",".join(sorted(_canonical(item) for item in value)) + "}"
+    if isinstance(value, dict):
+        items = sorted((_canonical(key), _canonical(item)) for key, item in value.items())
+        return "{" + ",".join(f"{key}:{item}" for key, item in items) + "}"
+    if type(value).__module__ == "unreal":
+        # engine objects are identified by their path, enums and structs by their text.
+        get_path_name = getattr(value, "get_path_name", None)
+        return f"unreal.{type(value).__name__}:{get_path_name() if callable(get_path_name) else value}"
+    if hasattr(value, "__dict__"):
+        # private members are runtime state, like the statistics of adaptive rules, not settings.
+        settings = sorted(
+            (key, _canonical(item)) for key, item in vars(value).items() if not key.startswith("_")
+        )
+        return f"{type(value).__module__}.{type(value).__qualname__}(" + ",".join(f"{key}={item}" for key, item in settings) + ")"
+    return f"{type(value).__module__}.{type(value).__qualname__}:{value!r}"
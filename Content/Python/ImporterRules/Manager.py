@@ -20,51 +20,610 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import importlib
+import os
+import sys
 import unreal
-from typing import Dict, List
+from collections import OrderedDict
+from contextlib import contextmanager
+from time import perf_counter
+from traceback import format_exc
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
 from ImporterRules.Rules import ImportRuleBase
 from ImporterRules.Actions import SetAssetTags
-from ImporterRules.Queries import CheckAssetTag
+from ImporterRules.Queries import CheckAssetTag, SourcePath
+from ImporterRules.Matching import SourcePathMatcher
+from ImporterRules.Compiler import CompiledRuleSet, RuleSetReport, analyze_rule_set
+from ImporterRules.Context import ImportContext
+from ImporterRules.Profiling import describe, profiler
+from ImporterRules.ActivityLog import activity_log
+from ImporterRules.Errors import error_collector
+from ImporterRules.Recording import ImportRecorder
+from ImporterRules.TagStore import tag_store
+from ImporterRules.Fingerprint import ImportFingerprint, ruleset_hash, stable_hash
 
 
 class ImporterRulesManager(object):
     """Manager class to make it easier to add importer rules registrations."""
 
+    # Seconds spent applying rules to queued imports on each editor tick.
+    batch_time_budget: float = 0.01
+    # Once more than this many assets start importing within one editor tick, further imports are queued and processed
+    # on the following ticks instead of blocking the import. 0, the default, turns the automatic batching off.
+    auto_batch_threshold: int = 0
+    # Seconds between progress messages while a batch is being processed.
+    batch_progress_interval: float = 2.0
+    # Store a fingerprint of the source file and rule set on each asset, which hashes the source file. Reimports of an
+    # unchanged source file then run nothing at all unless the rules changed since. Off by default, since it skips
+    # the apply_on_reimport rules.
+    use_reimport_fingerprints: bool = False
+    fingerprint_tag = "importer_rules_fingerprint"
+
     def __init__(self) -> None:
         self.import_subsystem = unreal.get_editor_subsystem(unreal.ImportSubsystem)
         if self.import_subsystem:
             self.import_subsystem.on_asset_post_import.add_callable(
                 self.on_asset_post_import
             )
+            self.import_subsystem.on_asset_pre_import.add_callable(
+                self.on_asset_pre_import
+            )
         self._rules: Dict[type, List[ImportRuleBase]] = {}
+        # owner of each rule in _rules, in the same order. Usually the name of the module that registered it.
+        self._rule_owners: Dict[type, List[str]] = {}
+        # while an owner's module is reloaded its registrations are collected here, then diffed with the old ones.
+        self._reloading_owner: Optional[str] = None
+        self._reloaded_registrations: List[Tuple[type, ImportRuleBase]] = []
+        self._watch_handle = None
+        self._watch_interval = 1.0
+        self._watch_elapsed = 0.0
+        self._watched_mtimes: Dict[str, float] = {}
+        # concrete class -> every rule that applies to it, in registration order.
+        self._dispatch_cache: Dict[type, List[ImportRuleBase]] = {}
+        self._source_path_matchers: Dict[type, SourcePathMatcher] = {}
+        self._compiled_rule_sets: Dict[type, CompiledRuleSet] = {}
+        self._ruleset_hashes: Dict[type, str] = {}
+        # (class or class name, module name) of the rule packs whose modules haven't been imported yet.
+        self._rule_packs: List[Tuple[Union[type, str], str]] = []
         self._set_imported_asset_tag_action = SetAssetTags({"importer_rules_applied":"True"})
         self._check_imported_asset_tag_action = CheckAssetTag("importer_rules_applied","True")
 
+        # queued imports, keyed by the created object's path so repeated events for the same asset are only run once.
+        self._queued_imports: "OrderedDict[str, unreal.Factory]" = OrderedDict()
+        self._batch_depth = 0
+        self._imports_this_tick = 0
+        self._batch_processed = 0
+        self._batch_total = 0
+        self._last_progress_time = 0.0
+        self._tick_handle = None
+        # appends every import to a file while recording, see start_recording.
+        self.recorder: Optional[ImportRecorder] = None
+
+    def on_asset_pre_import(
+        self, factory: unreal.Factory, object_class: type, parent: unreal.Object, name: str, file_type: str
+    ):
+        # counted so a large multi asset import can be detected and switched over to batching.
+        self._imports_this_tick += 1
+        self._register_tick()
+
     def on_asset_post_import(
         self, factory: unreal.Factory, created_object: unreal.Object
     ):
+        if self.recorder is not None and created_object is not None:
+            # the tags the recorder reads are served from memory to the rules that run straight away.
+            with tag_store.cached(created_object):
+                self.recorder.record(factory, created_object)
+                self._on_asset_post_import(factory, created_object)
+            return
+        self._on_asset_post_import(factory, created_object)
+
+    def _on_asset_post_import(self, factory: unreal.Factory, created_object: unreal.Object):
+        if created_object is not None and self.is_batching():
+            self.queue_import(factory, created_object)
+            return
+        self.apply_rules(factory, created_object)
+
+    def apply_rules(self, factory: unreal.Factory, created_object: unreal.Object):
+        """Run every registered rule for the created object right away."""
+        # the asset's tags are read once, for the reimport check, fingerprint and tag queries, and forgotten after.
+        with tag_store.cached(created_object):
+            self._apply_rules(factory, created_object)
+
+        # the activity log's summary and any errors are shown on the next tick, or once the batch this import is
+        # part of is done.
+        self._register_tick()
+
+    def _apply_rules(self, factory: unreal.Factory, created_object: unreal.Object):
+        profiling = profiler.enabled
+        if profiling:
+            asset_start = perf_counter()
+            rule_seconds = 0.0
+
         # previously had rules run on this asset:
         is_reimport = self._check_imported_asset_tag_action.test(factory, created_object)
 
-        for supported_class in self._rules.keys():
-            if isinstance(created_object, supported_class):
-                for rule in self._rules[supported_class]:
+        # built once per import so every query shares the same asset_import_data, source and destination paths.
+        object_class = type(created_object)
+        compiled = self.get_compiled_rule_set(object_class)
+        # the built-in actions stage their property and tag writes on it, which are all written at the end.
+        context = ImportContext(
+            factory,
+            created_object,
+            self.get_source_path_matcher(object_class),
+            defer_writes=True,
+            query_slots=compiled.query_slots,
+            destination_folder_matcher=compiled.destination_folder_matcher,
+        )
+        rules = compiled.rules
+        with context.activate():
+            # rules tied to destination folders the asset isn't in can't pass, so they aren't tested at all.
+            rule_indices = compiled.get_candidate_rules(context)
+            fingerprint = None
+            if self.use_reimport_fingerprints and created_object is not None:
+                fingerprint = self._get_fingerprint(context, is_reimport)
+                if fingerprint is not None and fingerprint.ruleset_hash == self.get_ruleset_hash(object_class):
+                    # the same rules were already applied to this source file.
+                    rule_indices = []
+
+            try:
+                for index in rule_indices:
+                    rule = rules[index]
                     if not is_reimport or rule.apply_on_reimport:
-                        rule.apply(factory, created_object)
-        self._set_imported_asset_tag_action.apply(factory, created_object)
-        
+                        # rules of their own might read or write the asset directly, after what earlier rules staged.
+                        if not rule.staged_writes_aware:
+                            context.flush_writes()
+                        if profiling:
+                            rule_start = perf_counter()
+                            applied = rule.apply(factory, created_object)
+                            elapsed = perf_counter() - rule_start
+                            rule_seconds += elapsed
+                            profiler.record("rule", rule, elapsed, applied, rule_start)
+                        else:
+                            rule.apply(factory, created_object)
+            except Exception:
+                # a rule that raised stops the import like before, but what earlier rules staged is still written.
+                context.flush_writes()
+                raise
 
-    def register_rule(self, class_type: type, rule: ImportRuleBase):
-        if class_type in self._rules:
-            self._rules[class_type].append(rule)
-        else:
-            self._rules[class_type] = [rule]
+            if rule_indices or not is_reimport:
+                self._set_imported_asset_tag_action.apply(factory, created_object)
+            if self.use_reimport_fingerprints and created_object is not None:
+                self._stage_fingerprint(context, object_class, fingerprint)
+            if profiling:
+                flush_start = perf_counter()
+                context.flush_writes()
+                profiler.record("manager", "flush_writes", perf_counter() - flush_start, None, flush_start)
+            else:
+                context.flush_writes()
 
-    def register_rules(self, class_type: type, rules: List[ImportRuleBase]):
-        if class_type in self._rules:
-            self._rules[class_type] += rules
+        if profiling:
+            asset_seconds = perf_counter() - asset_start
+            profiler.record("manager", "asset", asset_seconds, None, asset_start)
+            profiler.record("manager", "overhead", asset_seconds - rule_seconds)
+
+    def _get_fingerprint(self, context: ImportContext, is_reimport: bool) -> Optional[ImportFingerprint]:
+        """The fingerprint stored on a reimported asset, if its source file hasn't changed since."""
+        if not is_reimport:
+            return None
+        fingerprint = ImportFingerprint.from_tag(tag_store.get_tag(context.created_object, self.fingerprint_tag))
+        if fingerprint is None or not fingerprint.source_matches(context.source_path):
+            return None
+        return fingerprint
+
+    def _stage_fingerprint(
+        self, context: ImportContext, object_class: type, previous: Optional[ImportFingerprint]
+    ):
+        current_hash = self.get_ruleset_hash(object_class)
+        if previous is not None:
+            # the source file is unchanged, so there's no need to hash it again.
+            if not previous.modified and previous.ruleset_hash == current_hash:
+                return
+            fingerprint = ImportFingerprint(previous.source_size, previous.source_mtime, previous.source_hash, current_hash)
         else:
-            self._rules[class_type] = rules
+            fingerprint = ImportFingerprint.create(context.source_path, current_hash)
+        context.deferred_writes.set_asset_tags({self.fingerprint_tag: fingerprint.to_tag()})
+
+    def get_ruleset_hash(self, object_class: type) -> str:
+        """Stable hash of every rule for object_class, which changes when any of them is added, removed or edited."""
+        current_hash = self._ruleset_hashes.get(object_class)
+        if current_hash is None:
+            rule_hashes = [stable_hash(rule) for rule in self.get_rules_for_class(object_class)]
+            current_hash = self._ruleset_hashes[object_class] = ruleset_hash(rule_hashes)
+        return current_hash
+
+    def is_batching(self) -> bool:
+        """True while imports are being queued instead of processed straight away."""
+        if self._batch_depth > 0 or self._queued_imports:
+            return True
+        # without the editor's ticks nothing would ever process the queue.
+        return 0 < self.auto_batch_threshold < self._imports_this_tick and unreal.is_editor()
+
+    @contextmanager
+    def batch_import(self, process_on_exit: bool = False) -> Iterator["ImporterRulesManager"]:
+        """Queue every import made inside the with block. The queue is processed on the following editor ticks,
+           or straight away with a progress dialog if process_on_exit is True."""
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                if process_on_exit or not unreal.is_editor():
+                    self.process_all_queued_imports()
+                elif self._queued_imports:
+                    self._register_tick()
+
+    def queue_import(self, factory: unreal.Factory, created_object: unreal.Object):
+        path = created_object.get_path_name()
+        if path not in self._queued_imports:
+            self._batch_total += 1
+        # a repeated event keeps its place in the queue, but uses the latest factory.
+        self._queued_imports[path] = factory
+        self._register_tick()
+
+    def process_queued_imports(self, time_budget: Optional[float] = None) -> int:
+        """Apply the rules to queued imports until the queue is empty or time_budget seconds have passed.
+           Returns the number of queued imports that were handled."""
+        deadline = None if time_budget is None else perf_counter() + time_budget
+        processed = 0
+        while self._queued_imports:
+            path, factory = self._queued_imports.popitem(last=False)
+            # the asset might have been deleted or garbage collected since it was queued.
+            created_object = unreal.find_object(None, path)
+            if created_object is not None:
+                self.apply_rules(factory, created_object)
+            processed += 1
+            self._batch_processed += 1
+            if deadline is not None and perf_counter() >= deadline:
+                break
+        if not self._queued_imports:
+            self._finish_batch()
+        return processed
+
+    def process_all_queued_imports(self) -> int:
+        """Apply the rules to every queued import straight away, with a progress dialog."""
+        processed = 0
+        with unreal.ScopedSlowTask(len(self._queued_imports), "Applying importer rules...") as slow_task:
+            slow_task.make_dialog_delayed(0.5)
+            while self._queued_imports:
+                slow_task.enter_progress_frame(1)
+                processed += self.process_queued_imports(0.0)
+        return processed
+
+    def start_recording(self, file_path: str):
+        """Append every import from now on to file_path, to be replayed outside of the editor later with
+           Benchmarks/replay_imports.py."""
+        self.stop_recording()
+        self.recorder = ImportRecorder(file_path)
+        unreal.log(f"Importer Rules: recording imports to {file_path}")
+
+    def stop_recording(self):
+        if self.recorder is not None:
+            unreal.log(f"Importer Rules: recorded {self.recorder.count} imports to {self.recorder.file_path}")
+            self.recorder.close()
+            self.recorder = None
+
+    def _register_tick(self):
+        if self._tick_handle is None:
+            self._tick_handle = unreal.register_slate_post_tick_callback(self._on_tick)
+
+    def _on_tick(self, delta_seconds: float):
+        self._imports_this_tick = 0
+        if self._queued_imports and self._batch_depth == 0:
+            self.process_queued_imports(self.batch_time_budget)
+            self._log_batch_progress()
+        if not self._queued_imports and self._tick_handle is not None:
+            activity_log.flush()
+            error_collector.show_summary()
+            unreal.unregister_slate_post_tick_callback(self._tick_handle)
+            self._tick_handle = None
+
+    def _log_batch_progress(self):
+        now = perf_counter()
+        if self._queued_imports and now - self._last_progress_time >= self.batch_progress_interval:
+            self._last_progress_time = now
+            unreal.log(f"Importer Rules: applied rules to {self._batch_processed}/{self._batch_total} queued assets.")
+
+    def _finish_batch(self):
+        if self._batch_total > 1:
+            unreal.log(f"Importer Rules: finished applying rules to {self._batch_processed} queued assets.")
+        self._batch_processed = 0
+        self._batch_total = 0
+        activity_log.flush()
+        error_collector.show_summary()
+
+    def get_rules_for_class(self, object_class: type) -> List[ImportRuleBase]:
+        """Get every rule registered for the object_class or any of its parent classes.
+           The result is cached per concrete class until the registered rules change."""
+        rules = self._dispatch_cache.get(object_class)
+        if rules is None:
+            if self._rule_packs:
+                self._import_rule_packs(object_class)
+            # walk the MRO once, but keep the order the classes were registered in.
+            mro = set(object_class.__mro__)
+            rules = [
+                rule
+                for supported_class, class_rules in self._rules.items()
+                if supported_class in mro
+                for rule in class_rules
+            ]
+            self._dispatch_cache[object_class] = rules
+        return rules
+
+    def get_source_path_matcher(self, object_class: type) -> SourcePathMatcher:
+        """Get every SourcePath query used by the rules for object_class compiled into one matcher."""
+        matcher = self._source_path_matchers.get(object_class)
+        if matcher is None:
+            matcher = SourcePathMatcher(
+                query
+                for rule in self.get_rules_for_class(object_class)
+                for query in getattr(rule, "queries", [])
+                if SourcePath.is_evaluated_like(query)
+            )
+            self._source_path_matchers[object_class] = matcher
+        return matcher
+
+    def get_compiled_rule_set(self, object_class: type) -> CompiledRuleSet:
+        """Get the rules for object_class with their identical queries sharing one result per import."""
+        compiled = self._compiled_rule_sets.get(object_class)
+        if compiled is None:
+            compiled = self._compiled_rule_sets[object_class] = CompiledRuleSet(self.get_rules_for_class(object_class))
+        return compiled
+
+    def analyze_rules(self, object_classes: Optional[Sequence[type]] = None) -> List[RuleSetReport]:
+        """Find dead, shadowed and conflicting rules for each of object_classes, by default every registered class."""
+        if object_classes is None:
+            object_classes = list(self._rules)
+        return [
+            analyze_rule_set(object_class, self.get_rules_for_class(object_class)) for object_class in object_classes
+        ]
+
+    def get_rule_labels(self) -> List[Tuple[ImportRuleBase, str]]:
+        """Every registered rule with a label that tells it apart from the others and stays the same when its
+           module is reloaded: its class and name, or its owner and position among the owner's unnamed rules."""
+        labels = []
+        for class_type, rules in self._rules.items():
+            rules_by_owner: Dict[str, List[ImportRuleBase]] = OrderedDict()
+            for rule, owner in zip(rules, self._rule_owners[class_type]):
+                rules_by_owner.setdefault(owner, []).append(rule)
+            for owner, owned in rules_by_owner.items():
+                for rule, (name, occurrence) in zip(owned, _get_rule_keys(owned)):
+                    # names are kept without the owner, so the same rules loaded from elsewhere get the same labels.
+                    label = f"{class_type.__name__} {name or owner}"
+                    labels.append((rule, f"{label}#{occurrence}" if occurrence or not name else label))
+        return labels
+
+    def register_rule_pack(self, class_types: Union[type, str, Sequence[Union[type, str]]], module_name: str):
+        """Register a module of rules that is only imported the first time an asset of one of the class_types (or a
+           child class) is imported. Classes can be given by name, like "Texture2D", so they don't have to be loaded."""
+        if isinstance(class_types, (type, str)):
+            class_types = [class_types]
+        for class_type in class_types:
+            self._rule_packs.append((class_type, module_name))
+        self._invalidate_dispatch()
+
+    def _import_rule_packs(self, object_class: type):
+        mro = object_class.__mro__
+        mro_names = {cls.__name__ for cls in mro}
+        module_names = []
+        for class_type, module_name in self._rule_packs:
+            covered = class_type in mro_names if isinstance(class_type, str) else class_type in mro
+            if covered and module_name not in module_names:
+                module_names.append(module_name)
+
+        for module_name in module_names:
+            # removed first, a pack that fails to import shouldn't be retried for every asset.
+            self._rule_packs = [pack for pack in self._rule_packs if pack[1] != module_name]
+            try:
+                importlib.import_module(module_name)
+            except Exception:
+                unreal.log_error(f"Failed to import the importer rules pack {module_name}")
+                unreal.log_error(format_exc())
+
+    def register_rule(self, class_type: type, rule: ImportRuleBase, owner: Optional[str] = None):
+        """Register a rule for class_type. The owner defaults to the name of the calling module, see reload_rules."""
+        self._register(class_type, [rule], owner or _get_caller_module())
+
+    def register_rules(self, class_type: type, rules: List[ImportRuleBase], owner: Optional[str] = None):
+        """Register rules for class_type. The owner defaults to the name of the calling module, see reload_rules."""
+        self._register(class_type, rules, owner or _get_caller_module())
+
+    def _register(self, class_type: type, rules: List[ImportRuleBase], owner: str):
+        # caught here once, instead of failing on every asset the rule is applied to.
+        for rule in rules:
+            for problem in rule.validate(class_type):
+                unreal.log_warning(f"Importer rule {describe(rule)} registered by {owner}: {problem}")
+        if owner == self._reloading_owner:
+            self._reloaded_registrations += [(class_type, rule) for rule in rules]
+            return
+        self._rules.setdefault(class_type, []).extend(rules)
+        self._rule_owners.setdefault(class_type, []).extend([owner] * len(rules))
+        self._invalidate_dispatch([class_type])
+
+    def reload_rules(self, module_name: str) -> Dict[str, int]:
+        """Reload a rule module and replace only the rules it registers that changed. If the reload fails the
+           previously registered rules stay as they were. Returns the counts of added, changed, removed and
+           unchanged rules."""
+        self._reloading_owner = module_name
+        self._reloaded_registrations = []
+        try:
+            module = sys.modules.get(module_name)
+            if module is None:
+                importlib.import_module(module_name)
+            else:
+                importlib.reload(module)
+            registrations = self._reloaded_registrations
+        finally:
+            self._reloading_owner = None
+            self._reloaded_registrations = []
+
+        summary = self.replace_rules(module_name, registrations)
+        unreal.log(
+            f"Importer Rules reloaded {module_name}: {summary['added']} added, {summary['changed']} changed, "
+            f"{summary['removed']} removed, {summary['unchanged']} unchanged."
+        )
+        return summary
+
+    def replace_rules(self, owner: str, registrations: List[Tuple[type, ImportRuleBase]]) -> Dict[str, int]:
+        """Replace every rule registered by owner with the (class, rule) registrations. Rules are matched up by
+           their name, or by their order if they don't have one, and unchanged rules keep their existing object.
+           Only the dispatch caches of the classes that changed are rebuilt."""
+        new_rules: Dict[type, List[ImportRuleBase]] = {}
+        for class_type, rule in registrations:
+            new_rules.setdefault(class_type, []).append(rule)
+
+        summary = {"added": 0, "changed": 0, "removed": 0, "unchanged": 0}
+        changed_classes = []
+        for class_type in list(self._rules) + [class_type for class_type in new_rules if class_type not in self._rules]:
+            old_rules = self._rules.get(class_type, [])
+            old_owners = self._rule_owners.get(class_type, [])
+            old_owned = [rule for rule, rule_owner in zip(old_rules, old_owners) if rule_owner == owner]
+            new_owned = new_rules.get(class_type, [])
+            if not old_owned and not new_owned:
+                continue
+
+            old_by_key = dict(zip(_get_rule_keys(old_owned), old_owned))
+            merged: List[ImportRuleBase] = []
+            for key, rule in zip(_get_rule_keys(new_owned), new_owned):
+                old_rule = old_by_key.pop(key, None)
+                if old_rule is not None and _is_same_rule(old_rule, rule):
+                    # keeps the old object, and with it things like its adaptive query statistics.
+                    merged.append(old_rule)
+                    summary["unchanged"] += 1
+                else:
+                    merged.append(rule)
+                    summary["changed" if old_rule is not None else "added"] += 1
+            summary["removed"] += len(old_by_key)
+
+            if len(merged) == len(old_owned) and all(new is old for new, old in zip(merged, old_owned)):
+                continue
+
+            # rules of other owners keep their place, the owner's rules go where its first rule was.
+            rules: List[ImportRuleBase] = []
+            owners: List[str] = []
+            inserted = False
+            for rule, rule_owner in zip(old_rules, old_owners):
+                if rule_owner != owner:
+                    rules.append(rule)
+                    owners.append(rule_owner)
+                elif not inserted:
+                    rules += merged
+                    owners += [owner] * len(merged)
+                    inserted = True
+            if not inserted:
+                rules += merged
+                owners += [owner] * len(merged)
+
+            if rules:
+                self._rules[class_type] = rules
+                self._rule_owners[class_type] = owners
+            else:
+                del self._rules[class_type]
+                del self._rule_owners[class_type]
+            changed_classes.append(class_type)
+
+        if changed_classes:
+            self._invalidate_dispatch(changed_classes)
+        return summary
+
+    def watch_rule_modules(self, interval: float = 1.0):
+        """Reload rule modules automatically when their files are saved, checking every interval seconds."""
+        self._watch_interval = interval
+        self._watched_mtimes = {}
+        self._check_rule_modules()
+        if self._watch_handle is None:
+            self._watch_handle = unreal.register_slate_post_tick_callback(self._on_watch_tick)
+
+    def stop_watching_rule_modules(self):
+        if self._watch_handle is not None:
+            unreal.unregister_slate_post_tick_callback(self._watch_handle)
+            self._watch_handle = None
+
+    def _on_watch_tick(self, delta_seconds: float):
+        self._watch_elapsed += delta_seconds
+        if self._watch_elapsed >= self._watch_interval:
+            self._watch_elapsed = 0.0
+            self._check_rule_modules()
+
+    def _check_rule_modules(self):
+        owners = {owner for class_owners in self._rule_owners.values() for owner in class_owners}
+        for owner in sorted(owners):
+            file_path = getattr(sys.modules.get(owner), "__file__", None)
+            if not file_path:
+                continue
+            try:
+                mtime = os.stat(file_path).st_mtime
+            except OSError:
+                continue
+            previous = self._watched_mtimes.get(owner)
+            self._watched_mtimes[owner] = mtime
+            if previous is not None and previous != mtime:
+                try:
+                    self.reload_rules(owner)
+                except Exception:
+                    unreal.log_error(f"Failed to reload the importer rules in {owner}")
+                    unreal.log_error(format_exc())
+
+    def _invalidate_dispatch(self, class_types: Optional[List[type]] = None):
+        """Forget the cached rules of every class, or only of the classes that are or inherit from class_types."""
+        if class_types is None:
+            self._dispatch_cache.clear()
+            self._source_path_matchers.clear()
+            self._compiled_rule_sets.clear()
+            self._ruleset_hashes.clear()
+            return
+        changed = set(class_types)
+        for cache in (self._dispatch_cache, self._source_path_matchers, self._compiled_rule_sets, self._ruleset_hashes):
+            for object_class in [object_class for object_class in cache if changed.intersection(object_class.__mro__)]:
+                del cache[object_class]
+
+
+def _get_caller_module() -> str:
+    """Name of the first module up the stack that isn't part of ImporterRules, which registers the rules even
+       when it goes through helpers of this package."""
+    frame = sys._getframe(1)
+    while frame is not None:
+        module_name = frame.f_globals.get("__name__", "")
+        if module_name != "ImporterRules" and not module_name.startswith("ImporterRules."):
+            return module_name
+        frame = frame.f_back
+    return ""
+
+
+def _is_same_rule(old_rule: ImportRuleBase, new_rule: ImportRuleBase) -> bool:
+    """True if the rules have the same settings and are made of the same classes. A reloaded module defines new
+       class objects with the same names, and a rule still made of the old classes would keep running old code."""
+    if stable_hash(old_rule) != stable_hash(new_rule):
+        return False
+    old_classes = _get_classes(old_rule)
+    new_classes = _get_classes(new_rule)
+    return len(old_classes) == len(new_classes) and all(old is new for old, new in zip(old_classes, new_classes))
+
+
+def _get_classes(value: object) -> List[type]:
+    """Classes of value and of every rule, query and action inside it, in the order stable_hash visits them."""
+    if isinstance(value, (list, tuple)):
+        return [klass for item in value for klass in _get_classes(item)]
+    if isinstance(value, dict):
+        return [klass for key in sorted(value, key=repr) for klass in _get_classes(value[key])]
+    if type(value).__module__ == "unreal" or not hasattr(value, "__dict__") or isinstance(value, type):
+        return []
+    classes = [type(value)]
+    for key in sorted(vars(value)):
+        if not key.startswith("_"):
+            classes += _get_classes(vars(value)[key])
+    return classes
+
+
+def _get_rule_keys(rules: List[ImportRuleBase]) -> List[Tuple[str, int]]:
+    """Identity of each rule within its owner: its name, or its position among the unnamed rules."""
+    counts: Dict[str, int] = {}
+    keys = []
+    for rule in rules:
+        name = getattr(rule, "name", "") or ""
+        keys.append((name, counts.get(name, 0)))
+        counts[name] = counts.get(name, 0) + 1
+    return keys
 
 
 importer_rules_manager = ImporterRulesManager()
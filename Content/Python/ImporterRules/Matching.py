@@ -0,0 +1,483 @@
+# MIT License
+
+# Copyright (c) 2023 Ryan DowlingSoka
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+String matching structures used to compile many queries into a single pass over an asset's paths.
+This module doesn't import unreal, so it can be used outside of the editor as well.
+"""
+
+import os.path
+from collections import deque
+from fnmatch import fnmatchcase
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+
+class _TrieNode(object):
+    __slots__ = ("children", "values")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.values: List[Any] = []
+
+
+class PrefixTrie(object):
+    """Character trie returning the values of every added key that the searched text starts with."""
+
+    def __init__(self) -> None:
+        self._root = _TrieNode()
+        self._size = 0
+
+    def __bool__(self) -> bool:
+        return self._size > 0
+
+    def add(self, key: str, value: Any) -> None:
+        node = self._root
+        for char in key:
+            child = node.children.get(char)
+            if child is None:
+                child = node.children[char] = _TrieNode()
+            node = child
+        node.values.append(value)
+        self._size += 1
+
+    def find(self, text: str, hits: List[Any]) -> None:
+        node = self._root
+        for char in text:
+            node = node.children.get(char)
+            if node is None:
+                return
+            if node.values:
+                hits.extend(node.values)
+
+
+class SuffixTrie(PrefixTrie):
+    """Character trie over the reversed keys returning every added key that the searched text ends with."""
+
+    def add(self, key: str, value: Any) -> None:
+        super().add(key[::-1], value)
+
+    def find(self, text: str, hits: List[Any]) -> None:
+        super().find(text[::-1], hits)
+
+
+class AhoCorasick(object):
+    """Aho-Corasick automaton returning the values of every added term contained in the searched text."""
+
+    def __init__(self) -> None:
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Any]] = [[]]
+        self._built = True
+
+    def __bool__(self) -> bool:
+        return len(self._goto) > 1
+
+    def add(self, term: str, value: Any) -> None:
+        state = 0
+        for char in term:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[state][char] = next_state
+            state = next_state
+        self._output[state].append(value)
+        self._built = False
+
+    def build(self) -> None:
+        """Compute the failure links, breadth first so shorter states are always finished before longer ones."""
+        queue = deque(self._goto[0].values())
+        for state in queue:
+            self._fail[state] = 0
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+        self._built = True
+
+    def find(self, text: str, hits: List[Any]) -> None:
+        if not self._built:
+            self.build()
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                hits.extend(output[state])
+
+
+class _SourcePathTable(object):
+    """Compiled tests for the SourcePath queries sharing one case sensitivity."""
+
+    def __init__(self) -> None:
+        self.starts_with = PrefixTrie()
+        self.ends_with = SuffixTrie()
+        self.file_name_contains = AhoCorasick()
+        self.full_path_contains = AhoCorasick()
+        self.extensions: Dict[str, List[Tuple[int, int]]] = {}
+        # requires_all queries without any tests always pass, the same as all([]).
+        self.always_true: List[int] = []
+
+    def find(self, source_parts: Tuple[str, str, str], hits: List[Tuple[int, int]]) -> None:
+        _, file_name, extension = source_parts
+        if self.starts_with:
+            self.starts_with.find(file_name, hits)
+        if self.ends_with:
+            self.ends_with.find(file_name, hits)
+        if self.file_name_contains:
+            self.file_name_contains.find(file_name, hits)
+        if self.full_path_contains:
+            # tested against the file name, like SourcePath does.
+            self.full_path_contains.find(file_name, hits)
+        extension_hits = self.extensions.get(extension)
+        if extension_hits:
+            hits.extend(extension_hits)
+
+
+class SourcePathMatcher(object):
+    """Compiles every given SourcePath query into prefix/suffix tries, Aho-Corasick automatons and an extension
+       lookup, so a single scan of the file name and path finds every query that passes, no matter how many there are."""
+
+    def __init__(self, queries: Iterable[Any] = ()) -> None:
+        self._queries: List[Any] = []
+        self._slots: Dict[int, int] = {}
+        self._test_counts: List[int] = []
+        self._requires_all: List[bool] = []
+        self._tables = {True: _SourcePathTable(), False: _SourcePathTable()}
+        for query in queries:
+            self.add(query)
+
+    def __len__(self) -> int:
+        return len(self._queries)
+
+    def add(self, query: Any) -> None:
+        """Compile a SourcePath query. The query's values are expected to be lowercase already if it isn't case sensitive."""
+        if id(query) in self._slots:
+            return
+        slot = len(self._queries)
+        self._queries.append(query)
+        self._slots[id(query)] = slot
+        table = self._tables[bool(query.case_sensitive)]
+
+        # each test keeps its index so requires_all queries can count how many of their tests passed.
+        test_count = 0
+        for tests, term in (
+            (table.starts_with, query.file_name_starts_with),
+            (table.ends_with, query.file_name_ends_with),
+            (table.file_name_contains, query.file_name_contains),
+            (table.full_path_contains, query.full_path_contains),
+        ):
+            if term:
+                tests.add(term, (slot, test_count))
+                test_count += 1
+        if query.extensions:
+            for extension in set(query.extensions):
+                table.extensions.setdefault(extension, []).append((slot, test_count))
+            test_count += 1
+
+        self._test_counts.append(test_count)
+        self._requires_all.append(bool(query.requires_all))
+        if test_count == 0 and query.requires_all:
+            table.always_true.append(slot)
+
+    def covers(self, query: Any) -> bool:
+        return id(query) in self._slots
+
+    def match(
+        self,
+        source_parts: Optional[Tuple[str, str, str]],
+        source_parts_lower: Optional[Tuple[str, str, str]],
+    ) -> Set[Any]:
+        """Get the set of compiled queries that pass for the given (full path, file name, extension) source parts."""
+        if source_parts is None or source_parts_lower is None:
+            return set()
+
+        passed_tests: Dict[int, Set[int]] = {}
+        for case_sensitive, parts in ((True, source_parts), (False, source_parts_lower)):
+            table = self._tables[case_sensitive]
+            hits: List[Tuple[int, int]] = []
+            table.find(parts, hits)
+            for slot, test in hits:
+                passed_tests.setdefault(slot, set()).add(test)
+            for slot in table.always_true:
+                passed_tests.setdefault(slot, set())
+
+        queries, requires_all, test_counts = self._queries, self._requires_all, self._test_counts
+        return {
+            queries[slot]
+            for slot, tests in passed_tests.items()
+            if len(tests) == test_counts[slot] or (tests and not requires_all[slot])
+        }
+
+
+_WILDCARD_CHARACTERS = set("*?[")
+
+
+def split_folder(folder: str) -> List[str]:
+    """Segments of a content folder like "/Game/Characters/" -> ["Game", "Characters"]."""
+    return [segment for segment in folder.split("/") if segment]
+
+
+def split_destination_folder(destination_path: Optional[str]) -> Optional[List[str]]:
+    """Segments of the folder an object path like "/Game/Characters/Hero.Hero" is in."""
+    if destination_path is None:
+        return None
+    return split_folder(destination_path.rsplit("/", 1)[0])
+
+
+def match_folder(pattern: Sequence[str], folder: Sequence[str], recursive: bool) -> bool:
+    """Whether the folder segments match the pattern segments, or with recursive start with a match."""
+    def match(pattern_index: int, folder_index: int) -> bool:
+        if pattern_index == len(pattern):
+            return recursive or folder_index == len(folder)
+        segment = pattern[pattern_index]
+        if segment == "**":
+            return any(match(pattern_index + 1, index) for index in range(folder_index, len(folder) + 1))
+        if folder_index == len(folder):
+            return False
+        if segment != folder[folder_index] and not fnmatchcase(folder[folder_index], segment):
+            return False
+        return match(pattern_index + 1, folder_index + 1)
+
+    return match(0, 0)
+
+
+class _FolderNode(object):
+    __slots__ = ("children", "patterns", "any_depth", "is_any_depth", "folder_values", "subfolder_values")
+
+    def __init__(self, is_any_depth: bool = False) -> None:
+        self.children: Dict[str, "_FolderNode"] = {}
+        # segments with wildcards, tested with fnmatch.
+        self.patterns: Dict[str, "_FolderNode"] = {}
+        # the "**" child, which matches any number of segments, including none.
+        self.any_depth: Optional["_FolderNode"] = None
+        self.is_any_depth = is_any_depth
+        # values of the folders ending here, and of the ones that also match everything below them.
+        self.folder_values: List[Any] = []
+        self.subfolder_values: List[Any] = []
+
+
+class FolderTrie(object):
+    """Trie over folder segments returning the values of every added folder that a folder is in. Segments can use
+       glob wildcards like "Team*", and "**" for any number of segments. Without wildcards a lookup only walks the
+       folder's own segments, however many folders were added."""
+
+    def __init__(self) -> None:
+        self._root = _FolderNode()
+        self._size = 0
+
+    def __bool__(self) -> bool:
+        return self._size > 0
+
+    def add(self, pattern: Sequence[str], value: Any, recursive: bool = True) -> None:
+        node = self._root
+        for segment in pattern:
+            if segment == "**":
+                if node.any_depth is None:
+                    node.any_depth = _FolderNode(is_any_depth=True)
+                node = node.any_depth
+                continue
+            children = node.patterns if _WILDCARD_CHARACTERS.intersection(segment) else node.children
+            child = children.get(segment)
+            if child is None:
+                child = children[segment] = _FolderNode()
+            node = child
+        (node.subfolder_values if recursive else node.folder_values).append(value)
+        self._size += 1
+
+    def find(self, folder: Sequence[str], hits: List[Any]) -> None:
+        nodes = self._expand([self._root])
+        for node in nodes:
+            hits.extend(node.subfolder_values)
+        for segment in folder:
+            next_nodes: List[_FolderNode] = []
+            for node in nodes:
+                child = node.children.get(segment)
+                if child is not None:
+                    next_nodes.append(child)
+                for pattern, child in node.patterns.items():
+                    if fnmatchcase(segment, pattern):
+                        next_nodes.append(child)
+                if node.is_any_depth:
+                    next_nodes.append(node)
+            if not next_nodes:
+                return
+            nodes = self._expand(next_nodes)
+            # every node reached is a folder the asset is in or below.
+            for node in nodes:
+                hits.extend(node.subfolder_values)
+        for node in nodes:
+            hits.extend(node.folder_values)
+
+    @staticmethod
+    def _expand(nodes: List[_FolderNode]) -> List[_FolderNode]:
+        """The nodes plus the "**" nodes reachable from them without consuming a segment, without duplicates."""
+        expanded: List[_FolderNode] = []
+        seen: Set[int] = set()
+        for node in nodes:
+            while node is not None and id(node) not in seen:
+                seen.add(id(node))
+                expanded.append(node)
+                node = node.any_depth
+        return expanded
+
+
+class DestinationFolderMatcher(object):
+    """Compiles every given DestinationFolder query into folder tries, so a single walk of the destination folder
+       finds every query that passes."""
+
+    def __init__(self, queries: Iterable[Any] = ()) -> None:
+        self._queries: Set[int] = set()
+        self._tries = {True: FolderTrie(), False: FolderTrie()}
+        for query in queries:
+            self.add(query)
+
+    def __len__(self) -> int:
+        return len(self._queries)
+
+    def add(self, query: Any) -> None:
+        """Compile a DestinationFolder query. Its folder is expected to be lowercase already if it isn't case sensitive."""
+        if id(query) in self._queries or not query.folder:
+            return
+        self._queries.add(id(query))
+        self._tries[bool(query.case_sensitive)].add(split_folder(query.folder), query, query.recursive)
+
+    def covers(self, query: Any) -> bool:
+        return id(query) in self._queries or not query.folder
+
+    def match(self, destination_path: Optional[str], destination_path_lower: Optional[str]) -> Set[Any]:
+        """Get the set of compiled queries that pass for the object path the asset is created at."""
+        if destination_path is None or destination_path_lower is None:
+            return set()
+        hits: List[Any] = []
+        for case_sensitive, path in ((True, destination_path), (False, destination_path_lower)):
+            trie = self._tries[case_sensitive]
+            if trie:
+                trie.find(split_destination_folder(path), hits)
+        return set(hits)
+
+
+def split_source_path(file_path: Optional[str]) -> Optional[Tuple[str, str, str]]:
+    """Split a source file path into the (full path, file name without extension, extension) parts the queries test."""
+    if file_path is None:
+        return None
+    file_name, extension = os.path.splitext(os.path.basename(file_path))
+    return file_path, file_name, extension
+
+
+class SourcePathSpec(object):
+    """Plain copy of a SourcePath query's settings, which can be sent to processes that can't import unreal."""
+
+    def __init__(self, query: Any) -> None:
+        self.file_name_starts_with = query.file_name_starts_with
+        self.file_name_ends_with = query.file_name_ends_with
+        self.file_name_contains = query.file_name_contains
+        self.full_path_contains = query.full_path_contains
+        self.extensions = list(query.extensions)
+        self.requires_all = query.requires_all
+        self.case_sensitive = query.case_sensitive
+
+
+class DestinationPathSpec(object):
+    """Plain copy of a DestinationPath query's settings, which can be sent to processes that can't import unreal."""
+
+    def __init__(self, query: Any) -> None:
+        self.destination_path_contains = query.destination_path_contains
+        self.case_sensitive = query.case_sensitive
+
+    def matches(self, destination_path: str) -> bool:
+        if not self.destination_path_contains:
+            return False
+        if not self.case_sensitive:
+            destination_path = destination_path.lower()
+        return self.destination_path_contains in destination_path
+
+
+class DestinationFolderSpec(object):
+    """Plain copy of a DestinationFolder query's settings, which can be sent to processes that can't import unreal."""
+
+    def __init__(self, query: Any) -> None:
+        self.folder = query.folder
+        self.recursive = query.recursive
+        self.case_sensitive = query.case_sensitive
+
+    def matches(self, destination_path: str) -> bool:
+        if not self.folder:
+            return False
+        if not self.case_sensitive:
+            destination_path = destination_path.lower()
+        return match_folder(split_folder(self.folder), split_destination_folder(destination_path), self.recursive)
+
+
+# (requires_all, query specs) where a spec of None is a query that can only be tested on the loaded asset.
+RuleSpec = Tuple[bool, List[Optional[Any]]]
+
+
+def match_rule_specs(
+    rule_specs: Sequence[RuleSpec], records: Sequence[Tuple[Optional[str], str]]
+) -> List[List[Tuple[int, Optional[bool]]]]:
+    """Test the string matching queries of each rule against (source path, destination path) records.
+       For each record returns (rule index, verdict) for every rule that could apply: True if the rule's queries
+       pass, None if it depends on queries that need the loaded asset."""
+    matcher = SourcePathMatcher(
+        spec for _, specs in rule_specs for spec in specs if isinstance(spec, SourcePathSpec)
+    )
+    results: List[List[Tuple[int, Optional[bool]]]] = []
+    for source_path, destination_path in records:
+        source_parts = split_source_path(source_path)
+        source_parts_lower = split_source_path(None if source_path is None else source_path.lower())
+        passed_source_paths = matcher.match(source_parts, source_parts_lower)
+
+        verdicts: List[Tuple[int, Optional[bool]]] = []
+        for rule_index, (requires_all, specs) in enumerate(rule_specs):
+            if not specs:
+                verdicts.append((rule_index, True))
+                continue
+            unknown = False
+            verdict: Optional[bool]
+            for spec in specs:
+                if spec is None:
+                    unknown = True
+                    continue
+                if isinstance(spec, SourcePathSpec):
+                    result = spec in passed_source_paths
+                else:
+                    result = spec.matches(destination_path)
+                # a failing query decides "all", a passing one decides "any".
+                if result != requires_all:
+                    verdict = result
+                    break
+            else:
+                verdict = None if unknown else requires_all
+            if verdict is not False:
+                verdicts.append((rule_index, verdict))
+        results.append(verdicts)
+    return results
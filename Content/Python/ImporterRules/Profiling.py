@@ -0,0 +1,230 @@
+# MIT License
+
+# Copyright (c) 2023 Ryan DowlingSoka
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Optional instrumentation of the rules, queries and actions run by the manager.
+It is off by default, and while it is off the manager and rules only check profiler.enabled.
+
+    from ImporterRules.Profiling import profiler
+    profiler.enable(trace=True)
+    ... import some assets ...
+    profiler.export_json("C:/Temp/importer_rules_profile.json")
+    profiler.export_chrome_trace("C:/Temp/importer_rules_trace.json")
+"""
+
+import json
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class LatencyHistogram(object):
+    """Histogram of latencies in power of two microsecond buckets."""
+
+    __slots__ = ("buckets", "count", "total", "minimum", "maximum")
+
+    def __init__(self) -> None:
+        # bucket i counts latencies below 2^i microseconds and at least 2^(i-1).
+        self.buckets: List[int] = []
+        self.count = 0
+        self.total = 0.0
+        self.minimum = float("inf")
+        self.maximum = 0.0
+
+    def record(self, seconds: float) -> None:
+        bucket = int(seconds * 1e6).bit_length()
+        if bucket >= len(self.buckets):
+            self.buckets.extend([0] * (bucket + 1 - len(self.buckets)))
+        self.buckets[bucket] += 1
+        self.count += 1
+        self.total += seconds
+        self.minimum = min(self.minimum, seconds)
+        self.maximum = max(self.maximum, seconds)
+
+    def percentile(self, fraction: float) -> float:
+        """Upper bound in microseconds of the bucket containing the given percentile."""
+        target = fraction * self.count
+        seen = 0
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+            if seen >= target and count:
+                return float(1 << bucket)
+        return 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "total_ms": self.total * 1e3,
+            "mean_us": self.total * 1e6 / self.count if self.count else 0.0,
+            "min_us": self.minimum * 1e6 if self.count else 0.0,
+            "max_us": self.maximum * 1e6,
+            "p50_us": self.percentile(0.5),
+            "p90_us": self.percentile(0.9),
+            "p99_us": self.percentile(0.99),
+            "histogram_us": {f"<{1 << bucket}": count for bucket, count in enumerate(self.buckets) if count},
+        }
+
+
+class ProfileEntry(object):
+    """Call count, hit count and latencies of a single rule, query or action."""
+
+    __slots__ = ("hits", "histogram")
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.histogram = LatencyHistogram()
+
+    def to_dict(self) -> Dict[str, Any]:
+        calls = self.histogram.count
+        result = {"calls": calls, "hits": self.hits, "match_rate": self.hits / calls if calls else 0.0}
+        result.update(self.histogram.to_dict())
+        return result
+
+
+class Profiler(object):
+    """Records how often and how long the manager, rules, queries and actions run, while enabled."""
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.trace = False
+        self.max_trace_events = 1000000
+        # entries are kept per object, so rules with the same description don't share their statistics.
+        self._entries: Dict[str, Dict[Any, ProfileEntry]] = {}
+        self._trace_events: List[Dict[str, Any]] = []
+        self._names: Dict[int, Any] = {}
+        self._epoch = perf_counter()
+
+    def enable(self, trace: bool = False) -> None:
+        """Start recording. With trace=True every call is also kept as a Chrome trace event."""
+        self.enabled = True
+        self.trace = trace
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def reset(self) -> None:
+        """Forget everything recorded so far, and the names given with set_name."""
+        self._entries = {}
+        self._trace_events = []
+        self._names = {}
+        self._epoch = perf_counter()
+
+    def record(
+        self, category: str, target: Any, seconds: float, hit: Optional[bool] = None, start: Optional[float] = None
+    ) -> None:
+        """Record one call of target, which took seconds. start is the perf_counter() value the call started at."""
+        name = self.name_of(target)
+        key = target if isinstance(target, str) else id(target)
+        entries = self._entries.setdefault(category, {})
+        entry = entries.get(key)
+        if entry is None:
+            entry = entries[key] = ProfileEntry()
+        entry.histogram.record(seconds)
+        if hit:
+            entry.hits += 1
+
+        if self.trace and start is not None and len(self._trace_events) < self.max_trace_events:
+            event = {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": (start - self._epoch) * 1e6,
+                "dur": seconds * 1e6,
+                "pid": 0,
+                "tid": 0,
+            }
+            if hit is not None:
+                event["args"] = {"hit": bool(hit)}
+            self._trace_events.append(event)
+
+    def name_of(self, target: Any) -> str:
+        """Readable name for a rule, query or action, built from its class and settings."""
+        if isinstance(target, str):
+            return target
+        cached = self._names.get(id(target))
+        # the object is kept with its name so its id can't be reused by another object.
+        if cached is None or cached[0] is not target:
+            cached = self._names[id(target)] = (target, describe(target))
+        return cached[1]
+
+    def set_name(self, target: Any, name: str) -> None:
+        """Record target under name instead of its description, to tell identical rules apart."""
+        self._names[id(target)] = (target, name)
+
+    def get_hits(self, category: str) -> Dict[str, int]:
+        """Hit count of everything recorded in category so far, by name."""
+        return {name: entry.hits for name, entry in self._get_named_entries(category)}
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Everything recorded so far, grouped by category and name."""
+        return {
+            category: {name: entry.to_dict() for name, entry in self._get_named_entries(category)}
+            for category in self._entries
+        }
+
+    def _get_named_entries(self, category: str) -> List[Tuple[str, ProfileEntry]]:
+        """The entries of category by name, with a number added to the names that several objects share."""
+        named: List[Tuple[str, ProfileEntry]] = []
+        counts: Dict[str, int] = {}
+        for key, entry in self._entries.get(category, {}).items():
+            name = key if isinstance(key, str) else self._names[key][1]
+            counts[name] = counts.get(name, 0) + 1
+            named.append((name if counts[name] == 1 else f"{name} #{counts[name]}", entry))
+        return named
+
+    def export_json(self, file_path: str) -> None:
+        with open(file_path, "w") as file:
+            json.dump(self.snapshot(), file, indent=2)
+
+    def export_chrome_trace(self, file_path: str) -> None:
+        """Write the trace events in the Chrome trace event format, for chrome://tracing or Perfetto."""
+        with open(file_path, "w") as file:
+            json.dump({"traceEvents": self._trace_events, "displayTimeUnit": "ms"}, file)
+
+
+def describe(target: Any, max_length: int = 200) -> str:
+    """ClassName(setting=value, ...) description of a rule, query or action."""
+    name = getattr(target, "name", None)
+    if isinstance(name, str) and name:
+        return name
+    settings = ", ".join(
+        f"{key}={_describe_value(value)}"
+        for key, value in vars(target).items()
+        if not key.startswith("_") and not _is_default(value)
+    ) if hasattr(target, "__dict__") else ""
+    description = f"{type(target).__name__}({settings})"
+    return description if len(description) <= max_length else description[: max_length - 3] + "..."
+
+
+def _is_default(value: Any) -> bool:
+    return value is None or value is False or (isinstance(value, (str, list, tuple, dict)) and not value)
+
+
+def _describe_value(value: Any) -> str:
+    if isinstance(value, (list, tuple)):
+        return "[" + ", ".join(_describe_value(item) for item in value) + "]"
+    # nested queries and actions are described too, but engine types use their own repr.
+    if hasattr(value, "__dict__") and not isinstance(value, type) and type(value).__module__ != "unreal":
+        return describe(value)
+    return repr(value)
+
+
+profiler = Profiler()
@@ -22,21 +22,77 @@
 
 from abc import ABC
 import unreal
-from typing import List, cast, Any
-import os.path
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+from ImporterRules.Context import ImportContext, get_import_context
+from ImporterRules.Fingerprint import stable_hash
+from ImporterRules.Matching import match_folder, split_folder
+# has_editor_property used to live here, and rule modules still import it from this module.
+from ImporterRules.Schema import get_class_schema, has_editor_property  # noqa: F401
+from ImporterRules.TagStore import tag_store
 
 
 class QueryBase(ABC):
     """Base class for import queries."""
 
+    # Set to True if the query only reads data and doesn't change anything, so rules are free to change the order
+    # it runs in.
+    side_effect_free: bool = False
+    # Set to True if the result only depends on the factory, the source file and the destination path, and not on
+    # anything the actions of earlier rules change, so it can be shared by every rule for the whole import.
+    constant_per_import: bool = False
+    # Set to True if the query doesn't read the asset's properties or tags, or also reads the values staged on the
+    # import context's deferred_writes. Otherwise the staged values are written to the asset before it runs.
+    staged_writes_aware: bool = False
+    # True for subclasses of a query that evaluates the shared import context which override test() but not
+    # evaluate(), so the manager calls their test() instead.
+    tests_itself: bool = False
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        mro = cls.__mro__
+        test_owner = next(klass for klass in mro if "test" in vars(klass))
+        evaluate_owner = next(klass for klass in mro if "evaluate" in vars(klass))
+        cls.tests_itself = evaluate_owner is not QueryBase and mro.index(test_owner) < mro.index(evaluate_owner)
+
     def test(self, factory: unreal.Factory, created_object: unreal.Object) -> bool:
         """Test the created object and factory against this query."""
         raise NotImplemented
 
+    def evaluate(self, context: ImportContext) -> bool:
+        """Test the import context against this query. Queries that can read their data from the shared context
+           should override this, otherwise it falls back to test()."""
+        return self.test(context.factory, context.created_object)
+
+    def validate(self, class_type: type) -> List[str]:
+        """Problems with using this query for class_type, checked once when its rule is registered."""
+        return []
+
+    def can_pass(self, class_type: type) -> bool:
+        """False if the query can never pass for class_type, whatever is imported. Used to find dead rules."""
+        return True
+
+    def cse_key(self) -> Optional[str]:
+        """Key shared by queries that always give the same result for the same import, so rules can share a single
+           evaluation of them. None never shares. The built-in queries are keyed by their type and public settings,
+           queries of your own can return a key built from everything their result depends on."""
+        if type(self) in _KEYED_BY_SETTINGS:
+            return stable_hash(self)
+        return None
+
+    @classmethod
+    def is_evaluated_like(cls, query: Any) -> bool:
+        """True if query is tested exactly like this query type, so the manager can compile it with the other
+           queries of the type. Subclasses that change how the query is tested keep testing themselves."""
+        return isinstance(query, cls) and type(query).evaluate is cls.evaluate and not query.tests_itself
+
 
 class SourcePath(QueryBase):
     """Query an imported factory and file path"""
 
+    side_effect_free = True
+    staged_writes_aware = True
+    constant_per_import = True
+
     def __init__(
         self,
         file_name_starts_with: str = "",
@@ -68,49 +124,70 @@ class SourcePath(QueryBase):
         self.requires_all = requires_all
 
     def test(self, factory: unreal.Factory, created_object: unreal.Object) -> bool:
-        if created_object is None:
-            return False
-
-        # if the created_object doesn't implement asset_import_data we early out.
-        if not has_editor_property(created_object, "asset_import_data"):
-            return False
-
-        asset_import_data = cast(
-            unreal.AssetImportData, created_object.get_editor_property("asset_import_data")
+        return self.evaluate(get_import_context(factory, created_object))
+
+    def can_pass(self, class_type: type) -> bool:
+        # with no tests an "any" query never passes, and an "all" query passes for every source file.
+        has_tests = any(
+            (
+                self.file_name_starts_with,
+                self.file_name_ends_with,
+                self.file_name_contains,
+                self.full_path_contains,
+                self.extensions,
+            )
         )
-        file_path = asset_import_data.get_first_filename()
-
-        # if case sensitive we use the filename raw, if not we lowercase for the future comparisons.
-        file_path = file_path if self.case_sensitive else file_path.lower()
-        file_name, extension = os.path.splitext(os.path.basename(file_path))
+        return has_tests or self.requires_all
+
+    def evaluate(self, context: ImportContext) -> bool:
+        # when the manager compiled this query with the rest of the class's queries we only need to look up the result.
+        matcher = context.source_path_matcher
+        if matcher is not None and matcher.covers(self):
+            return self in context.matched_source_paths
+
+        # if case sensitive we use the filename raw, if not we use the lowercase version for the future comparisons.
+        # there are no parts if the created_object doesn't implement asset_import_data.
+        source_parts = context.get_source_parts(self.case_sensitive)
+        if source_parts is None:
+            return False
+        _, file_name, extension = source_parts
 
-        results = []
+        # a single test decides the result when it passes for "any" or fails for "all", so stop there.
+        requires_all = self.requires_all
 
         if self.file_name_starts_with:
-            results.append(file_name.startswith(self.file_name_starts_with))
+            if file_name.startswith(self.file_name_starts_with) != requires_all:
+                return not requires_all
 
         if self.file_name_ends_with:
-            results.append(file_name.endswith(self.file_name_ends_with))
+            if file_name.endswith(self.file_name_ends_with) != requires_all:
+                return not requires_all
 
         if self.file_name_contains:
-            results.append(self.file_name_contains in file_name)
+            if (self.file_name_contains in file_name) != requires_all:
+                return not requires_all
 
+        # full_path_contains has always been tested against the file name, and existing rule sets rely on that.
         if self.full_path_contains:
-            results.append(self.full_path_contains in file_name)
+            if (self.full_path_contains in file_name) != requires_all:
+                return not requires_all
 
         if self.extensions:
-            results.append(extension in self.extensions)
+            if (extension in self.extensions) != requires_all:
+                return not requires_all
 
-        if self.requires_all:
-            return all(results)
-
-        return any(results)
+        # nothing decided early: every test passed for "all", or none passed for "any".
+        return requires_all
 
 
 class DestinationPath(QueryBase):
 
     """Query based on the path the created object ends up in."""
 
+    side_effect_free = True
+    staged_writes_aware = True
+    constant_per_import = True
+
     def __init__(
         self,
         path_contains: str = "",
@@ -122,25 +199,70 @@ class DestinationPath(QueryBase):
         )
 
     def test(self, factory: unreal.Factory, created_object: unreal.Object) -> bool:
-        if created_object is None:  # Early out, can't do destination path comparisons.
-            return False
+        return self.evaluate(get_import_context(factory, created_object))
 
-        destination_path = (
-            created_object.get_path_name()
-            if self.case_sensitive
-            else created_object.get_path_name().lower()
-        )
+    def can_pass(self, class_type: type) -> bool:
+        return bool(self.destination_path_contains)
+
+    def evaluate(self, context: ImportContext) -> bool:
+        destination_path = context.get_destination_path(self.case_sensitive)
+        if destination_path is None:  # Early out, can't do destination path comparisons.
+            return False
 
         if self.destination_path_contains:
             return self.destination_path_contains in destination_path
 
         return False
 
+class DestinationFolder(QueryBase):
+
+    """Query based on the content folder the created object ends up in, like "/Game/Characters". Folder segments can
+       use glob wildcards, like "/Game/Team*/Textures", and "**" matches any number of folders. With recursive the
+       folders below it match too. The manager looks these up in a folder tree, so rules that need a folder are only
+       tested on assets inside of it."""
+
+    side_effect_free = True
+    staged_writes_aware = True
+    constant_per_import = True
+
+    def __init__(
+        self,
+        folder: str,
+        recursive: bool = True,
+        case_sensitive: bool = False,
+    ) -> None:
+        self.case_sensitive = case_sensitive
+        self.folder = folder if case_sensitive else folder.lower()
+        self.recursive = recursive
+        self._segments = split_folder(self.folder)
+
+    def test(self, factory: unreal.Factory, created_object: unreal.Object) -> bool:
+        return self.evaluate(get_import_context(factory, created_object))
+
+    def can_pass(self, class_type: type) -> bool:
+        return bool(self.folder)
+
+    def evaluate(self, context: ImportContext) -> bool:
+        # when the manager compiled this query with the rest of the class's queries we only need to look up the result.
+        matcher = context.destination_folder_matcher
+        if matcher is not None and matcher.covers(self):
+            return self in context.matched_destination_folders
+
+        if not self.folder:
+            return False
+        destination_folder = context.get_destination_folder(self.case_sensitive)
+        if destination_folder is None:  # Early out, can't do destination folder comparisons.
+            return False
+        return match_folder(self._segments, destination_folder, self.recursive)
+
 class CheckAssetTag(QueryBase):
 
     """Query based on the asset tags of the created object. Optional asset_tag_value parameter will do a string equality compare.
        If left empty, then the test will only look to see if the tag exists."""
 
+    side_effect_free = True
+    staged_writes_aware = True
+
     def __init__(
         self,
         asset_tag_key:str,
@@ -150,22 +272,181 @@ class CheckAssetTag(QueryBase):
         self.asset_tag_value = asset_tag_value
 
     def test(self, factory: unreal.Factory, created_object: unreal.Object) -> bool:
+        return self.evaluate(get_import_context(factory, created_object))
+
+    def evaluate(self, context: ImportContext) -> bool:
+        created_object = context.created_object
         if created_object is None:
             return False
-        
-        eas = unreal.get_editor_subsystem(unreal.EditorAssetSubsystem)
-        if eas:
-            value = eas.get_metadata_tag(created_object, self.asset_tag_key)
-            if value == "":
-                return False
-            return self.asset_tag_value is None or str(self.asset_tag_value) == value
-        return False
 
+        # tags staged by earlier rules haven't been written to the asset yet.
+        value = None
+        if context.deferred_writes is not None:
+            value = context.deferred_writes.asset_tags.get(self.asset_tag_key)
 
+        if value is None:
+            value = tag_store.get_tag(created_object, self.asset_tag_key)
 
-def has_editor_property(created_object: unreal.Object, editor_property: str) -> bool:
-    try:
-        obj = created_object.get_editor_property(editor_property)
-        return True
-    except:
-        return False
+        if value == "":
+            return False
+        return self.asset_tag_value is None or str(self.asset_tag_value) == value
+
+
+
+class SourceImageHeader(QueryBase):
+
+    """Query based on the header of the source image (PNG, TGA, EXR, DDS or PSD), like "16 bit or larger than 4K".
+       Sizes are in pixels and bit_depth is the bits per channel. Zero or empty tests are skipped, and as with
+       SourcePath, requires_all decides whether all or any of the tests have to pass."""
+
+    side_effect_free = True
+    staged_writes_aware = True
+    constant_per_import = True
+
+    def __init__(
+        self,
+        min_size: int = 0,
+        max_size: int = 0,
+        min_bit_depth: int = 0,
+        max_bit_depth: int = 0,
+        channels: List[int] = [],
+        formats: List[str] = [],
+        requires_all: bool = False,
+    ) -> None:
+        # sizes are compared with the largest side of the image.
+        self.min_size = min_size
+        self.max_size = max_size
+        self.min_bit_depth = min_bit_depth
+        self.max_bit_depth = max_bit_depth
+        self.channels = list(channels)
+        self.formats = [format.lower() for format in formats]
+        self.requires_all = requires_all
+
+    def test(self, factory: unreal.Factory, created_object: unreal.Object) -> bool:
+        return self.evaluate(get_import_context(factory, created_object))
+
+    def can_pass(self, class_type: type) -> bool:
+        has_tests = any(
+            (self.min_size, self.max_size, self.min_bit_depth, self.max_bit_depth, self.channels, self.formats)
+        )
+        return has_tests or self.requires_all
+
+    def evaluate(self, context: ImportContext) -> bool:
+        header = context.source_header
+        if header is None or header.format == "fbx":
+            return False
+        size = max(header.width, header.height)
+        tests = (
+            (self.min_size, lambda: size >= self.min_size),
+            (self.max_size, lambda: size <= self.max_size),
+            (self.min_bit_depth, lambda: header.bit_depth >= self.min_bit_depth),
+            (self.max_bit_depth, lambda: header.bit_depth <= self.max_bit_depth),
+            (self.channels, lambda: header.channels in self.channels),
+            (self.formats, lambda: header.format in self.formats),
+        )
+        return _test_all_or_any(tests, self.requires_all)
+
+
+class SourceFbxHeader(QueryBase):
+
+    """Query based on the header of the source FBX file: its version (like 7400 for 7.4), whether it's binary and
+       the application that exported it. Zero or empty tests are skipped, and as with SourcePath, requires_all decides
+       whether all or any of the tests have to pass."""
+
+    side_effect_free = True
+    staged_writes_aware = True
+    constant_per_import = True
+
+    def __init__(
+        self,
+        min_version: int = 0,
+        max_version: int = 0,
+        binary: Optional[bool] = None,
+        creator_contains: str = "",
+        requires_all: bool = False,
+    ) -> None:
+        self.min_version = min_version
+        self.max_version = max_version
+        self.binary = binary
+        self.creator_contains = creator_contains.lower()
+        self.requires_all = requires_all
+
+    def test(self, factory: unreal.Factory, created_object: unreal.Object) -> bool:
+        return self.evaluate(get_import_context(factory, created_object))
+
+    def can_pass(self, class_type: type) -> bool:
+        has_tests = any((self.min_version, self.max_version, self.binary is not None, self.creator_contains))
+        return has_tests or self.requires_all
+
+    def evaluate(self, context: ImportContext) -> bool:
+        header = context.source_header
+        if header is None or header.format != "fbx":
+            return False
+        version = header.properties.get("version", 0)
+        tests = (
+            (self.min_version, lambda: version >= self.min_version),
+            (self.max_version, lambda: version <= self.max_version),
+            (self.binary is not None, lambda: header.properties.get("binary") == self.binary),
+            (self.creator_contains, lambda: self.creator_contains in header.properties.get("creator", "").lower()),
+        )
+        return _test_all_or_any(tests, self.requires_all)
+
+
+def _test_all_or_any(tests: Sequence[Tuple[Any, Callable[[], bool]]], requires_all: bool) -> bool:
+    """Run the (enabled, test) pairs whose setting is enabled, stopping as soon as the result is decided."""
+    for enabled, test in tests:
+        if enabled and test() != requires_all:
+            return not requires_all
+    return requires_all
+
+
+class EditorProperty(QueryBase):
+
+    """Query based on an editor property of the created object. Optional value parameter will do an equality compare.
+       If left as None, then the test will only look to see if the class has the property."""
+
+    side_effect_free = True
+    staged_writes_aware = True
+
+    def __init__(
+        self,
+        editor_property:str,
+        value:Any = None,
+    ) -> None:
+        self.editor_property = editor_property
+        self.value = value
+
+    def test(self, factory: unreal.Factory, created_object: unreal.Object) -> bool:
+        return self.evaluate(get_import_context(factory, created_object))
+
+    def validate(self, class_type: type) -> List[str]:
+        if get_class_schema(class_type).has_property(self.editor_property) is False:
+            return [f"{class_type.__name__} has no editor property {self.editor_property}"]
+        return []
+
+    def can_pass(self, class_type: type) -> bool:
+        return get_class_schema(class_type).has_property(self.editor_property) is not False
+
+    def evaluate(self, context: ImportContext) -> bool:
+        created_object = context.created_object
+        if created_object is None or not context.schema.has_property(self.editor_property, created_object):
+            return False
+        if self.value is None:
+            return True
+
+        # properties staged by earlier rules haven't been written to the asset yet.
+        if context.deferred_writes is not None and self.editor_property in context.deferred_writes.editor_properties:
+            return context.deferred_writes.editor_properties[self.editor_property] == self.value
+        return created_object.get_editor_property(self.editor_property) == self.value
+
+
+# exactly these types, not subclasses, which might depend on settings stable_hash doesn't see.
+_KEYED_BY_SETTINGS = {
+    SourcePath,
+    DestinationPath,
+    DestinationFolder,
+    CheckAssetTag,
+    SourceImageHeader,
+    SourceFbxHeader,
+    EditorProperty,
+}
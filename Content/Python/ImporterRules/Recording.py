@@ -0,0 +1,121 @@
+# MIT License
+
+# Copyright (c) 2023 Ryan DowlingSoka
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Append-only recording of the imports the manager sees, one compact JSON line per import, so production import
+streams can be replayed through the rules outside of the editor with Benchmarks/replay_imports.py.
+
+    from ImporterRules import importer_rules_manager
+    importer_rules_manager.start_recording("C:/Temp/imports.jsonl")
+    ... import some assets ...
+    importer_rules_manager.stop_recording()
+"""
+
+import json
+import unreal
+from time import time
+from typing import Any, Dict, IO, Iterator, Optional
+
+from ImporterRules.Context import ImportContext
+from ImporterRules.TagStore import tag_store
+
+
+class ImportRecord(object):
+    """A single on_asset_post_import call, with the asset's tags from before any rules ran on it."""
+
+    __slots__ = ("time", "object_class", "factory_class", "source_path", "destination_path", "tags")
+
+    def __init__(
+        self,
+        time: float,
+        object_class: str,
+        factory_class: Optional[str],
+        source_path: Optional[str],
+        destination_path: Optional[str],
+        tags: Dict[str, str],
+    ) -> None:
+        self.time = time
+        self.object_class = object_class
+        self.factory_class = factory_class
+        self.source_path = source_path
+        self.destination_path = destination_path
+        self.tags = tags
+
+    def to_dict(self) -> Dict[str, Any]:
+        # short keys and no empty fields keep large recordings small.
+        data: Dict[str, Any] = {"t": round(self.time, 3), "c": self.object_class}
+        if self.factory_class is not None:
+            data["f"] = self.factory_class
+        if self.source_path is not None:
+            data["s"] = self.source_path
+        if self.destination_path is not None:
+            data["d"] = self.destination_path
+        if self.tags:
+            data["g"] = self.tags
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ImportRecord":
+        return cls(data["t"], data["c"], data.get("f"), data.get("s"), data.get("d"), data.get("g", {}))
+
+
+class ImportRecorder(object):
+    """Appends an ImportRecord to file_path for every import passed to record()."""
+
+    def __init__(self, file_path: str) -> None:
+        self.file_path = file_path
+        self.count = 0
+        # line buffered, so the recording is complete up to the last import even if the editor crashes.
+        self._file: Optional[IO[str]] = open(file_path, "a", encoding="utf-8", buffering=1)
+
+    def record(self, factory: unreal.Factory, created_object: unreal.Object) -> None:
+        if self._file is None or created_object is None:
+            return
+        context = ImportContext(factory, created_object)
+        record = ImportRecord(
+            time(),
+            type(created_object).__name__,
+            type(factory).__name__ if factory is not None else None,
+            context.source_path,
+            context.destination_path,
+            dict(tag_store.get_tags(created_object)),
+        )
+        self._file.write(json.dumps(record.to_dict(), separators=(",", ":"), default=str) + "\n")
+        self.count += 1
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def read_recording(file_path: str) -> Iterator[ImportRecord]:
+    """The records in a recording, in the order they were imported. Lines that were cut off are skipped."""
+    with open(file_path, encoding="utf-8") as file:
+        for line in file:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield ImportRecord.from_dict(json.loads(line))
+            except (ValueError, KeyError):
+                continue
@@ -0,0 +1,337 @@
+# MIT License
+
+# Copyright (c) 2023 Ryan DowlingSoka
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Rules defined in JSON or TOML files instead of python modules, so they can be edited without writing code.
+
+    {
+        "priority": 0,
+        "rules": [
+            {
+                "class": "Texture2D",
+                "queries": [{"type": "SourcePath", "file_name_ends_with": "_n"}],
+                "actions": [{"type": "SetEditorProperties", "flip_green_channel": false}],
+                "requires_all": false,
+                "apply_on_reimport": false
+            }
+        ]
+    }
+
+Each query and action names its class with "type", every other key is passed to its constructor. Enum values are
+written as {"enum": "TextureCompressionSettings", "value": "TC_NORMALMAP"}.
+
+The files are validated and compiled into a plain table of rules, which is cached on disk under a hash of the files'
+contents, so loading an unchanged set of files is a single unpickle. Files merge in order of their "priority", then
+their path: rules from higher priority files are registered later, so their values win.
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import sys
+import unreal
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from ImporterRules.Actions import SetAssetTags, SetEditorProperties
+from ImporterRules.Manager import ImporterRulesManager, importer_rules_manager
+from ImporterRules.Queries import (
+    CheckAssetTag,
+    DestinationFolder,
+    DestinationPath,
+    EditorProperty,
+    SourceFbxHeader,
+    SourceImageHeader,
+    SourcePath,
+)
+from ImporterRules.Rules import Rule
+
+try:
+    import tomllib
+except ImportError:
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+# folder inside every python path (e.g. each plugin's Content/Python) that is searched for rule files.
+RULE_FILE_FOLDER = "ImporterRuleFiles"
+RULE_FILE_EXTENSIONS = (".json", ".toml")
+# bump when the compiled format changes so old caches aren't used.
+CACHE_VERSION = 2
+
+QUERY_TYPES: Dict[str, type] = {
+    "SourcePath": SourcePath,
+    "DestinationPath": DestinationPath,
+    "DestinationFolder": DestinationFolder,
+    "CheckAssetTag": CheckAssetTag,
+    "EditorProperty": EditorProperty,
+    "SourceImageHeader": SourceImageHeader,
+    "SourceFbxHeader": SourceFbxHeader,
+}
+
+ACTION_TYPES: Dict[str, type] = {
+    "SetEditorProperties": SetEditorProperties,
+    "SetAssetTags": SetAssetTags,
+}
+
+# (type name, constructor kwargs)
+CompiledPart = Tuple[str, Dict[str, Any]]
+# (class name, requires_all, apply_on_reimport, queries, actions, name)
+CompiledRule = Tuple[str, bool, bool, List[CompiledPart], List[CompiledPart], str]
+
+
+class RuleFileError(ValueError):
+    """A rule file that can't be read or has invalid rules in it."""
+
+
+class _EnumValue(object):
+    """Enum value in a compiled rule, resolved to the unreal enum when the rule is created."""
+
+    def __init__(self, enum: str, value: str) -> None:
+        self.enum = enum
+        self.value = value
+
+    def resolve(self) -> Any:
+        enum = getattr(unreal, self.enum, None)
+        if enum is None or not hasattr(enum, self.value):
+            raise RuleFileError(f"Unknown enum value {self.enum}.{self.value}")
+        return getattr(enum, self.value)
+
+
+def register_query_type(name: str, query_type: type) -> None:
+    """Make a custom query usable in rule files as {"type": name, ...}."""
+    QUERY_TYPES[name] = query_type
+
+
+def register_action_type(name: str, action_type: type) -> None:
+    """Make a custom action usable in rule files as {"type": name, ...}."""
+    ACTION_TYPES[name] = action_type
+
+
+def find_rule_files(directories: Optional[Sequence[str]] = None) -> List[str]:
+    """Every rule file in the directories, by default the ImporterRuleFiles folder of every python path."""
+    if directories is None:
+        directories = [os.path.join(path, RULE_FILE_FOLDER) for path in sys.path]
+    file_paths = set()
+    for directory in directories:
+        if not os.path.isdir(directory):
+            continue
+        for root, _, file_names in os.walk(directory):
+            for file_name in file_names:
+                if file_name.lower().endswith(RULE_FILE_EXTENSIONS):
+                    file_paths.add(os.path.normpath(os.path.join(root, file_name)))
+    return sorted(file_paths)
+
+
+def load_rule_files(
+    directories: Optional[Sequence[str]] = None,
+    manager: Optional[ImporterRulesManager] = None,
+    cache_dir: Optional[str] = None,
+) -> int:
+    """Register the rules of every rule file found in directories. Returns the number of rules registered.
+       Calling it again reloads the files, replacing only the rules that changed since the last load."""
+    manager = manager or importer_rules_manager
+    owner = _get_owner(directories)
+    compiled_rules = compile_rule_files(find_rule_files(directories), cache_dir, cache_key=owner)
+    registrations = [create_rule(compiled_rule) for compiled_rule in compiled_rules]
+    manager.replace_rules(owner, registrations)
+    return len(compiled_rules)
+
+
+def compile_rule_files(
+    file_paths: Sequence[str], cache_dir: Optional[str] = None, cache_key: Optional[str] = None
+) -> List[CompiledRule]:
+    """Validate and merge the rule files, or load the result from the cache if none of the files changed.
+       Each cache_key, which defaults to the file paths, keeps only the cache of its latest set of files."""
+    contents: List[Tuple[str, bytes]] = []
+    for file_path in sorted(file_paths):
+        with open(file_path, "rb") as file:
+            contents.append((file_path, file.read()))
+
+    content_hash = hashlib.sha1(str(CACHE_VERSION).encode())
+    for file_path, content in contents:
+        content_hash.update(file_path.encode())
+        content_hash.update(b"\0")
+        content_hash.update(content)
+        content_hash.update(b"\0")
+
+    cache_dir = cache_dir if cache_dir is not None else _default_cache_dir()
+    if cache_key is None:
+        cache_key = "\0".join(sorted(file_paths))
+    cache_prefix = hashlib.sha1(cache_key.encode()).hexdigest()[:12] + "-"
+    cache_path = os.path.join(cache_dir, f"{cache_prefix}{content_hash.hexdigest()}.pickle") if cache_dir else None
+    if cache_path and os.path.isfile(cache_path):
+        try:
+            with open(cache_path, "rb") as file:
+                return pickle.load(file)
+        except Exception:
+            unreal.log_warning(f"Ignoring the unreadable importer rules cache {cache_path}")
+
+    rule_files = [(file_path, _parse_rule_file(file_path, content)) for file_path, content in contents]
+    rule_files.sort(key=lambda rule_file: (_get_priority(*rule_file), rule_file[0]))
+    compiled_rules: List[CompiledRule] = []
+    for file_path, data in rule_files:
+        compiled_rules += compile_rules(data, file_path)
+
+    if cache_path:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            # only the latest version of the rules is worth keeping, the caches of other keys are left alone.
+            for file_name in os.listdir(cache_dir):
+                if file_name.startswith(cache_prefix) and file_name.endswith(".pickle"):
+                    os.remove(os.path.join(cache_dir, file_name))
+            with open(cache_path, "wb") as file:
+                pickle.dump(compiled_rules, file, protocol=pickle.HIGHEST_PROTOCOL)
+        except OSError:
+            unreal.log_warning(f"Failed to write the importer rules cache {cache_path}")
+    return compiled_rules
+
+
+def compile_rules(data: Dict[str, Any], file_path: str = "<rules>") -> List[CompiledRule]:
+    """Validate the parsed contents of a rule file and turn them into compiled rules."""
+    rules = data.get("rules", [])
+    if not isinstance(rules, list):
+        raise RuleFileError(f"{file_path}: 'rules' must be a list")
+
+    compiled_rules: List[CompiledRule] = []
+    for index, rule in enumerate(rules):
+        where = f"{file_path}: rule {index}"
+        if not isinstance(rule, dict):
+            raise RuleFileError(f"{where}: must be an object")
+        unknown_keys = set(rule) - {"class", "queries", "actions", "requires_all", "apply_on_reimport", "name"}
+        if unknown_keys:
+            raise RuleFileError(f"{where}: unknown keys {sorted(unknown_keys)}")
+        for key in ("queries", "actions"):
+            if not isinstance(rule.get(key, []), list):
+                raise RuleFileError(f"{where}: '{key}' must be a list")
+        name = rule.get("name", "")
+        if not isinstance(name, str):
+            raise RuleFileError(f"{where}: 'name' must be a string")
+        class_name = rule.get("class")
+        if not isinstance(class_name, str) or not class_name:
+            raise RuleFileError(f"{where}: 'class' must be the name of an unreal class, like \"Texture2D\"")
+        compiled_rules.append(
+            (
+                class_name,
+                _get_bool(rule, "requires_all", where),
+                _get_bool(rule, "apply_on_reimport", where),
+                [_compile_part(part, QUERY_TYPES, f"{where} query {i}") for i, part in enumerate(rule.get("queries", []))],
+                [_compile_part(part, ACTION_TYPES, f"{where} action {i}") for i, part in enumerate(rule.get("actions", []))],
+                name,
+            )
+        )
+    return compiled_rules
+
+
+def create_rule(compiled_rule: CompiledRule) -> Tuple[type, Rule]:
+    """Create the (class, Rule) to register from a compiled rule."""
+    class_name, requires_all, apply_on_reimport, queries, actions, name = compiled_rule
+    class_type = getattr(unreal, class_name, None)
+    if not isinstance(class_type, type):
+        raise RuleFileError(f"Unknown unreal class {class_name}")
+    rule = Rule(
+        queries=[QUERY_TYPES[name](**_resolve(kwargs)) for name, kwargs in queries],
+        actions=[ACTION_TYPES[name](**_resolve(kwargs)) for name, kwargs in actions],
+        requires_all=requires_all,
+        apply_on_reimport=apply_on_reimport,
+        name=name,
+    )
+    return class_type, rule
+
+
+def _get_owner(directories: Optional[Sequence[str]]) -> str:
+    """Rules loaded from the same directories belong to the same owner, so loading them again replaces them."""
+    return f"{__name__}:{','.join(directories) if directories is not None else '<python paths>'}"
+
+
+def _compile_part(part: Any, types: Dict[str, type], where: str) -> CompiledPart:
+    if not isinstance(part, dict) or not isinstance(part.get("type"), str):
+        raise RuleFileError(f"{where}: must be an object with a \"type\"")
+    kwargs = dict(part)
+    type_name = kwargs.pop("type")
+    part_type = types.get(type_name)
+    if part_type is None:
+        raise RuleFileError(f"{where}: unknown type {type_name}, expected one of {sorted(types)}")
+
+    # check the arguments against the constructor now, rather than failing when the rules are created.
+    try:
+        inspect.signature(part_type).bind(**kwargs)
+    except TypeError as err:
+        raise RuleFileError(f"{where}: invalid arguments for {type_name}: {err}") from None
+    return type_name, {key: _compile_value(value, where) for key, value in kwargs.items()}
+
+
+def _compile_value(value: Any, where: str) -> Any:
+    if isinstance(value, dict):
+        if set(value) == {"enum", "value"}:
+            return _EnumValue(str(value["enum"]), str(value["value"]))
+        return {key: _compile_value(item, where) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_compile_value(item, where) for item in value]
+    return value
+
+
+def _resolve(value: Any) -> Any:
+    if isinstance(value, _EnumValue):
+        return value.resolve()
+    if isinstance(value, dict):
+        return {key: _resolve(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_resolve(item) for item in value]
+    return value
+
+
+def _parse_rule_file(file_path: str, content: bytes) -> Dict[str, Any]:
+    try:
+        if file_path.lower().endswith(".toml"):
+            if tomllib is None:
+                raise RuleFileError(f"{file_path}: reading TOML rule files needs python 3.11 or the tomli package")
+            data = tomllib.loads(content.decode("utf-8"))
+        else:
+            data = json.loads(content.decode("utf-8"))
+    except (ValueError, UnicodeDecodeError) as err:
+        raise RuleFileError(f"{file_path}: {err}") from None
+    if not isinstance(data, dict):
+        raise RuleFileError(f"{file_path}: must contain an object with a 'rules' list")
+    return data
+
+
+def _get_priority(file_path: str, data: Dict[str, Any]) -> float:
+    priority = data.get("priority", 0)
+    if isinstance(priority, bool) or not isinstance(priority, (int, float)):
+        raise RuleFileError(f"{file_path}: 'priority' must be a number")
+    return priority
+
+
+def _get_bool(rule: Dict[str, Any], key: str, where: str) -> bool:
+    value = rule.get(key, False)
+    if not isinstance(value, bool):
+        raise RuleFileError(f"{where}: '{key}' must be true or false")
+    return value
+
+
+def _default_cache_dir() -> Optional[str]:
+    paths = getattr(unreal, "Paths", None)
+    if paths is None:
+        return None
+    return os.path.join(paths.convert_relative_path_to_full(paths.project_saved_dir()), "ImporterRules", "RuleFileCache")
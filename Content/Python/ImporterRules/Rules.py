@@ -23,45 +23,175 @@
 from abc import ABC
 from ImporterRules.Actions import ImportActionBase
 from ImporterRules.Queries import QueryBase
+from ImporterRules.Context import ImportContext, get_import_context
+from ImporterRules.Profiling import profiler
+from ImporterRules.Errors import error_collector
 import unreal
-from typing import List
-from traceback import format_exc
+from time import perf_counter
+from typing import List, Optional
 
 class ImportRuleBase(ABC):
     """Base class for rules, to be applied """
 
-    def __init__(self, apply_on_reimport:bool=False) -> None:
+    # Set to True if apply() writes the values staged by earlier rules before anything that reads or writes the asset
+    # directly, like Rule does. Otherwise the manager writes them before calling apply().
+    staged_writes_aware: bool = False
+
+    def __init__(self, apply_on_reimport:bool=False, name:str="") -> None:
         self.apply_on_reimport = apply_on_reimport
+        # optional, identifies the rule in profiles and when its module is reloaded.
+        self.name = name
 
     def apply(self, factory: unreal.Factory, created_object: unreal.Object) -> bool:
         raise NotImplemented
-    
+
+    def validate(self, class_type: type) -> List[str]:
+        """Problems with registering this rule for class_type, like properties the class doesn't have."""
+        return []
+
+
+class QueryStatistics(object):
+    """Running cost and hit rate of a query inside a rule, used to order the queries adaptively."""
+
+    __slots__ = ("calls", "hits", "seconds")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.hits = 0
+        self.seconds = 0.0
+
+    def expected_cost(self, decisive_result: bool) -> float:
+        """Average cost of the query divided by the chance it returns the decisive_result and ends the evaluation."""
+        decisive = self.hits if decisive_result else self.calls - self.hits
+        # smoothed so queries that haven't run much yet aren't written off.
+        probability = (decisive + 1) / (self.calls + 2)
+        cost = (self.seconds + 1e-7) / (self.calls + 1)
+        return cost / probability
+
+
 class Rule(ImportRuleBase):
     """Import Rule class to apply actions if designated queries are true."""
 
-    def __init__(self, queries:List[QueryBase], actions:List[ImportActionBase], requires_all:bool=False, apply_on_reimport:bool=False) -> None:
-        super().__init__(apply_on_reimport)
+    # When True the queries are timed and reordered so the cheapest query that is most likely to decide the result
+    # runs first: likely false queries for requires_all, likely true queries otherwise. Only rules where every query
+    # is side_effect_free are reordered. Can be set for every rule here, or per rule with the adaptive_ordering parameter.
+    adaptive_ordering: bool = False
+    staged_writes_aware = True
+    # number of evaluations between reordering the queries of an adaptive rule.
+    reorder_interval: int = 64
+
+    def __init__(self, queries:List[QueryBase], actions:List[ImportActionBase], requires_all:bool=False, apply_on_reimport:bool=False, adaptive_ordering:Optional[bool]=None, name:str="") -> None:
+        super().__init__(apply_on_reimport, name)
         self.queries = queries
         self.actions = actions
         self.requires_all = requires_all
+        if adaptive_ordering is not None:
+            self.adaptive_ordering = adaptive_ordering
+        self._query_statistics: List[QueryStatistics] = []
+        self._query_order: List[int] = []
+        self._evaluations_until_reorder = 0
 
-    def apply(self, factory: unreal.Factory, created_object: unreal.Object) -> bool:
-        results = [query.test(factory, created_object) for query in self.queries]
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        # a subclass that overrides apply() might write to the asset directly, unless it says it doesn't.
+        if "apply" in vars(cls) and "staged_writes_aware" not in vars(cls):
+            cls.staged_writes_aware = False
 
-        if len(results) > 0:
-            if self.requires_all:
-                if not all(results):
-                    return False
-            else:
-                if not any(results):
-                    return False
+    def validate(self, class_type: type) -> List[str]:
+        return [problem for part in [*self.queries, *self.actions] for problem in part.validate(class_type)]
 
+    def apply(self, factory: unreal.Factory, created_object: unreal.Object) -> bool:
+        if error_collector.is_disabled(self):
+            return False
+        context = get_import_context(factory, created_object)
+        deferred_writes = context.deferred_writes
+        # queries that read the asset itself have to see what earlier rules staged.
+        if deferred_writes is not None and deferred_writes.has_pending_writes():
+            if not all(query.staged_writes_aware for query in self.queries):
+                context.flush_writes()
+        if self.queries and not self.test_queries(context):
+            return False
+
+        previous_rule = context.current_rule
+        context.current_rule = self
         try:
-            action_results = [action.apply(factory, created_object) for action in self.actions]
+            action_results = []
+            for action in self.actions:
+                # an action that writes to the asset directly has to run after the writes staged before it.
+                if deferred_writes is not None and not action.staged_writes_aware and deferred_writes.has_pending_writes():
+                    context.flush_writes()
+                if profiler.enabled:
+                    action_results.append(self._apply_action_profiled(action, factory, created_object))
+                else:
+                    action_results.append(action.apply(factory, created_object))
         except Exception as err:
-            unreal.log_error(f"Failed to run actions on {created_object.get_name()}")
-            error_message = format_exc()
-            unreal.log_error(error_message)
-            unreal.EditorDialog.show_message(title="Import Action Error", message=f"{error_message}", message_type=unreal.AppMsgType.OK, default_value=unreal.AppReturnType.OK)
+            # collected and shown once the import or batch is done, so a broken rule doesn't block the import.
+            error_collector.record_failure(self, created_object.get_path_name() if created_object else "None", err)
             return False
-        return all(action_results)
\ No newline at end of file
+        finally:
+            context.current_rule = previous_rule
+            # the actions might have changed what queries shared with later rules see.
+            context.invalidate_query_results()
+        if deferred_writes is not None:
+            # a staged write can still fail, so the rule only counts as successful once it's written.
+            deferred_writes.add_rule(self)
+        else:
+            error_collector.record_success(self)
+        return all(action_results)
+
+    def test_queries(self, context: ImportContext) -> bool:
+        """Test the queries lazily, stopping as soon as the result is known."""
+        adaptive = self.adaptive_ordering and all(query.side_effect_free for query in self.queries)
+        if adaptive or profiler.enabled:
+            return self._test_queries_timed(context, adaptive)
+        if self.requires_all:
+            return all(context.evaluate_query(query) for query in self.queries)
+        return any(context.evaluate_query(query) for query in self.queries)
+
+    def _test_queries_timed(self, context: ImportContext, adaptive: bool) -> bool:
+        """Same as test_queries, but times each query for the adaptive ordering and the profiler."""
+        if adaptive:
+            if len(self._query_statistics) != len(self.queries):
+                self._query_statistics = [QueryStatistics() for _ in self.queries]
+                self._query_order = list(range(len(self.queries)))
+                self._evaluations_until_reorder = self.reorder_interval
+
+            self._evaluations_until_reorder -= 1
+            if self._evaluations_until_reorder <= 0:
+                self._reorder_queries()
+            order = self._query_order
+        else:
+            order = range(len(self.queries))
+
+        # the result of "all" is decided by the first false query, "any" by the first true one.
+        decisive_result = not self.requires_all
+        for index in order:
+            query = self.queries[index]
+            start = perf_counter()
+            # queries of your own can return any truthy value, like all() and any() accept.
+            result = bool(context.evaluate_query(query))
+            elapsed = perf_counter() - start
+            if adaptive:
+                statistics = self._query_statistics[index]
+                statistics.seconds += elapsed
+                statistics.calls += 1
+                statistics.hits += result
+            if profiler.enabled:
+                profiler.record("query", query, elapsed, result, start)
+            if result == decisive_result:
+                return decisive_result
+        return not decisive_result
+
+    def _apply_action_profiled(self, action: ImportActionBase, factory: unreal.Factory, created_object: unreal.Object) -> bool:
+        start = perf_counter()
+        try:
+            result = action.apply(factory, created_object)
+        finally:
+            profiler.record("action", action, perf_counter() - start, None, start)
+        return result
+
+    def _reorder_queries(self) -> None:
+        decisive_result = not self.requires_all
+        statistics = self._query_statistics
+        self._query_order.sort(key=lambda index: statistics[index].expected_cost(decisive_result))
+        self._evaluations_until_reorder = self.reorder_interval
@@ -0,0 +1,115 @@
+# MIT License
+
+# Copyright (c) 2023 Ryan DowlingSoka
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Which editor properties each class exposes, so checking for a property doesn't need a get_editor_property call
+that raises when it's missing. The properties are read from the "Editor Properties" section unreal generates in
+the docstring of every class, and anything the docstring doesn't list is probed once per class.
+"""
+
+import re
+import unreal
+from typing import Any, Dict, FrozenSet, Optional
+
+_EDITOR_PROPERTIES_HEADER = "**Editor Properties:**"
+_EDITOR_PROPERTY_LINE = re.compile(r"^\s*- ``(\w+)``", re.MULTILINE)
+
+
+class ClassSchema(object):
+    """The editor properties of a single class."""
+
+    __slots__ = ("object_class", "properties", "documented", "_probed")
+
+    def __init__(self, object_class: type) -> None:
+        self.object_class = object_class
+        # True when the class's docstring lists its editor properties, so anything else can be assumed missing.
+        self.documented = False
+        properties = set()
+        for cls in object_class.__mro__:
+            documentation = cls.__dict__.get("__doc__")
+            if not isinstance(documentation, str) or _EDITOR_PROPERTIES_HEADER not in documentation:
+                continue
+            if cls is object_class:
+                self.documented = True
+            section = documentation.split(_EDITOR_PROPERTIES_HEADER, 1)[1]
+            properties.update(_EDITOR_PROPERTY_LINE.findall(section))
+        self.properties: FrozenSet[str] = frozenset(properties)
+        # results of get_editor_property for names the docstrings don't list.
+        self._probed: Dict[str, bool] = {}
+
+    def has_property(self, name: str, instance: Optional[unreal.Object] = None) -> Optional[bool]:
+        """Whether the class has the editor property. Names that aren't documented are probed on instance, or the
+           class default object, once. Returns None if that isn't possible."""
+        if name in self.properties:
+            return True
+        probed = self._probed.get(name)
+        if probed is not None:
+            return probed
+        if instance is None:
+            instance = _get_default_object(self.object_class)
+            if instance is None:
+                return False if self.documented else None
+        try:
+            instance.get_editor_property(name)
+            probed = True
+        except Exception:
+            probed = False
+        self._probed[name] = probed
+        return probed
+
+
+_schemas: Dict[Any, ClassSchema] = {}
+
+
+def get_class_schema(object_class: type) -> ClassSchema:
+    schema = _schemas.get(object_class)
+    if schema is None:
+        schema = _schemas[object_class] = ClassSchema(object_class)
+    return schema
+
+
+def get_object_schema(created_object: unreal.Object) -> ClassSchema:
+    """Schema of the created object's class. Blueprint and other generated classes share the Python type of their
+       native parent, so they're told apart by the engine class the object reports."""
+    engine_class = created_object.get_class()
+    key = engine_class if engine_class is not None else type(created_object)
+    schema = _schemas.get(key)
+    if schema is None:
+        schema = _schemas[key] = ClassSchema(type(created_object))
+    return schema
+
+
+def has_editor_property(created_object: unreal.Object, editor_property: str) -> bool:
+    """Whether created_object has the editor property, without fetching its value after the first check per class."""
+    if created_object is None:
+        return False
+    return bool(get_object_schema(created_object).has_property(editor_property, created_object))
+
+
+def _get_default_object(object_class: type) -> Optional[unreal.Object]:
+    get_default_object = getattr(unreal, "get_default_object", None)
+    if get_default_object is None:
+        return None
+    try:
+        return get_default_object(object_class)
+    except Exception:
+        return None
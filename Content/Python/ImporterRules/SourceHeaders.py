@@ -0,0 +1,285 @@
+# MIT License
+
+# Copyright (c) 2023 Ryan DowlingSoka
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Reads the headers of source files (PNG, TGA, EXR, DDS, PSD and FBX) through a memory map, so only the first few
+kilobytes of a file are ever paged in. Parsed headers are cached by path, size and modification time, so the queries
+of every rule, and reimports of an unchanged file, share a single parse.
+Doesn't need unreal, so it can be used outside of the editor too.
+"""
+
+import mmap
+import struct
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+from ImporterRules.Fingerprint import read_source_stats
+
+# the EXR header and the FBX header extension are variable length, but well within this.
+MAX_HEADER_BYTES = 64 * 1024
+
+
+class SourceHeader(object):
+    """What the header of a source file says about its contents. Values the format doesn't have are 0."""
+
+    __slots__ = ("format", "width", "height", "channels", "bit_depth", "properties")
+
+    def __init__(
+        self,
+        format: str,
+        width: int = 0,
+        height: int = 0,
+        channels: int = 0,
+        bit_depth: int = 0,
+        properties: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.format = format
+        self.width = width
+        self.height = height
+        self.channels = channels
+        # bits per channel.
+        self.bit_depth = bit_depth
+        # format specific values, like the FBX version or the DDS mip count.
+        self.properties = properties or {}
+
+    def __repr__(self) -> str:
+        return (
+            f"SourceHeader({self.format}, {self.width}x{self.height}, {self.channels} channels, "
+            f"{self.bit_depth} bits, {self.properties})"
+        )
+
+
+class SourceHeaderCache(object):
+    """Least recently used cache of parsed headers, keyed by (path, size, mtime)."""
+
+    def __init__(self, max_size: int = 4096) -> None:
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._headers: "OrderedDict[Tuple[str, int, int], Optional[SourceHeader]]" = OrderedDict()
+
+    def get(self, file_path: Optional[str]) -> Optional[SourceHeader]:
+        stats = read_source_stats(file_path)
+        if stats is None:
+            return None
+        key = (file_path, stats[0], stats[1])
+        if key in self._headers:
+            self.hits += 1
+            self._headers.move_to_end(key)
+            return self._headers[key]
+
+        self.misses += 1
+        header = parse_source_header(file_path)
+        # files that couldn't be parsed are cached too, so they aren't read again.
+        self._headers[key] = header
+        if len(self._headers) > self.max_size:
+            self._headers.popitem(last=False)
+        return header
+
+    def clear(self) -> None:
+        self._headers.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+header_cache = SourceHeaderCache()
+
+
+def read_source_header(file_path: Optional[str]) -> Optional[SourceHeader]:
+    """The header of the source file, or None if there's no such file or its format isn't supported."""
+    return header_cache.get(file_path)
+
+
+def parse_source_header(file_path: str) -> Optional[SourceHeader]:
+    try:
+        with open(file_path, "rb") as file:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                data = mapped[:MAX_HEADER_BYTES]
+    except (OSError, ValueError):
+        # ValueError is raised for empty files, which can't be mapped.
+        return None
+
+    try:
+        for magic, parser in _MAGIC_PARSERS:
+            if data.startswith(magic):
+                return parser(data)
+        # TGA files don't start with a signature.
+        if file_path.lower().endswith(".tga"):
+            return _parse_tga(data)
+    except (struct.error, IndexError, ValueError):
+        pass
+    return None
+
+
+def _parse_png(data: bytes) -> Optional[SourceHeader]:
+    if data[12:16] != b"IHDR":
+        return None
+    width, height, bit_depth, color_type = struct.unpack_from(">IIBB", data, 16)
+    # greyscale, -, RGB, palette, greyscale + alpha, -, RGBA
+    channels = {0: 1, 2: 3, 3: 3, 4: 2, 6: 4}.get(color_type, 0)
+    if color_type == 3:
+        # palette indices, the colors themselves are 8 bit.
+        bit_depth = 8
+    return SourceHeader("png", width, height, channels, bit_depth, {"color_type": color_type})
+
+
+def _parse_tga(data: bytes) -> Optional[SourceHeader]:
+    colormap_type, image_type = data[1], data[2]
+    if image_type not in (1, 2, 3, 9, 10, 11) or colormap_type not in (0, 1):
+        return None
+    colormap_entry_size = data[7]
+    width, height, pixel_depth, descriptor = struct.unpack_from("<HHBB", data, 12)
+    alpha_bits = descriptor & 0x0F
+    if image_type in (3, 11):
+        channels, bit_depth = 1, pixel_depth
+    else:
+        depth = colormap_entry_size if image_type in (1, 9) else pixel_depth
+        channels = 4 if depth == 32 or alpha_bits else 3
+        bit_depth = 5 if depth in (15, 16) else 8
+    return SourceHeader("tga", width, height, channels, bit_depth, {"compressed": image_type >= 9})
+
+
+def _parse_exr(data: bytes) -> Optional[SourceHeader]:
+    offset = 8
+    channels: Dict[str, int] = {}
+    width = height = 0
+    properties: Dict[str, Any] = {}
+    while True:
+        name_end = data.index(b"\0", offset)
+        name = data[offset:name_end].decode("latin-1")
+        if not name:
+            break
+        type_end = data.index(b"\0", name_end + 1)
+        attribute_type = data[name_end + 1 : type_end].decode("latin-1")
+        (size,) = struct.unpack_from("<i", data, type_end + 1)
+        value_start = type_end + 5
+        value = data[value_start : value_start + size]
+        if len(value) != size:
+            # the header is longer than MAX_HEADER_BYTES, use what was found so far.
+            break
+        if name == "channels" and attribute_type == "chlist":
+            channel_offset = 0
+            while value[channel_offset] != 0:
+                channel_end = value.index(b"\0", channel_offset)
+                (pixel_type,) = struct.unpack_from("<i", value, channel_end + 1)
+                # UINT, HALF, FLOAT
+                channels[value[channel_offset:channel_end].decode("latin-1")] = {0: 32, 1: 16, 2: 32}.get(pixel_type, 0)
+                channel_offset = channel_end + 17
+        elif name == "dataWindow" and attribute_type == "box2i":
+            x_min, y_min, x_max, y_max = struct.unpack_from("<iiii", value)
+            width, height = x_max - x_min + 1, y_max - y_min + 1
+        elif name == "compression" and attribute_type == "compression":
+            properties["compression"] = value[0]
+        offset = value_start + size
+    properties["channel_names"] = sorted(channels)
+    return SourceHeader("exr", width, height, len(channels), max(channels.values(), default=0), properties)
+
+
+# DDS pixel formats given by a four character code: (channels, bits per channel).
+_DDS_FOURCC = {
+    b"DXT1": (4, 8),
+    b"DXT2": (4, 8),
+    b"DXT3": (4, 8),
+    b"DXT4": (4, 8),
+    b"DXT5": (4, 8),
+    b"ATI1": (1, 8),
+    b"BC4U": (1, 8),
+    b"BC4S": (1, 8),
+    b"ATI2": (2, 8),
+    b"BC5U": (2, 8),
+    b"BC5S": (2, 8),
+}
+
+# DXGI_FORMAT values of the DX10 header extension: (channels, bits per channel).
+_DXGI_FORMATS = {
+    2: (4, 32), 3: (4, 32), 4: (4, 32),
+    6: (3, 32), 7: (3, 32), 8: (3, 32),
+    10: (4, 16), 11: (4, 16), 12: (4, 16), 13: (4, 16), 14: (4, 16),
+    16: (2, 32), 34: (2, 16), 35: (2, 16), 49: (2, 8),
+    24: (4, 10), 26: (3, 11),
+    28: (4, 8), 29: (4, 8), 30: (4, 8), 31: (4, 8), 32: (4, 8), 87: (4, 8), 91: (4, 8),
+    41: (1, 32), 54: (1, 16), 56: (1, 16), 61: (1, 8), 65: (1, 8),
+    71: (4, 8), 72: (4, 8), 74: (4, 8), 75: (4, 8), 77: (4, 8), 78: (4, 8),
+    80: (1, 8), 81: (1, 8), 83: (2, 8), 84: (2, 8),
+    95: (3, 16), 96: (3, 16), 98: (4, 8), 99: (4, 8),
+}
+
+
+def _parse_dds(data: bytes) -> Optional[SourceHeader]:
+    height, width = struct.unpack_from("<II", data, 12)
+    (mip_count,) = struct.unpack_from("<I", data, 28)
+    pixel_flags, fourcc, bit_count, red_mask, green_mask, blue_mask, alpha_mask = struct.unpack_from("<I4sIIIII", data, 80)
+    properties: Dict[str, Any] = {"mip_count": mip_count}
+    channels = bit_depth = 0
+    # DDPF_FOURCC
+    if pixel_flags & 0x4:
+        properties["fourcc"] = fourcc.decode("latin-1")
+        if fourcc == b"DX10":
+            (dxgi_format,) = struct.unpack_from("<I", data, 128)
+            properties["dxgi_format"] = dxgi_format
+            channels, bit_depth = _DXGI_FORMATS.get(dxgi_format, (0, 0))
+        else:
+            channels, bit_depth = _DDS_FOURCC.get(fourcc, (0, 0))
+    else:
+        masks = [mask for mask in (red_mask, green_mask, blue_mask, alpha_mask) if mask]
+        channels = len(masks)
+        bit_depth = max(bin(mask).count("1") for mask in masks) if masks else 0
+    return SourceHeader("dds", width, height, channels, bit_depth, properties)
+
+
+def _parse_psd(data: bytes) -> Optional[SourceHeader]:
+    version, channels, height, width, bit_depth, color_mode = struct.unpack_from(">H6xHIIHH", data, 4)
+    return SourceHeader(
+        "psb" if version == 2 else "psd", width, height, channels, bit_depth, {"color_mode": color_mode}
+    )
+
+
+def _parse_fbx_binary(data: bytes) -> Optional[SourceHeader]:
+    (version,) = struct.unpack_from("<I", data, 23)
+    properties: Dict[str, Any] = {"version": version, "binary": True}
+    # the header extension stores the creator as a string property: 'S', its length, and the text.
+    creator = data.find(b"Creator")
+    if creator >= 0 and data[creator + 7 : creator + 8] == b"S":
+        (length,) = struct.unpack_from("<I", data, creator + 8)
+        properties["creator"] = data[creator + 12 : creator + 12 + length].decode("utf-8", "replace")
+    return SourceHeader("fbx", properties=properties)
+
+
+def _parse_fbx_ascii(data: bytes) -> Optional[SourceHeader]:
+    # "; FBX 7.4.0 project file"
+    first_line = data.split(b"\n", 1)[0].decode("latin-1").split()
+    major, minor, patch = (int(part) for part in (first_line[2].split(".") + ["0", "0"])[:3])
+    properties: Dict[str, Any] = {"version": major * 1000 + minor * 100 + patch * 10, "binary": False}
+    creator = data.find(b'Creator: "')
+    if creator >= 0:
+        end = data.find(b'"', creator + 10)
+        properties["creator"] = data[creator + 10 : end].decode("utf-8", "replace")
+    return SourceHeader("fbx", properties=properties)
+
+
+_MAGIC_PARSERS: Tuple[Tuple[bytes, Callable[[bytes], Optional[SourceHeader]]], ...] = (
+    (b"\x89PNG\r\n\x1a\n", _parse_png),
+    (b"\x76\x2f\x31\x01", _parse_exr),
+    (b"DDS ", _parse_dds),
+    (b"8BPS", _parse_psd),
+    (b"Kaydara FBX Binary", _parse_fbx_binary),
+    (b"; FBX", _parse_fbx_ascii),
+)
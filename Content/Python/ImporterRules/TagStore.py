@@ -0,0 +1,94 @@
+# MIT License
+
+# Copyright (c) 2023 Ryan DowlingSoka
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Metadata tags of the assets being imported, read from the EditorAssetSubsystem in one call the first time they are
+needed and served from memory after that, until the asset's import is done.
+"""
+
+import unreal
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+
+class TagStore(object):
+    """Reads and writes asset metadata tags, caching the tags of the assets inside a cached() block."""
+
+    def __init__(self) -> None:
+        self._subsystem: Optional[unreal.EditorAssetSubsystem] = None
+        # asset -> its tags, or None until they are first read. Only assets inside a cached() block are in here.
+        self._tags: Dict[Any, Optional[Dict[str, str]]] = {}
+
+    @contextmanager
+    def cached(self, asset: unreal.Object) -> Iterator["TagStore"]:
+        """Serve the tags of asset from memory until the block ends."""
+        if asset is None or asset in self._tags:
+            yield self
+            return
+        self._tags[asset] = None
+        try:
+            yield self
+        finally:
+            self.evict(asset)
+
+    def evict(self, asset: unreal.Object) -> None:
+        self._tags.pop(asset, None)
+
+    def clear(self) -> None:
+        self._tags = {}
+
+    def get_tags(self, asset: unreal.Object) -> Dict[str, str]:
+        """Every metadata tag of asset. Don't modify the result, use set_tags."""
+        tags = self._tags.get(asset)
+        if tags is None:
+            subsystem = self._get_subsystem()
+            tags = {str(key): value for key, value in subsystem.get_metadata_tag_values(asset).items()} if subsystem else {}
+            if asset in self._tags:
+                self._tags[asset] = tags
+        return tags
+
+    def get_tag(self, asset: unreal.Object, key: str) -> str:
+        """The value of the tag, or "" if the asset doesn't have it, like EditorAssetSubsystem.get_metadata_tag."""
+        return self.get_tags(asset).get(key, "")
+
+    def set_tags(self, asset: unreal.Object, tags: Dict[str, Any]) -> None:
+        """Write the tags to the asset in one pass, skipping the ones that already have the same value."""
+        subsystem = self._get_subsystem()
+        if not subsystem:
+            return
+        cached_tags = self._tags.get(asset)
+        for key, value in tags.items():
+            value = str(value)
+            if cached_tags is not None:
+                if cached_tags.get(key) == value:
+                    continue
+                cached_tags[key] = value
+            subsystem.set_metadata_tag(asset, key, value)
+
+    def _get_subsystem(self) -> Optional[unreal.EditorAssetSubsystem]:
+        # the subsystem lives as long as the editor, but might not exist yet while it's starting up.
+        if self._subsystem is None:
+            self._subsystem = unreal.get_editor_subsystem(unreal.EditorAssetSubsystem)
+        return self._subsystem
+
+
+tag_store = TagStore()
@@ -26,7 +26,15 @@ A user can define a "Rule" by ascribing "Queries" that the incoming asset must m
 You can write your own rules, queries, and actions or use the existing generic ones to modify assets that need updating.
 """
 
-from ImporterRules.Manager import importer_rules_manager
-from ImporterRules.Actions import SetEditorProperties, SetAssetTags
-from ImporterRules.Queries import SourcePath, DestinationPath
-from ImporterRules.Rules import Rule
\ No newline at end of file
+try:
+    import unreal
+except ImportError:
+    # worker processes started by ImporterRules.Bulk run outside of the editor, where only the modules that don't
+    # need unreal (like ImporterRules.Matching) can be imported.
+    unreal = None
+
+if unreal is not None:
+    from ImporterRules.Manager import importer_rules_manager
+    from ImporterRules.Actions import SetEditorProperties, SetAssetTags
+    from ImporterRules.Queries import SourcePath, DestinationPath, DestinationFolder, EditorProperty, SourceImageHeader, SourceFbxHeader
+    from ImporterRules.Rules import Rule
\ No newline at end of file
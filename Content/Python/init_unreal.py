@@ -20,6 +20,8 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import os
+import sys
 from unreal import log_error
 from traceback import print_exc
 
@@ -28,9 +30,24 @@ from traceback import print_exc
 # to still run even if one of the modules has an error.
 
 try:
-    # Uncomment the next line to use the test file.
-    # import Examples.post_import_texture2D_settings
+    # Uncomment the next lines to use the test file. The module is only imported the first time a Texture2D is
+    # imported, registering it as a rule pack doesn't cost anything at startup.
+    # from ImporterRules import importer_rules_manager
+    # importer_rules_manager.register_rule_pack("Texture2D", "Examples.post_import_texture2D_settings")
     pass
 except Exception as err:
     log_error("Plugin Importer Rules failed to initialize.")
     print_exc()
+
+try:
+    # Registers the rules from the .json and .toml files in the ImporterRuleFiles folder of every python path.
+    # Without any such folder there is nothing to load, and the plugin isn't even imported at startup.
+    if any(os.path.isdir(os.path.join(path, "ImporterRuleFiles")) for path in sys.path):
+        from ImporterRules.RuleFiles import load_rule_files
+        load_rule_files()
+    # Uncomment the next lines to use the example rule file, the same rules as the test file.
+    # from ImporterRules.RuleFiles import load_rule_files
+    # load_rule_files([os.path.join(os.path.dirname(__file__), "Examples")])
+except Exception as err:
+    log_error("Plugin Importer Rules failed to load the rule files.")
+    print_exc()
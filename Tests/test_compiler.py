@@ -0,0 +1,142 @@
+# MIT License
+
+# Copyright (c) 2023 Ryan DowlingSoka
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import unreal
+from ImporterRules import DestinationPath, Rule, SetEditorProperties, SourcePath
+from ImporterRules.Compiler import CompiledRuleSet, analyze_rule_set
+from ImporterRules.Context import ImportContext
+from ImporterRules.Queries import CheckAssetTag, QueryBase
+
+
+class NameStartsWith(QueryBase):
+    side_effect_free = True
+
+    def __init__(self, prefix: str) -> None:
+        self._prefix = prefix
+
+    def test(self, factory: unreal.Factory, created_object: unreal.Object) -> bool:
+        return created_object.get_name().startswith(self._prefix)
+
+
+def _rule(queries, requires_all=False, apply_on_reimport=False, **editor_properties):
+    return Rule(queries, [SetEditorProperties(**editor_properties)], requires_all, apply_on_reimport)
+
+
+def test_identical_built_in_queries_share_a_slot():
+    first, second = SourcePath(extensions=[".png"]), SourcePath(extensions=[".PNG"])
+    compiled = CompiledRuleSet([_rule([first], srgb=False), _rule([second], lod_bias=1), _rule([DestinationPath("/x/")], lod_bias=2)])
+    assert compiled.query_slots == {id(first): 0, id(second): 0}
+    assert compiled.query_count == 3
+    assert compiled.unique_query_count == 2
+
+
+def test_custom_queries_only_share_with_a_key():
+    first, second = NameStartsWith("T_"), NameStartsWith("M_")
+    compiled = CompiledRuleSet([_rule([first], srgb=False), _rule([second], srgb=True)])
+    assert compiled.query_slots == {}
+
+    class KeyedNameStartsWith(NameStartsWith):
+        def cse_key(self):
+            return f"name starts with {self._prefix}"
+
+    first, second, other = KeyedNameStartsWith("T_"), KeyedNameStartsWith("T_"), KeyedNameStartsWith("M_")
+    compiled = CompiledRuleSet([_rule([first], srgb=False), _rule([second], lod_bias=1), _rule([other], lod_bias=2)])
+    assert compiled.query_slots == {id(first): 0, id(second): 0}
+
+
+def test_shared_results_match_separate_evaluation():
+    rules = [
+        _rule([SourcePath(extensions=[".png"]), DestinationPath("/textures/")], requires_all=True, srgb=False),
+        _rule([SourcePath(extensions=[".png"])], lod_bias=1),
+        _rule([DestinationPath("/textures/"), CheckAssetTag("imported")], lod_bias=2),
+    ]
+    compiled = CompiledRuleSet(rules)
+    for destination, source in [
+        ("/Game/Textures/T_Rock.T_Rock", "D:/Art/T_Rock.png"),
+        ("/Game/Meshes/T_Rock.T_Rock", "D:/Art/T_Rock.png"),
+        ("/Game/Textures/T_Sky.T_Sky", "D:/Art/T_Sky.tga"),
+    ]:
+        asset = unreal.Texture2D(destination, asset_import_data=unreal.AssetImportData(source))
+        shared = ImportContext(None, asset, query_slots=compiled.query_slots)
+        separate = ImportContext(None, asset)
+        for rule in rules:
+            for query in rule.queries:
+                assert shared.evaluate_query(query) == separate.evaluate_query(query)
+
+
+def test_dead_rules():
+    report = analyze_rule_set(unreal.Texture2D, [
+        _rule([SourcePath()], srgb=False),
+        _rule([DestinationPath("")], requires_all=True, lod_bias=1),
+        Rule([SourcePath(extensions=[".png"])], []),
+        _rule([SourcePath(extensions=[".png"])], lod_bias=2),
+    ])
+    assert [name.split(" ")[0] for name, _ in report.dead_rules] == ["Texture2D[0]", "Texture2D[1]", "Texture2D[2]"]
+
+
+def test_shadowed_rules():
+    report = analyze_rule_set(unreal.Texture2D, [
+        _rule([SourcePath(extensions=[".png"])], srgb=False),
+        _rule([SourcePath(extensions=[".png"]), DestinationPath("/ui/")], requires_all=True, lod_bias=1),
+        _rule([SourcePath(extensions=[".png"])], srgb=True, lod_bias=2),
+    ])
+    assert [(name.split(" ")[0], [by.split(" ")[0] for by in shadowed_by]) for name, shadowed_by in report.shadowed_rules] == [
+        ("Texture2D[0]", ["Texture2D[2]"]),
+        ("Texture2D[1]", ["Texture2D[2]"]),
+    ]
+
+
+def test_rules_that_only_differ_in_apply_on_reimport_are_not_shadowed():
+    report = analyze_rule_set(unreal.Texture2D, [
+        _rule([SourcePath(extensions=[".png"])], apply_on_reimport=True, srgb=False),
+        _rule([SourcePath(extensions=[".png"])], srgb=True),
+    ])
+    assert report.shadowed_rules == []
+    # on reimport only the first rule runs, so the value depends on whether it's a reimport.
+    assert [write for write, _ in report.conflicts] == ["srgb"]
+
+    report = analyze_rule_set(unreal.Texture2D, [
+        _rule([SourcePath(extensions=[".png"])], srgb=False),
+        _rule([SourcePath(extensions=[".png"])], apply_on_reimport=True, srgb=True),
+    ])
+    assert [name.split(" ")[0] for name, _ in report.shadowed_rules] == ["Texture2D[0]"]
+
+
+def test_conflicting_rules():
+    report = analyze_rule_set(unreal.Texture2D, [
+        _rule([SourcePath(extensions=[".png"])], srgb=False),
+        _rule([DestinationPath("/ui/")], srgb=True),
+        # the same value isn't a conflict.
+        _rule([DestinationPath("/hud/")], srgb=True),
+    ])
+    assert [(write, [value for _, value in values]) for write, values in report.conflicts] == [
+        ("srgb", ["False", "True", "True"])
+    ]
+
+
+def test_rules_that_cant_both_pass_dont_conflict():
+    report = analyze_rule_set(unreal.Texture2D, [
+        _rule([SourcePath(extensions=[".png"])], srgb=False),
+        _rule([SourcePath(extensions=[".tga"])], srgb=True),
+    ])
+    assert report.conflicts == []
+    assert not report.has_problems
@@ -0,0 +1,73 @@
+# MIT License
+
+# Copyright (c) 2023 Ryan DowlingSoka
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import pytest
+
+import unreal
+from ImporterRules import Rule, SetEditorProperties
+from ImporterRules.Manager import ImporterRulesManager
+from ImporterRules.Queries import QueryBase
+
+
+class Raises(QueryBase):
+    def test(self, factory, created_object):
+        raise RuntimeError("query failed")
+
+
+class SetsSrgbDirectly(Rule):
+    def apply(self, factory, created_object):
+        created_object.set_editor_property("srgb", True)
+        return True
+
+
+def _always(*actions):
+    return Rule([], list(actions), requires_all=True)
+
+
+def test_staged_writes_are_written_when_a_later_rule_raises():
+    manager = ImporterRulesManager()
+    manager.register_rules(unreal.Texture2D, [_always(SetEditorProperties(srgb=False)), Rule([Raises()], [])])
+    asset = unreal.Texture2D("/Game/T_Rock.T_Rock")
+    with pytest.raises(RuntimeError):
+        manager.on_asset_post_import(None, asset)
+    assert asset.get_editor_property("srgb") is False
+
+
+def test_rules_that_override_apply_run_after_earlier_staged_writes():
+    assert not SetsSrgbDirectly.staged_writes_aware
+    manager = ImporterRulesManager()
+    manager.register_rules(
+        unreal.Texture2D, [_always(SetEditorProperties(srgb=False)), SetsSrgbDirectly([], [], requires_all=True)]
+    )
+    asset = unreal.Texture2D("/Game/T_Rock.T_Rock")
+    manager.on_asset_post_import(None, asset)
+    assert asset.get_editor_property("srgb") is True
+
+
+def test_later_staged_writes_win():
+    manager = ImporterRulesManager()
+    manager.register_rules(
+        unreal.Texture2D, [_always(SetEditorProperties(srgb=False)), _always(SetEditorProperties(srgb=True))]
+    )
+    asset = unreal.Texture2D("/Game/T_Rock.T_Rock")
+    manager.on_asset_post_import(None, asset)
+    assert asset.get_editor_property("srgb") is True
@@ -0,0 +1,136 @@
+# MIT License
+
+# Copyright (c) 2023 Ryan DowlingSoka
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import random
+
+import unreal
+from ImporterRules import DestinationFolder, Rule, SetAssetTags
+from ImporterRules.Compiler import CompiledRuleSet
+from ImporterRules.Context import ImportContext
+from ImporterRules.Manager import ImporterRulesManager
+from ImporterRules.Matching import DestinationFolderMatcher, FolderTrie, match_folder, split_folder
+
+SEGMENTS = ["Game", "Characters", "Hero", "Textures", "UI", "Team1", "Team2"]
+PATTERN_SEGMENTS = SEGMENTS + ["**", "Team*", "*", "?I"]
+
+
+def _random_folder(rng: random.Random, segments) -> list:
+    return [rng.choice(segments) for _ in range(rng.randint(0, 4))]
+
+
+def test_folder_trie_agrees_with_match_folder():
+    rng = random.Random(2)
+    for _ in range(200):
+        patterns = [(_random_folder(rng, PATTERN_SEGMENTS), rng.random() < 0.5) for _ in range(10)]
+        trie = FolderTrie()
+        for index, (pattern, recursive) in enumerate(patterns):
+            trie.add(pattern, index, recursive)
+        for _ in range(20):
+            folder = _random_folder(rng, SEGMENTS)
+            hits = []
+            trie.find(folder, hits)
+            expected = {index for index, (pattern, recursive) in enumerate(patterns) if match_folder(pattern, folder, recursive)}
+            assert set(hits) == expected, (patterns, folder)
+
+
+def test_any_depth_segments():
+    assert match_folder(split_folder("/Game/**/Textures"), ["Game", "Textures"], False)
+    assert match_folder(split_folder("/Game/**/Textures"), ["Game", "A", "B", "Textures"], False)
+    assert not match_folder(split_folder("/Game/**/Textures"), ["Game", "A", "Textures", "B"], False)
+    assert match_folder(split_folder("/Game/**/Textures"), ["Game", "A", "Textures", "B"], True)
+    assert match_folder(split_folder("/**"), [], False)
+    assert match_folder(split_folder("/Game/**/**/UI"), ["Game", "UI"], False)
+
+
+def test_matcher_agrees_with_direct_evaluation():
+    rng = random.Random(3)
+    for _ in range(50):
+        queries = [
+            DestinationFolder(
+                "/" + "/".join(_random_folder(rng, PATTERN_SEGMENTS + ["game", "ui"])),
+                recursive=rng.random() < 0.5,
+                case_sensitive=rng.random() < 0.3,
+            )
+            for _ in range(10)
+        ]
+        matcher = DestinationFolderMatcher(queries)
+        for _ in range(20):
+            folder = "/".join(_random_folder(rng, SEGMENTS))
+            asset = unreal.Texture2D(f"/{folder}/T_Asset.T_Asset" if folder else "/T_Asset.T_Asset")
+            compiled = ImportContext(None, asset, destination_folder_matcher=matcher)
+            direct = ImportContext(None, asset)
+            for query in queries:
+                assert query.evaluate(compiled) == query.evaluate(direct), (vars(query), asset.get_path_name())
+
+
+def test_candidate_rules_include_every_rule_that_passes():
+    rules = [
+        Rule([DestinationFolder("/Game/Characters")], [SetAssetTags({"a": 1})]),
+        Rule([DestinationFolder("/Game/**/Textures", recursive=False)], [SetAssetTags({"b": 1})]),
+        Rule([DestinationFolder("/Game/UI"), DestinationFolder("/Game/Team*")], [SetAssetTags({"c": 1})]),
+        Rule([DestinationFolder("/Game/UI"), DestinationFolder("/Game/Team1")], [SetAssetTags({"d": 1})], requires_all=True),
+        Rule([], [SetAssetTags({"e": 1})], requires_all=True),
+    ]
+    compiled = CompiledRuleSet(rules)
+    assert compiled.folder_anchored_rule_count == 4
+    for path in [
+        "/Game/Characters/Hero/T_Hero.T_Hero",
+        "/Game/Characters/Textures/T_Hero.T_Hero",
+        "/Game/Team2/UI/T_Icon.T_Icon",
+        "/Game/UI/T_Icon.T_Icon",
+        "/Engine/T_Default.T_Default",
+    ]:
+        asset = unreal.Texture2D(path)
+        context = ImportContext(None, asset, destination_folder_matcher=compiled.destination_folder_matcher)
+        candidates = compiled.get_candidate_rules(context)
+        assert candidates == sorted(candidates)
+        passing = [index for index, rule in enumerate(rules) if rule.test_queries(ImportContext(None, asset))]
+        assert set(passing) <= set(candidates), path
+        assert 4 in candidates
+
+
+def test_subclasses_that_override_test_are_not_anchored():
+    class Never(DestinationFolder):
+        def test(self, factory, created_object):
+            return False
+
+    query = Never("/Game/Characters")
+    compiled = CompiledRuleSet([Rule([query], [SetAssetTags({"a": 1})])])
+    assert compiled.folder_anchored_rule_count == 0
+    assert len(compiled.destination_folder_matcher) == 0
+    asset = unreal.Texture2D("/Game/Characters/T_Hero.T_Hero")
+    assert not ImportContext(None, asset).evaluate_query(query)
+
+
+def test_rules_that_override_apply_are_not_anchored():
+    calls = []
+
+    class Logged(Rule):
+        def apply(self, factory, created_object):
+            calls.append(created_object.get_path_name())
+            return super().apply(factory, created_object)
+
+    manager = ImporterRulesManager()
+    manager.register_rules(unreal.Texture2D, [Logged([DestinationFolder("/Game/Characters")], [SetAssetTags({"a": 1})])])
+    assert manager.get_compiled_rule_set(unreal.Texture2D).folder_anchored_rule_count == 0
+    manager.on_asset_post_import(None, unreal.Texture2D("/Game/UI/T_Icon.T_Icon"))
+    assert calls == ["/Game/UI/T_Icon.T_Icon"]
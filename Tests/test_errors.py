@@ -0,0 +1,65 @@
+# MIT License
+
+# Copyright (c) 2023 Ryan DowlingSoka
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import unreal
+from ImporterRules import Rule, SourcePath
+from ImporterRules.Actions import ImportActionBase
+from ImporterRules.Errors import ErrorCollector
+from ImporterRules.Profiling import describe
+
+
+class Fails(ImportActionBase):
+    def apply(self, factory, created_object):
+        raise ValueError("broken")
+
+
+def _rules_with_the_same_description():
+    # descriptions are cut short, so these two only differ after the part that is shown.
+    long_name = "x" * 300
+    return [Rule([SourcePath(file_name_contains=long_name + suffix)], [Fails()]) for suffix in ("_a", "_b")]
+
+
+def _fail(collector, rule, asset_path="/Game/T_Rock.T_Rock"):
+    try:
+        rule.actions[0].apply(None, None)
+    except ValueError as err:
+        return collector.record_failure(rule, asset_path, err)
+
+
+def test_rules_with_the_same_description_are_recorded_separately():
+    first, second = _rules_with_the_same_description()
+    assert describe(first) == describe(second)
+    collector = ErrorCollector()
+    collector.show_dialog = False
+    assert _fail(collector, first) is not _fail(collector, second)
+    assert [record.count for record in collector.errors] == [1, 1]
+
+
+def test_circuit_breaker_counts_each_rule():
+    first, second = _rules_with_the_same_description()
+    collector = ErrorCollector()
+    collector.max_consecutive_failures = 2
+    _fail(collector, first)
+    _fail(collector, second)
+    assert not collector.is_disabled(first) and not collector.is_disabled(second)
+    _fail(collector, first)
+    assert collector.is_disabled(first) and not collector.is_disabled(second)
@@ -0,0 +1,71 @@
+# MIT License
+
+# Copyright (c) 2023 Ryan DowlingSoka
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import pytest
+
+import unreal
+from ImporterRules import Rule, SetAssetTags, SourcePath
+from ImporterRules.Manager import ImporterRulesManager
+from ImporterRules.Profiling import profiler
+from ImporterRules.Queries import QueryBase
+
+
+class ReturnsYes(QueryBase):
+    def test(self, factory, created_object):
+        return "yes"
+
+
+@pytest.fixture
+def profiling():
+    profiler.reset()
+    profiler.enable()
+    yield profiler
+    profiler.disable()
+    profiler.reset()
+
+
+def _import(manager):
+    asset = unreal.Texture2D("/Game/T_Rock.T_Rock")
+    manager.on_asset_post_import(None, asset)
+    return asset
+
+
+def test_profiler_doesnt_change_rule_results(profiling):
+    manager = ImporterRulesManager()
+    manager.register_rules(unreal.Texture2D, [Rule([ReturnsYes()], [SetAssetTags({"checked": True})])])
+    assert _import(manager)._metadata_tags.get("checked") == "True"
+    profiling.disable()
+    assert _import(manager)._metadata_tags.get("checked") == "True"
+
+
+def test_rules_with_the_same_description_are_recorded_separately(profiling):
+    # descriptions are cut short, so these two only differ after the part that is shown.
+    long_name = "x" * 300
+    rules = [
+        Rule([SourcePath(file_name_contains=long_name + suffix)], [SetAssetTags({"a": 1})])
+        for suffix in ("_a", "_b")
+    ]
+    assert profiling.name_of(rules[0]) == profiling.name_of(rules[1])
+    manager = ImporterRulesManager()
+    manager.register_rules(unreal.Texture2D, rules)
+    _import(manager)
+    assert sorted(entry["calls"] for entry in profiling.snapshot()["rule"].values()) == [1, 1]
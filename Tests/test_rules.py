@@ -0,0 +1,56 @@
+# MIT License
+
+# Copyright (c) 2023 Ryan DowlingSoka
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import pytest
+
+import unreal
+from ImporterRules import Rule, SetAssetTags
+from ImporterRules.Context import ImportContext
+from ImporterRules.Queries import QueryBase
+
+
+class Returns(QueryBase):
+    side_effect_free = True
+
+    def __init__(self, value) -> None:
+        self._value = value
+
+    def test(self, factory, created_object):
+        return self._value
+
+
+@pytest.mark.parametrize("requires_all", [False, True])
+def test_truthy_query_results_pass_with_adaptive_ordering(requires_all):
+    rule = Rule([Returns("yes"), Returns(1)], [SetAssetTags({"a": 1})], requires_all, adaptive_ordering=True)
+    context = ImportContext(None, unreal.Texture2D("/Game/T_Rock.T_Rock"))
+    for _ in range(Rule.reorder_interval * 2):
+        assert rule.test_queries(context)
+    rule = Rule([Returns(""), Returns(0)], [SetAssetTags({"a": 1})], requires_all, adaptive_ordering=True)
+    for _ in range(Rule.reorder_interval * 2):
+        assert not rule.test_queries(context)
+
+
+def test_has_editor_property_is_importable_from_queries():
+    from ImporterRules.Queries import has_editor_property
+
+    assert has_editor_property(unreal.Texture2D("/Game/T_Rock.T_Rock"), "srgb")
+    assert not has_editor_property(unreal.Texture2D("/Game/T_Rock.T_Rock"), "light_map_resolution")
@@ -0,0 +1,88 @@
+# MIT License
+
+# Copyright (c) 2023 Ryan DowlingSoka
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import random
+
+import unreal
+from ImporterRules import SourcePath
+from ImporterRules.Context import ImportContext
+from ImporterRules.Matching import SourcePathMatcher
+
+WORDS = ["T_", "_N", "_D", "Rock", "rock", "UI", "ui/", "Art", "", "_n"]
+EXTENSIONS = [".png", ".PNG", ".tga", ".fbx", ".exr"]
+
+
+def _random_query(rng: random.Random) -> SourcePath:
+    settings = {
+        name: rng.choice(WORDS)
+        for name in ("file_name_starts_with", "file_name_ends_with", "file_name_contains", "full_path_contains")
+        if rng.random() < 0.4
+    }
+    if rng.random() < 0.4:
+        settings["extensions"] = rng.sample(EXTENSIONS, rng.randint(1, 2))
+    return SourcePath(**settings, requires_all=rng.random() < 0.5, case_sensitive=rng.random() < 0.3)
+
+
+def _random_source_file(rng: random.Random) -> str:
+    folder = "/".join(rng.choice(["D:/Art", "D:/art/UI", "C:/Source/Rock"]) for _ in range(rng.randint(1, 2)))
+    name = "".join(rng.choice(WORDS) for _ in range(rng.randint(1, 3)))
+    return f"{folder}/{name}{rng.choice(EXTENSIONS)}"
+
+
+def test_matcher_agrees_with_direct_evaluation():
+    rng = random.Random(1)
+    for _ in range(50):
+        queries = [_random_query(rng) for _ in range(20)]
+        matcher = SourcePathMatcher(queries)
+        assert all(matcher.covers(query) for query in queries)
+        for _ in range(20):
+            source_file = _random_source_file(rng)
+            asset = unreal.Texture2D("/Game/T.T", asset_import_data=unreal.AssetImportData(source_file))
+            compiled = ImportContext(None, asset, matcher)
+            direct = ImportContext(None, asset)
+            for query in queries:
+                assert query.evaluate(compiled) == query.evaluate(direct), (vars(query), source_file)
+
+
+def test_assets_without_a_source_file_never_match():
+    queries = [SourcePath(extensions=[".png"]), SourcePath(requires_all=True), SourcePath(file_name_contains="a")]
+    asset = unreal.Texture2D("/Game/T.T")
+    context = ImportContext(None, asset, SourcePathMatcher(queries))
+    assert [query.evaluate(context) for query in queries] == [False, False, False]
+
+
+def test_subclasses_that_override_test_are_not_compiled():
+    class NotTemporary(SourcePath):
+        def test(self, factory, created_object):
+            return super().test(factory, created_object) and "tmp" not in created_object.get_name()
+
+    query = NotTemporary(extensions=[".png"])
+    assert not SourcePath.is_evaluated_like(query)
+    asset = unreal.Texture2D("/Game/T_tmp.T_tmp", asset_import_data=unreal.AssetImportData("D:/Art/T_tmp.png"))
+    assert not ImportContext(None, asset).evaluate_query(query)
+
+
+def test_full_path_contains_tests_the_file_name():
+    queries = [SourcePath(full_path_contains="rock"), SourcePath(full_path_contains="/art/")]
+    asset = unreal.Texture2D("/Game/T.T", asset_import_data=unreal.AssetImportData("D:/Art/T_Rock.png"))
+    for context in (ImportContext(None, asset, SourcePathMatcher(queries)), ImportContext(None, asset)):
+        assert [query.evaluate(context) for query in queries] == [True, False]